@@ -0,0 +1,5 @@
+"""
+Benchmarks for `conventional`, run against synthetic repositories.
+
+Run with `python -m benchmarks --help` from the root of the repository.
+"""
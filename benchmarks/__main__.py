@@ -0,0 +1,124 @@
+import json
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import typer
+
+from .repository import RepositoryParameters, generate_repository
+from .suite import run_benchmarks
+
+app = typer.Typer()
+
+
+def _get_revision() -> Optional[str]:
+    process = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        cwd=pathlib.Path(__file__).parent,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    return process.stdout.decode().strip() if process.returncode == 0 else None
+
+
+def _prepare_repository(path: pathlib.Path, params: RepositoryParameters) -> None:
+    # Generated repositories are reused if they were generated with the same parameters
+    marker = path.joinpath(".git", "benchmark-parameters.json")
+    if marker.exists() and json.loads(marker.read_text()) == params:
+        typer.echo(f"Reusing repository at {path}", err=True)
+        return
+
+    if path.exists() and any(path.iterdir()):
+        raise typer.BadParameter(f"{path} already exists and is not empty")
+
+    typer.echo(f"Generating repository at {path}", err=True)
+    generate_repository(path, params)
+    marker.write_text(json.dumps(params))
+
+
+def _print_comparison(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    for name, result in current["results"].items():
+        if name not in previous["results"]:
+            continue
+
+        before = previous["results"][name]["seconds"]
+        after = result["seconds"]
+        ratio = after / before if before else float("inf")
+
+        typer.echo(f"{name}: {before:.3f}s -> {after:.3f}s ({ratio:.2f}x)")
+
+
+@app.command()
+def main(
+    output: Optional[pathlib.Path] = typer.Option(
+        None, help="A file to write the results to, as JSON. Defaults to stdout."
+    ),
+    compare: Optional[pathlib.Path] = typer.Option(
+        None, exists=True, help="A previous results file to compare the results to."
+    ),
+    repository: Optional[pathlib.Path] = typer.Option(
+        None,
+        help="Where to generate the repository. It will be reused by later runs with the same parameters.",
+    ),
+    commits: int = typer.Option(10_000, help="The number of commits to generate."),
+    tags: int = typer.Option(50, help="The number of tags to generate."),
+    conventional_ratio: float = typer.Option(
+        0.5, help="The fraction of commits using a Conventional Commits message."
+    ),
+    mean_body_size: int = typer.Option(
+        200, help="The mean size of commit bodies, in characters."
+    ),
+    max_body_size: int = typer.Option(
+        100_000, help="The maximum size of commit bodies, in characters."
+    ),
+    merge_ratio: float = typer.Option(
+        0.05, help="The fraction of commits which merge in a short-lived branch."
+    ),
+    seed: int = typer.Option(0, help="The seed used when generating the repository."),
+    repeat: int = typer.Option(3, help="The number of times to run each benchmark."),
+    benchmark: List[str] = typer.Option(
+        None, help="The name of a benchmark to run. May be specified multiple times."
+    ),
+) -> None:
+    """
+    Runs the benchmark suite against a synthetic repository.
+    """
+
+    params: RepositoryParameters = {
+        "commits": commits,
+        "tags": tags,
+        "conventional_ratio": conventional_ratio,
+        "mean_body_size": mean_body_size,
+        "max_body_size": max_body_size,
+        "merge_ratio": merge_ratio,
+        "seed": seed,
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = repository or pathlib.Path(temp_dir)
+        _prepare_repository(path.resolve(), params)
+
+        results = run_benchmarks(path.resolve(), repeat=repeat, names=benchmark)
+
+    report = {
+        "revision": _get_revision(),
+        "python": platform.python_version(),
+        "parameters": params,
+        "results": results,
+    }
+
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2))
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        typer.echo()
+
+    if compare is not None:
+        _print_comparison(json.loads(compare.read_text()), report)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,139 @@
+import pathlib
+import random
+import subprocess
+from typing import Iterator, List, Optional, TypedDict
+
+TYPES = ["feat", "fix", "docs", "chore", "refactor", "test", "perf"]
+SCOPES = ["api", "cli", "parser", "templates", "git"]
+
+START_TIMESTAMP = 1_600_000_000
+
+
+class RepositoryParameters(TypedDict):
+    commits: int
+    tags: int
+    conventional_ratio: float
+    mean_body_size: int
+    max_body_size: int
+    merge_ratio: float
+    seed: int
+
+
+def _create_subject(rng: random.Random, index: int, conventional: bool) -> str:
+    if not conventional:
+        return f"Update the thing which needed updating ({index})"
+
+    typ = rng.choice(TYPES)
+    scope = f"({rng.choice(SCOPES)})" if rng.random() < 0.5 else ""
+    breaking = "!" if rng.random() < 0.01 else ""
+    return f"{typ}{scope}{breaking}: Change number {index}"
+
+
+def _create_body(rng: random.Random, index: int, params: RepositoryParameters) -> str:
+    if params["mean_body_size"] <= 0:
+        return ""
+
+    size = int(rng.expovariate(1 / params["mean_body_size"]))
+    size = min(size, params["max_body_size"])
+
+    words: List[str] = []
+    length = 0
+    while length < size:
+        word = rng.choice(["lorem", "ipsum", "dolor", "sit", "amet", "commit"])
+        words.append(word)
+        length += len(word) + 1
+
+    lines = [" ".join(words[i : i + 12]) for i in range(0, len(words), 12)]
+    body = "\n".join(lines)
+
+    footers = []
+    if rng.random() < 0.2:
+        footers.append(f"Closes #{index}")
+    if rng.random() < 0.01:
+        footers.append("BREAKING CHANGE: Something has changed")
+
+    return "\n\n".join(part for part in [body, "\n".join(footers)] if part)
+
+
+def _generate_stream(params: RepositoryParameters) -> Iterator[str]:
+    rng = random.Random(params["seed"])
+
+    tag_interval = max(params["commits"] // max(params["tags"], 1), 1)
+    tag_count = 0
+
+    main_tip: Optional[int] = None
+    mark = 0
+
+    def _commit(branch: str, parents: List[int]) -> Iterator[str]:
+        nonlocal mark
+        mark += 1
+
+        conventional = rng.random() < params["conventional_ratio"]
+        message = _create_subject(rng, mark, conventional)
+
+        body = _create_body(rng, mark, params)
+        if body:
+            message = f"{message}\n\n{body}"
+
+        data = message.encode()
+        timestamp = START_TIMESTAMP + mark * 60
+
+        yield f"commit {branch}\n"
+        yield f"mark :{mark}\n"
+        yield f"committer Benchmark <benchmark@example.com> {timestamp} +0000\n"
+        yield f"data {len(data)}\n{message}\n"
+
+        if parents:
+            yield f"from :{parents[0]}\n"
+        for parent in parents[1:]:
+            yield f"merge :{parent}\n"
+
+        yield "\n"
+
+    while mark < params["commits"]:
+        parents: List[int] = [main_tip] if main_tip is not None else []
+
+        if main_tip is not None and rng.random() < params["merge_ratio"]:
+            # Create a short-lived branch off of main, then merge it back in
+            side_tip = main_tip
+            for _ in range(rng.randint(1, 3)):
+                yield from _commit("refs/heads/side", [side_tip])
+                side_tip = mark
+
+            parents.append(side_tip)
+
+        yield from _commit("refs/heads/main", parents)
+        main_tip = mark
+
+        if tag_count < params["tags"] and mark // tag_interval > tag_count:
+            tag_count += 1
+            yield f"reset refs/tags/v{tag_count}.0.0\nfrom :{main_tip}\n\n"
+
+
+def generate_repository(path: pathlib.Path, params: RepositoryParameters) -> None:
+    """
+    Generates a synthetic git repository at the given path, using `git fast-import`. The
+    same parameters will always generate the same repository.
+    """
+
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "--quiet"], cwd=path, check=True)
+
+    process = subprocess.Popen(
+        ["git", "fast-import", "--quiet"], cwd=path, stdin=subprocess.PIPE
+    )
+    assert process.stdin
+
+    for chunk in _generate_stream(params):
+        process.stdin.write(chunk.encode())
+
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError("Failed to generate repository")
+
+    for args in [
+        ["git", "symbolic-ref", "HEAD", "refs/heads/main"],
+        ["git", "update-ref", "-d", "refs/heads/side"],
+        ["git", "reset", "--quiet", "--hard"],
+    ]:
+        subprocess.run(args, cwd=path, check=True)
@@ -0,0 +1,258 @@
+import asyncio
+import io
+import os
+import pathlib
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    TypedDict,
+)
+
+import confuse
+
+from conventional import git
+from conventional.commands import parse_commit, template
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+Benchmark = Callable[[], Awaitable[int]]
+BenchmarkFactory = Callable[[pathlib.Path], Awaitable[Benchmark]]
+
+
+class Result(TypedDict):
+    seconds: float
+    items: int
+    items_per_second: float
+
+    # Peak memory allocated by Python while running the benchmark, or the peak resident
+    # set size of the process for command-line benchmarks.
+    peak_memory: Optional[int]
+    peak_rss: Optional[int]
+
+
+def _create_config() -> confuse.Configuration:
+    config = confuse.Configuration("Conventional", "conventional", read=False)
+    config.read(user=False)
+    return config
+
+
+async def _reset_caches() -> None:
+    git.clear_caches()
+
+
+async def _iterate(items: List[Any]) -> AsyncIterable[Any]:
+    for item in items:
+        yield item
+
+
+async def _list_commits(path: pathlib.Path) -> List[git.Commit]:
+    return [commit async for commit in git.get_commits(path=path, reverse=True)]
+
+
+async def _list_changes(path: pathlib.Path) -> List[template.Change]:
+    config = _create_config()
+    commits = _iterate(await _list_commits(path))
+
+    stream = parse_commit.main(config, input=commits, include_unparsed=True)
+    return [change async for change in stream]  # type: ignore
+
+
+async def _get_commits(path: pathlib.Path) -> Benchmark:
+    async def _run() -> int:
+        return len([commit async for commit in git.get_commits(path=path)])
+
+    return _run
+
+
+async def _get_commits_prefiltered(path: pathlib.Path) -> Benchmark:
+    parser = parse_commit.load_parser(_create_config())
+    prefilter = parse_commit.get_prefilter(parser)
+
+    async def _run() -> int:
+        stream = git.get_commits(path=path, prefilter=prefilter)
+        return len([commit async for commit in stream])
+
+    return _run
+
+
+async def _get_tags(path: pathlib.Path) -> Benchmark:
+    async def _run() -> int:
+        return len(list(await git.get_tags(path=path)))
+
+    return _run
+
+
+async def _parser_parse(path: pathlib.Path) -> Benchmark:
+    parser = parse_commit.load_parser(_create_config())
+    commits = await _list_commits(path)
+
+    async def _run() -> int:
+        for commit in commits:
+            parser.parse(commit["subject"], commit["body"])
+
+        return len(commits)
+
+    return _run
+
+
+async def _parse_commit_main(path: pathlib.Path) -> Benchmark:
+    config = _create_config()
+    commits = await _list_commits(path)
+
+    async def _run() -> int:
+        stream = parse_commit.main(
+            config, input=_iterate(commits), include_unparsed=True
+        )
+        return len([change async for change in stream])
+
+    return _run
+
+
+async def _template_main(path: pathlib.Path, *, compact: bool = False) -> Benchmark:
+    config = _create_config()
+    config.set({"template": {"compact": compact}})
+    changes = await _list_changes(path)
+
+    async def _run() -> int:
+        stream = await template.main(
+            config,
+            input=_iterate(changes),
+            include_unparsed=False,
+            unreleased_version=None,
+        )
+        stream.dump(io.StringIO())
+
+        return len(changes)
+
+    return _run
+
+
+async def _template_main_compact(path: pathlib.Path) -> Benchmark:
+    return await _template_main(path, compact=True)
+
+
+BENCHMARKS: Dict[str, BenchmarkFactory] = {
+    "git.get_commits": _get_commits,
+    "git.get_commits[prefilter]": _get_commits_prefiltered,
+    "git.get_tags": _get_tags,
+    "Parser.parse": _parser_parse,
+    "parse_commit.main": _parse_commit_main,
+    "template.main": _template_main,
+    "template.main[compact]": _template_main_compact,
+}
+
+COMMAND_BENCHMARKS: Dict[str, List[str]] = {
+    "cli:list-commits": ["list-commits"],
+    "cli:list-commits --parse": ["list-commits", "--parse"],
+    "cli:template": ["template"],
+}
+
+
+def _create_result(seconds: float, items: int) -> Result:
+    return {
+        "seconds": seconds,
+        "items": items,
+        "items_per_second": items / seconds if seconds else 0.0,
+        "peak_memory": None,
+        "peak_rss": None,
+    }
+
+
+def _run_benchmark(
+    path: pathlib.Path, factory: BenchmarkFactory, repeat: int
+) -> Result:
+    async def _measure(trace_memory: bool) -> Result:
+        await _reset_caches()
+        benchmark = await factory(path)
+
+        if trace_memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        items = await benchmark()
+        result = _create_result(time.perf_counter() - start, items)
+
+        if trace_memory:
+            _, result["peak_memory"] = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        return result
+
+    # Tracing memory allocations is slow, so memory is measured in a separate run to
+    # avoid skewing the timings.
+    result = min(
+        (asyncio.run(_measure(False)) for _ in range(repeat)),
+        key=lambda result: result["seconds"],
+    )
+    result["peak_memory"] = asyncio.run(_measure(True))["peak_memory"]
+
+    return result
+
+
+def _run_command_benchmark(path: pathlib.Path, args: List[str], repeat: int) -> Result:
+    results: List[Result] = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        process = subprocess.Popen(
+            [sys.executable, "-m", "conventional", *args],
+            cwd=path,
+            env={**os.environ, "PYTHONPATH": str(ROOT)},
+            stdout=subprocess.PIPE,
+        )
+        assert process.stdout
+
+        items = sum(1 for _ in process.stdout)
+
+        # Wait for the process directly, as it is the only way to get the resource
+        # usage of a single child process
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.WEXITSTATUS(status)
+
+        if process.returncode != 0:
+            raise RuntimeError(f"`conventional {' '.join(args)}` failed")
+
+        result = _create_result(time.perf_counter() - start, items)
+        result["peak_rss"] = usage.ru_maxrss * 1024
+        results.append(result)
+
+    return min(results, key=lambda result: result["seconds"])
+
+
+def run_benchmarks(
+    path: pathlib.Path, *, repeat: int, names: Optional[List[str]] = None
+) -> Dict[str, Result]:
+    """
+    Runs the benchmarks against the repository at the given path, returning the fastest
+    result of each benchmark after running it `repeat` times.
+    """
+
+    results: Dict[str, Result] = {}
+
+    cwd = os.getcwd()
+    os.chdir(path)
+
+    try:
+        for name, factory in BENCHMARKS.items():
+            if not names or name in names:
+                print(f"Running {name}...", file=sys.stderr)
+                results[name] = _run_benchmark(path, factory, repeat)
+
+        for name, args in COMMAND_BENCHMARKS.items():
+            if not names or name in names:
+                print(f"Running {name}...", file=sys.stderr)
+                results[name] = _run_command_benchmark(path, args, repeat)
+    finally:
+        os.chdir(cwd)
+
+    return results
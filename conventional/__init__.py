@@ -1,2 +1,19 @@
-from .cli import main
+from typing import Any
+
 from .parser import *
+
+
+def __getattr__(name: str) -> Any:
+    # The command-line and sessions are only imported once they are used, so that
+    # `conventional.client` can start without importing them
+    if name == "main":
+        from .cli import main
+
+        return main
+
+    if name == "Session":
+        from .session import Session
+
+        return Session
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
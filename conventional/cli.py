@@ -1,6 +1,6 @@
 import enum
 import pathlib
-from typing import List
+from typing import List, Optional
 
 import typer
 
@@ -28,6 +28,21 @@ def init(
     verbosity: Verbosity = typer.Option(
         Verbosity.info, case_sensitive=False, help="Set the verbosity of the logging."
     ),
+    show_stats: bool = typer.Option(
+        False,
+        "--stats",
+        help="If given, counters and timings for each stage of the command will be written to stderr as JSON once it has finished.",
+    ),
+    stats_file: Optional[pathlib.Path] = typer.Option(
+        None,
+        dir_okay=False,
+        help="A file to write counters and timings to, instead of stderr. Implies --stats.",
+    ),
+    profile: Optional[pathlib.Path] = typer.Option(
+        None,
+        dir_okay=False,
+        help="A file to write a cProfile profile of the command to. If `-`, a summary of the profile will be written to stderr.",
+    ),
 ) -> None:
     """
     Conventional - An extensible command-line tool for parsing and processing structured commits.
@@ -35,41 +50,62 @@ def init(
     import asyncio
     import logging
 
-    import confuse
+    if show_stats or stats_file is not None:
+        _record_stats(ctx, stats_file)
+
+    if profile is not None:
+        _record_profile(ctx, profile)
 
     from .util.typer import ColorFormatter, TyperHandler
 
     handler = TyperHandler()
     handler.formatter = ColorFormatter()
 
-    logger = logging.getLogger()
     logging.basicConfig(handlers=[handler], force=True)
 
-    # Importing aiocache results in a warning being logged. Temporarily disable it
-    # until it has been imported.
-    logging.getLogger("aiocache").setLevel(logging.ERROR)
-    import aiocache  # noqa: F401
+    from .util.config import load_configuration
+
+    logging.getLogger().setLevel(getattr(logging, verbosity))
 
-    # Reset aiocache log level since aiocache has now been imported and unnecessary
-    # warning has been avioded.
-    logging.getLogger("aiocache").setLevel(logging.NOTSET)
+    ctx.obj = asyncio.run(load_configuration(config_file))
 
-    from .util.config import find_project_configuration_file
 
-    logging.getLogger().setLevel(getattr(logging, verbosity))
+def _record_stats(ctx: typer.Context, stats_file: Optional[pathlib.Path]) -> None:
+    import json
+
+    from .util import stats
+
+    recorder = stats.enable()
+
+    def _write_stats() -> None:
+        report = json.dumps(recorder.report(), indent=2)
+
+        if stats_file is None:
+            typer.echo(report, err=True)
+        else:
+            stats_file.write_text(report)
+
+    ctx.call_on_close(_write_stats)
+
+
+def _record_profile(ctx: typer.Context, profile: pathlib.Path) -> None:
+    import cProfile
+    import pstats
+    import sys
 
-    config = confuse.Configuration("Conventional", "conventional")
+    profiler = cProfile.Profile()
+    profiler.enable()
 
-    project_config_file = asyncio.run(find_project_configuration_file())
-    if project_config_file is not None:
-        logger.debug(f"Loading configuration file, {project_config_file.as_posix()}")
-        config.set_file(project_config_file)
+    def _write_profile() -> None:
+        profiler.disable()
 
-    for filename in config_file:
-        logger.debug(f"Loading configuration file, {filename.as_posix()}")
-        config.set_file(filename)
+        if profile.as_posix() == "-":
+            profile_stats = pstats.Stats(profiler, stream=sys.stderr)
+            profile_stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(25)
+        else:
+            profiler.dump_stats(profile)
 
-    ctx.obj = config
+    ctx.call_on_close(_write_profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+A thin client for `conventional serve`, which forwards a command to the server instead
+of running it, eg. `python -m conventional.client template --last-versions 1`. This
+avoids importing `conventional`'s dependencies or reading the repository from scratch
+for every command. If no server is running, the command is run directly instead.
+
+Only the standard library is imported here, so that the client starts quickly.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+from typing import List, Optional
+
+# Each frame sent by the server is a channel followed by the length of its data
+_header = struct.Struct(">cI")
+
+STDOUT = b"o"
+STDERR = b"e"
+EXIT = b"x"
+
+
+def get_default_socket_path() -> str:
+    """
+    Gets the socket used by the server if none is given, from `CONVENTIONAL_SOCKET` or
+    otherwise in the user's runtime directory.
+    """
+
+    if "CONVENTIONAL_SOCKET" in os.environ:
+        return os.environ["CONVENTIONAL_SOCKET"]
+
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"conventional-{os.getuid()}.sock")
+
+
+def encode_frame(channel: bytes, data: bytes) -> bytes:
+    return _header.pack(channel, len(data)) + data
+
+
+def _connect(socket_path: Optional[str]) -> Optional[socket.socket]:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path or get_default_socket_path())
+    except (FileNotFoundError, ConnectionRefusedError):
+        client.close()
+        return None
+
+    return client
+
+
+def is_running(socket_path: Optional[str] = None) -> bool:
+    client = _connect(socket_path)
+    if client is None:
+        return False
+
+    client.close()
+    return True
+
+
+def run(
+    args: List[str], *, socket_path: Optional[str] = None, cwd: Optional[str] = None
+) -> Optional[int]:
+    """
+    Runs a command on the server, writing its output to stdout and stderr, and returns
+    its exit code. Returns None if no server is running.
+    """
+
+    client = _connect(socket_path)
+    if client is None:
+        return None
+
+    with client, client.makefile("rb") as reader:
+        request = {"args": args, "cwd": cwd or os.getcwd()}
+        client.sendall(json.dumps(request).encode() + b"\n")
+
+        while True:
+            header = reader.read(_header.size)
+            if len(header) < _header.size:
+                raise ConnectionError("The server closed the connection unexpectedly.")
+
+            channel, size = _header.unpack(header)
+            data = reader.read(size)
+
+            if channel == EXIT:
+                return int(data)
+
+            stream = sys.stdout if channel == STDOUT else sys.stderr
+            stream.buffer.write(data)
+            stream.buffer.flush()
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    try:
+        code = run(args)
+    except BrokenPipeError:
+        # Output was closed early, eg. by `head`. Any output still buffered can't be
+        # written, so stdout is pointed at devnull to avoid another error on exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    if code is None:
+        from .cli import main as cli_main
+
+        sys.argv = ["conventional", *args]
+        cli_main()
+
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
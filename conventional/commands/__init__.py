@@ -1,10 +1,17 @@
-from typing import Optional
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional
 
-from typer import Context, FileText, Option, Typer
+from typer import Argument, Context, FileText, Option, Typer
 
 group = Typer()
 
 
+class Format(str, Enum):
+    ndjson = "ndjson"
+    binary = "binary"
+
+
 @group.command("list-commits")
 def _list_commits(
     ctx: Context,
@@ -39,6 +46,40 @@ def _list_commits(
         False,
         help="If set, commits which fail to be parsed will be included in the output. See `parse-commit`.",
     ),
+    author: Optional[str] = Option(
+        None, help="Only list commits whose author matches the given pattern."
+    ),
+    since: Optional[str] = Option(
+        None, help="Only list commits more recent than the given date."
+    ),
+    until: Optional[str] = Option(
+        None, help="Only list commits older than the given date."
+    ),
+    grep: Optional[str] = Option(
+        None,
+        help="Only list commits with a message matching the given (extended) regular expression.",
+    ),
+    no_merges: bool = Option(
+        False, "--no-merges", help="If given, merge commits will not be listed."
+    ),
+    first_parent: bool = Option(
+        False,
+        "--first-parent",
+        help="If given, only the first parent of merge commits will be followed.",
+    ),
+    pathspec: List[str] = Option(
+        None,
+        help="Only list commits which modify files matching the given pathspec. May be specified multiple times.",
+    ),
+    fields: Optional[str] = Option(
+        None,
+        help="A comma-separated list of fields to retrieve for each commit. Defaults to all fields.",
+    ),
+    format: Format = Option(
+        Format.ndjson,
+        case_sensitive=False,
+        help="The format to write commits in. `binary` is faster to read with `parse-commit` or `template`, but can't be read by other tools.",
+    ),
 ) -> None:
     """
     Retrieves commits from the git repository at PATH, or the current directory if PATH is not provided.
@@ -46,9 +87,23 @@ def _list_commits(
     from asyncio import run
 
     from confuse import Configuration
+    from typer import BadParameter
 
+    from ..git import commit_fields
     from .list_commits import cli_main
 
+    field_list = None
+    if fields is not None:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()]
+
+        unknown = set(field_list).difference(commit_fields)
+        if unknown:
+            raise BadParameter(
+                f"Unknown field(s), {', '.join(sorted(unknown))}. "
+                f"Must be one of {', '.join(commit_fields)}",
+                param_hint="--fields",
+            )
+
     config = ctx.find_object(Configuration)
     run(
         cli_main(
@@ -60,6 +115,15 @@ def _list_commits(
             reverse=reverse,
             parse=parse,
             include_unparsed=include_unparsed,
+            author=author,
+            since=since,
+            until=until,
+            grep=grep,
+            no_merges=no_merges,
+            first_parent=first_parent,
+            paths=pathspec,
+            fields=field_list,
+            format=format.value,
         )
     )
 
@@ -80,6 +144,11 @@ def _parse_commit(
     include_unparsed: bool = Option(
         False, help="If set, commits which fail to be parsed will be returned."
     ),
+    format: Format = Option(
+        Format.ndjson,
+        case_sensitive=False,
+        help="The format to read commits and write parsed commits in. See `list-commits`.",
+    ),
 ) -> None:
     """
     Parses a stream of commits in the given file or from stdin.
@@ -92,7 +161,13 @@ def _parse_commit(
 
     config = ctx.find_object(Configuration)
     run(
-        cli_main(config, input=input, output=output, include_unparsed=include_unparsed,)
+        cli_main(
+            config,
+            input=input,
+            output=output,
+            include_unparsed=include_unparsed,
+            format=format.value,
+        )
     )
 
 
@@ -109,6 +184,11 @@ def _template(
         help="A file to write parsed commits to. If `-`, parsed commits will be written to stdout.",
         mode="w",
     ),
+    output_file: Optional[Path] = Option(
+        None,
+        dir_okay=False,
+        help="A file to write the rendered template to instead of --output. The file is only replaced (atomically) if the rendered template has changed, in which case the command exits with code 3.",
+    ),
     include_unparsed: bool = Option(
         False,
         help="If set, commits which fail to be parsed will be returned. See `parse-commit`.",
@@ -119,20 +199,121 @@ def _template(
     template_name: Optional[str] = Option(
         None, help="If set, will override the name of the template to be loaded."
     ),
+    since_version: Optional[str] = Option(
+        None,
+        help="If set, only versions released after the given version tag will be rendered, along with any unreleased commits.",
+    ),
+    last_versions: Optional[int] = Option(
+        None,
+        min=1,
+        help="If set, only the given number of most-recent versions will be rendered, along with any unreleased commits.",
+    ),
+    format: Format = Option(
+        Format.ndjson,
+        case_sensitive=False,
+        help="The format to read commits from --input in. See `list-commits`.",
+    ),
+    watch: bool = Option(
+        False,
+        "--watch",
+        help="If given, the template will be rendered again whenever HEAD or any ref changes in the repository, until interrupted.",
+    ),
+    watch_interval: float = Option(
+        1.0, min=0, help="The number of seconds between checks for changes with --watch."
+    ),
+    branch: Optional[List[str]] = Option(
+        None,
+        help="A branch to render the template for, using the versions released on it, instead of HEAD. Can be given more than once, in which case --output-file must contain `{branch}`, which is replaced with the name of each branch. Commits on more than one branch are only read and parsed once.",
+    ),
+    model: Optional[FileText] = Option(
+        None,
+        help="A model written by `build-model` to render the template from, instead of reading commits from the repository.",
+    ),
 ) -> None:
     """
     Reads a stream of commits from the given file or stdin and uses them to render a template.
     """
     from asyncio import run
 
+    from click.utils import LazyFile
     from confuse import Configuration
 
-    from .template import cli_main
+    from typer import BadParameter
+
+    from .template import (
+        cli_main,
+        cli_main_branches,
+        cli_main_model,
+        watch as watch_template,
+    )
 
     config = ctx.find_object(Configuration)
     if template_name is not None:
         config.set_args({"template.name": template_name}, dots=True)
 
+    # Outputs are only opened lazily if they aren't stdout
+    if output_file is not None and isinstance(output, LazyFile):
+        raise BadParameter("Can't be combined with --output.", param_hint="--output-file")
+
+    if model is not None:
+        if input is not None or watch or branch:
+            raise BadParameter(
+                "Can't be combined with --input, --watch or --branch.",
+                param_hint="--model",
+            )
+        if include_unparsed or unreleased_version or since_version or last_versions:
+            raise BadParameter(
+                "--include-unparsed, --unreleased-version, --since-version and "
+                "--last-versions need to be given to build-model instead.",
+                param_hint="--model",
+            )
+
+        run(cli_main_model(config, model=model, output=output, output_file=output_file))
+        return
+
+    if branch:
+        if input is not None or watch:
+            raise BadParameter(
+                "Can't be combined with --input or --watch.", param_hint="--branch"
+            )
+        if len(branch) > 1 and "{branch}" not in str(output_file or ""):
+            raise BadParameter(
+                "Must contain `{branch}` when rendering several branches.",
+                param_hint="--output-file",
+            )
+
+        run(
+            cli_main_branches(
+                config,
+                branches=branch,
+                output=output,
+                output_file=output_file,
+                include_unparsed=include_unparsed,
+                unreleased_version=unreleased_version,
+                since_version=since_version,
+                last_versions=last_versions,
+            )
+        )
+        return
+
+    if watch:
+        if input is not None:
+            raise BadParameter("Can't be combined with --input.", param_hint="--watch")
+
+        run(
+            watch_template(
+                config,
+                output=output,
+                include_unparsed=include_unparsed,
+                unreleased_version=unreleased_version,
+                since_version=since_version,
+                last_versions=last_versions,
+                interval=watch_interval,
+                output_file=output_file,
+            )
+        )
+        return
+
     run(
         cli_main(
             config,
@@ -140,6 +321,284 @@ def _template(
             output=output,
             include_unparsed=include_unparsed,
             unreleased_version=unreleased_version,
+            since_version=since_version,
+            last_versions=last_versions,
+            format=format.value,
+            output_file=output_file,
+        )
+    )
+
+
+@group.command("build-model")
+def _build_model(
+    ctx: Context,
+    *,
+    output: FileText = Option(
+        "-",
+        help="A file to write the model to. If `-`, the model will be written to stdout.",
+        mode="w",
+    ),
+    include_unparsed: bool = Option(
+        False,
+        help="If set, commits which fail to be parsed will be included. See `parse-commit`.",
+    ),
+    unreleased_version: Optional[str] = Option(
+        None, help="If set, will be used as the tag name for unreleased commits."
+    ),
+    since_version: Optional[str] = Option(
+        None,
+        help="If set, only versions released after the given version tag will be included, along with any unreleased commits.",
+    ),
+    last_versions: Optional[int] = Option(
+        None,
+        min=1,
+        help="If set, only the given number of most-recent versions will be included, along with any unreleased commits.",
+    ),
+) -> None:
+    """
+    Builds the versions rendered by `template` from the repository, and writes them to a model which templates can then be rendered from with `template --model`, without reading or parsing commits again.
+    """
+    from asyncio import run
+
+    from confuse import Configuration
+
+    from .build_model import cli_main
+
+    config = ctx.find_object(Configuration)
+    run(
+        cli_main(
+            config,
+            output=output,
+            include_unparsed=include_unparsed,
+            unreleased_version=unreleased_version,
+            since_version=since_version,
+            last_versions=last_versions,
+        )
+    )
+
+
+@group.command("list-issues")
+def _list_issues(
+    ctx: Context,
+    *,
+    output: FileText = Option(
+        "-",
+        help="A file to write issues to. If `-`, issues will be written to stdout.",
+        mode="w",
+    ),
+    from_rev: Optional[str] = Option(
+        None,
+        "--from",
+        help="The commit or tag to start from when listing issues from.",
+    ),
+    from_last_tag: bool = Option(
+        False,
+        "--from-last-tag",
+        help="If given, only issues referenced since the most-recent tag will be listed.",
+    ),
+    to_rev: str = Option(
+        "HEAD", "--to", help="The commit or tag to stop at listing issues."
+    ),
+    group_by_version: bool = Option(
+        False,
+        "--group-by-version",
+        help="If given, issues will be grouped by the version they were released in and written as json, one object per version.",
+    ),
+) -> None:
+    """
+    Lists the issues closed or referenced by parsed commits, one per line.
+    """
+    from asyncio import run
+
+    from confuse import Configuration
+
+    from .list_issues import cli_main
+
+    config = ctx.find_object(Configuration)
+    run(
+        cli_main(
+            config,
+            output=output,
+            from_rev=from_rev,
+            from_last_tag=from_last_tag,
+            to_rev=to_rev,
+            group_by_version=group_by_version,
+        )
+    )
+
+
+@group.command("next-version")
+def _next_version(
+    ctx: Context,
+    *,
+    output: FileText = Option(
+        "-",
+        help="A file to write the next version to. If `-`, it will be written to stdout.",
+        mode="w",
+    ),
+    print_bump: bool = Option(
+        False,
+        "--print-bump",
+        help="If given, the part of the version to bump (major, minor or patch) will be written instead of the next version.",
+    ),
+) -> None:
+    """
+    Works out the next version from the commits since the most-recent version tag. Exits with an error if none of the commits require a new version.
+    """
+    from asyncio import run
+
+    from confuse import Configuration
+
+    from .next_version import cli_main
+
+    config = ctx.find_object(Configuration)
+    run(cli_main(config, output=output, print_bump=print_bump))
+
+
+@group.command("lint")
+def _lint(
+    ctx: Context,
+    *,
+    output: FileText = Option(
+        "-",
+        help="A file to write commits which fail to be parsed to. If `-`, they will be written to stdout.",
+        mode="w",
+    ),
+    from_rev: Optional[str] = Option(
+        None, "--from", help="The commit or tag to start from when checking commits.",
+    ),
+    from_last_tag: bool = Option(
+        False,
+        "--from-last-tag",
+        help="If given, only commits since the most-recent tag will be checked.",
+    ),
+    to_rev: str = Option(
+        "HEAD", "--to", help="The commit or tag to stop at checking commits."
+    ),
+    message_file: Optional[Path] = Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        help="A file containing a commit message to check instead of the repository's commits, eg. from a `commit-msg` hook.",
+    ),
+) -> None:
+    """
+    Checks that commits can be parsed with the configured parser, listing any which can't. Exits with an error if any commits fail to be parsed.
+    """
+    from asyncio import run
+
+    from confuse import Configuration
+
+    from .lint import cli_main
+
+    config = ctx.find_object(Configuration)
+    run(
+        cli_main(
+            config,
+            output=output,
+            from_rev=from_rev,
+            from_last_tag=from_last_tag,
+            to_rev=to_rev,
+            message_file=message_file,
+        )
+    )
+
+
+@group.command("index")
+def _index(
+    ctx: Context,
+    *,
+    database: Optional[Path] = Option(
+        None,
+        dir_okay=False,
+        help="The SQLite database to write the index to. Defaults to a file in the repository's .git directory.",
+    ),
+    rebuild: bool = Option(
+        False,
+        "--rebuild",
+        help="If given, the index will be rebuilt from scratch instead of being updated.",
+    ),
+) -> None:
+    """
+    Builds or updates a SQLite index of the commits and tags in the git repository, for use with `query`.
+    """
+    from asyncio import run
+
+    from confuse import Configuration
+
+    from .index import cli_main
+
+    config = ctx.find_object(Configuration)
+    run(cli_main(config, database=database, rebuild=rebuild))
+
+
+@group.command("query")
+def _query(
+    ctx: Context,
+    sql: str = Argument(..., help="The SQL query to run against the index."),
+    *,
+    output: FileText = Option(
+        "-",
+        help="A file to write rows to. If `-`, rows will be written to stdout.",
+        mode="w",
+    ),
+    param: List[str] = Option(
+        None,
+        help="A value for a `?` placeholder in the query. May be specified multiple times.",
+    ),
+    database: Optional[Path] = Option(
+        None,
+        dir_okay=False,
+        help="The SQLite database to query. Defaults to the one written by `index`.",
+    ),
+    update: bool = Option(
+        False, "--update", help="If given, the index will be updated before querying."
+    ),
+) -> None:
+    """
+    Queries the index created by `index` with SQL, writing each row as a line of JSON.
+    """
+    from asyncio import run
+
+    from confuse import Configuration
+
+    from .query import cli_main
+
+    config = ctx.find_object(Configuration)
+    run(
+        cli_main(
+            config,
+            output=output,
+            sql=sql,
+            params=param or [],
+            database=database,
+            update=update,
+        )
+    )
+
+
+@group.command("serve")
+def _serve(
+    ctx: Context,
+    *,
+    socket: Optional[Path] = Option(
+        None,
+        dir_okay=False,
+        help="The Unix socket to listen on. Defaults to `$CONVENTIONAL_SOCKET`, or a socket in the user's runtime directory.",
+    ),
+) -> None:
+    """
+    Runs a server which keeps repositories loaded between commands, so that repeated `list-commits`, `template` and `lint` commands run quickly. Commands are sent to the server with `python -m conventional.client COMMAND [OPTIONS]`.
+    """
+    from asyncio import run
+
+    from ..client import get_default_socket_path
+    from ..server import cli_main
+
+    config_files = ctx.find_root().params.get("config_file") or []
+    run(
+        cli_main(
+            socket or Path(get_default_socket_path()), config_files=config_files
         )
     )
 
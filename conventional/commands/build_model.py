@@ -0,0 +1,165 @@
+"""
+Release models hold the versions built by `template`, so that templates can be rendered
+from them any number of times without reading or parsing commits again.
+
+A model is written in the binary format used to pipe records between commands (see
+`util.binary`). The first record holds the options the model was built with, and each
+record after it holds a version, most recent first.
+"""
+
+import logging
+import pathlib
+from typing import IO, Any, List, Optional, TextIO, TypedDict
+
+import confuse
+import dateutil.parser
+import typer
+
+from .. import git
+from ..util import binary
+from ..util.io import Writer
+from . import exceptions
+from .template import Version, VersionTuple, get_previous_version
+
+logger = logging.getLogger(__name__)
+
+# Identifies model files, along with the version of the format they're written in
+_MODEL_FORMAT = "conventional.model"
+_MODEL_VERSION = 1
+
+
+class Model(TypedDict):
+    versions: List[VersionTuple]
+    unreleased_version: Optional[str]
+    previous_version: Optional[git.Tag]
+
+
+async def cli_main(
+    config: confuse.Configuration,
+    *,
+    output: TextIO,
+    include_unparsed: bool,
+    unreleased_version: Optional[str],
+    since_version: Optional[str] = None,
+    last_versions: Optional[int] = None,
+) -> None:
+    try:
+        model = await main(
+            config,
+            include_unparsed=include_unparsed,
+            unreleased_version=unreleased_version,
+            since_version=since_version,
+            last_versions=last_versions,
+        )
+    except exceptions.UnknownVersionError:
+        logger.error(f"{since_version} is not a version tag!")
+        raise typer.Exit(1)
+    except exceptions.NoCommitsError:
+        logger.error("No commits found!")
+        raise typer.Exit(1)
+
+    async with Writer(output) as writer:
+        await write_model(writer, model)
+
+
+async def main(
+    config: confuse.Configuration,
+    *,
+    include_unparsed: bool,
+    unreleased_version: Optional[str],
+    since_version: Optional[str] = None,
+    last_versions: Optional[int] = None,
+    path: Optional[pathlib.PurePath] = None,
+) -> Model:
+    """
+    Builds the versions in the repository in the same way as the `template` command,
+    returning them as a model which can be written with `write_model`.
+    """
+
+    from ..session import Session
+
+    session = Session(path, config)
+
+    previous_version = get_previous_version(
+        await session.get_version_tags(),
+        since_version=since_version,
+        last_versions=last_versions,
+    )
+
+    versions = await session.get_versions(
+        include_unparsed=include_unparsed,
+        unreleased_version=unreleased_version,
+        previous_version=previous_version,
+    )
+
+    return {
+        "versions": versions,
+        "unreleased_version": unreleased_version,
+        "previous_version": previous_version,
+    }
+
+
+async def write_model(writer: Writer, model: Model) -> None:
+    header = {
+        "format": _MODEL_FORMAT,
+        "version": _MODEL_VERSION,
+        "unreleased_version": model["unreleased_version"],
+        "previous_version": model["previous_version"],
+    }
+    await writer.write(binary.dumps(header))
+
+    for tag, version in model["versions"]:
+        await writer.write(binary.dumps([tag, dict(version)]))
+
+
+def _read_change(change: Any) -> Any:
+    # Dates are written as strings, so they're converted back to match the commits
+    # read from git
+    date = change["source"].get("date")
+    if isinstance(date, str):
+        change["source"]["date"] = dateutil.parser.isoparse(date)
+
+    return change
+
+
+async def read_model(stream: IO[Any]) -> Model:
+    """
+    Reads a model written by `write_model`. Raises `ValueError` if the stream doesn't
+    contain a model, or one written by an incompatible version.
+    """
+
+    header: Any = None
+    versions: List[VersionTuple] = []
+
+    async for record in binary.read_records(stream):
+        if header is None:
+            header = record
+            if not isinstance(header, dict) or header.get("format") != _MODEL_FORMAT:
+                raise ValueError("Not a model file.")
+            if header.get("version") != _MODEL_VERSION:
+                raise ValueError(
+                    f"Unsupported model version, {header.get('version')}. Models need "
+                    f"to be built again after upgrading."
+                )
+
+            continue
+
+        tag, version = record
+        versions.append(
+            (
+                tag,
+                Version(
+                    (typ, [_read_change(change) for change in changes])
+                    for typ, changes in version.items()
+                ),
+            )
+        )
+
+    if header is None:
+        raise ValueError("Not a model file.")
+
+    return {
+        "versions": versions,
+        "unreleased_version": header["unreleased_version"],
+        "previous_version": header["previous_version"],
+    }
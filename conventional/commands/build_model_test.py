@@ -0,0 +1,65 @@
+import datetime
+import pathlib
+import subprocess
+
+import confuse
+import pytest
+
+from ..util.io import Writer
+from . import build_model, template
+
+pytestmark = pytest.mark.asyncio
+
+
+def _git(path: pathlib.PurePath, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=str(path), check=True)
+
+
+async def test_model_round_trip(
+    config: confuse.Configuration,
+    git_repository: pathlib.PurePath,
+    tmp_path: pathlib.Path,
+) -> None:
+    _git(git_repository, "commit", "--allow-empty", "-q", "-m", "feat: one")
+    _git(git_repository, "tag", "1.0.0")
+    _git(git_repository, "commit", "--allow-empty", "-q", "-m", "fix: two\n\nCloses #1")
+
+    model = await build_model.main(
+        config,
+        include_unparsed=False,
+        unreleased_version="1.0.1",
+        path=git_repository,
+    )
+
+    path = tmp_path.joinpath("release.model")
+    with path.open("w") as output:
+        async with Writer(output) as writer:
+            await build_model.write_model(writer, model)
+
+    with path.open() as input:
+        loaded = await build_model.read_model(input)
+
+    assert loaded == model
+    assert [tag and tag["name"] for tag, _ in loaded["versions"]] == ["1.0.1", "1.0.0"]
+
+    change = loaded["versions"][0][1]["fix"][0]
+    assert isinstance(change["source"]["date"], datetime.datetime)
+
+    def _render(model: build_model.Model) -> str:
+        stream = template.render(
+            config,
+            model["versions"],
+            unreleased_version=model["unreleased_version"],
+            previous_version=model["previous_version"],
+        )
+        return "".join(stream)
+
+    assert _render(loaded) == _render(model)
+
+
+async def test_read_model_rejects_other_files(tmp_path: pathlib.Path) -> None:
+    path = tmp_path.joinpath("commits.ndjson")
+    path.write_text("")
+
+    with path.open() as input, pytest.raises(ValueError):
+        await build_model.read_model(input)
@@ -1,2 +1,6 @@
 class NoCommitsError(Exception):
     pass
+
+
+class UnknownVersionError(Exception):
+    pass
@@ -0,0 +1,366 @@
+import json
+import logging
+import pathlib
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, TypedDict
+
+import confuse
+
+from .. import git
+from ..util.io import json_defaults
+
+logger = logging.getLogger(__name__)
+
+# Incremented whenever the schema changes, so existing indexes are rebuilt
+SCHEMA_VERSION = "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS commits (
+    rev TEXT PRIMARY KEY,
+    short_rev TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    author_name TEXT NOT NULL,
+    author_email TEXT NOT NULL,
+    date TEXT NOT NULL,
+    version TEXT,
+    parsed INTEGER NOT NULL,
+    type TEXT,
+    scope TEXT,
+    message TEXT,
+    breaking INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS commits_date ON commits (date);
+CREATE INDEX IF NOT EXISTS commits_version ON commits (version);
+CREATE INDEX IF NOT EXISTS commits_type ON commits (type, scope);
+CREATE INDEX IF NOT EXISTS commits_breaking ON commits (breaking) WHERE breaking;
+
+CREATE TABLE IF NOT EXISTS tags (
+    name TEXT PRIMARY KEY,
+    rev TEXT NOT NULL,
+    subject TEXT,
+    body TEXT,
+    is_version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tags_rev ON tags (rev);
+
+CREATE TABLE IF NOT EXISTS footers (
+    rev TEXT NOT NULL REFERENCES commits (rev) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS footers_rev ON footers (rev);
+CREATE INDEX IF NOT EXISTS footers_key ON footers (key, value);
+
+CREATE TABLE IF NOT EXISTS closes (
+    rev TEXT NOT NULL REFERENCES commits (rev) ON DELETE CASCADE,
+    issue TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS closes_rev ON closes (rev);
+CREATE INDEX IF NOT EXISTS closes_issue ON closes (issue);
+"""
+
+TABLES = ["closes", "footers", "tags", "commits", "meta"]
+
+
+class IndexSummary(TypedDict):
+    rebuilt: bool
+    commits: int
+    tags: int
+
+
+async def get_default_database(path: pathlib.PurePath = None) -> pathlib.Path:
+    filename = await git.get_git_path("conventional/index.sqlite", path=path)
+    if filename is None:
+        raise ValueError("Not a git repository.")
+
+    return filename
+
+
+def connect(database: pathlib.Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(str(database))
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+
+    return connection
+
+
+def _get_meta(connection: sqlite3.Connection) -> Dict[str, str]:
+    try:
+        rows = connection.execute("SELECT key, value FROM meta").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+
+    return {row["key"]: row["value"] for row in rows}
+
+
+def _set_meta(connection: sqlite3.Connection, key: str, value: str) -> None:
+    connection.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+    )
+
+
+def _get_parser_key(config: confuse.Configuration) -> str:
+    # Parsed data depends on the parser and its configuration, so changing either of
+    # them means the index needs to be rebuilt
+    parser_config = config["parser"]
+    return json.dumps(
+        {
+            "module": parser_config["module"].get(str),
+            "class": parser_config["class"].get(str),
+            "config": parser_config["config"].get(),
+            "max-body-size": parser_config["max-body-size"].get(),
+        },
+        sort_keys=True,
+    )
+
+
+def _get_commit_row(commit: git.Commit, data: Optional[Any]) -> Tuple[Any, ...]:
+    subject = data.get("subject", {}) if data else {}
+    metadata = data.get("metadata", {}) if data else {}
+
+    return (
+        commit["rev"],
+        commit["short_rev"],
+        commit["subject"],
+        commit["body"],
+        commit["author_name"],
+        commit["author_email"],
+        json_defaults(commit["date"]),
+        data is not None,
+        subject.get("type"),
+        subject.get("scope"),
+        subject.get("message"),
+        metadata.get("breaking"),
+        json.dumps(data, default=json_defaults) if data is not None else None,
+    )
+
+
+def _get_footers(data: Optional[Any]) -> Iterable[Tuple[str, str]]:
+    if not data:
+        return []
+
+    footers = data.get("body", {}).get("footer", {}).get("items", [])
+    return [(footer["key"], footer["value"]) for footer in footers]
+
+
+def _get_closes(data: Optional[Any]) -> Iterable[str]:
+    if not data:
+        return []
+
+    return list(data.get("metadata", {}).get("closes", []))
+
+
+async def _index_commits(
+    connection: sqlite3.Connection,
+    config: confuse.Configuration,
+    *,
+    start: Optional[str],
+    end: str,
+    path: Optional[pathlib.PurePath],
+) -> int:
+    from .parse_commit import get_max_body_size, main as parse_commit
+
+    fields = [field for field in git.commit_fields if field != "tags"]
+    commits = git.get_commits(
+        start=start,
+        end=end,
+        path=path,
+        reverse=True,
+        fields=fields,
+        max_body_size=get_max_body_size(config),
+    )
+    stream = parse_commit(config, input=commits, include_unparsed=True)
+
+    count = 0
+    async for item in stream:
+        commit, data = item["source"], item["data"]
+        count += 1
+
+        connection.execute(
+            "INSERT OR REPLACE INTO commits (rev, short_rev, subject, body, "
+            "author_name, author_email, date, parsed, type, scope, message, "
+            "breaking, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _get_commit_row(commit, data),
+        )
+
+        rev = commit["rev"]
+        connection.executemany(
+            "INSERT INTO footers (rev, key, value) VALUES (?, ?, ?)",
+            [(rev, key, value) for key, value in _get_footers(data)],
+        )
+        connection.executemany(
+            "INSERT INTO closes (rev, issue) VALUES (?, ?)",
+            [(rev, issue) for issue in _get_closes(data)],
+        )
+
+    return count
+
+
+async def _index_tags(
+    connection: sqlite3.Connection,
+    config: confuse.Configuration,
+    *,
+    last_head: Optional[str],
+    path: Optional[pathlib.PurePath],
+) -> int:
+    from .template import get_version_filter
+
+    is_version_tag = get_version_filter(config)
+
+    def _is_version(tag: git.Tag) -> bool:
+        return is_version_tag(tag["name"])
+
+    indexed = {
+        row["name"]: row["rev"]
+        for row in connection.execute("SELECT name, rev FROM tags WHERE is_version")
+    }
+
+    tags = await git.get_tags(path=path, sort="creatordate")
+    versions = [tag for tag in tags if _is_version(tag)]
+
+    connection.execute("DELETE FROM tags")
+    connection.executemany(
+        "INSERT INTO tags (name, rev, subject, body, is_version) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (
+                tag["name"],
+                tag["object_name"],
+                tag["subject"],
+                tag["body"],
+                _is_version(tag),
+            )
+            for tag in tags
+        ],
+    )
+
+    # If any versions have been moved or removed, the version of every commit needs to
+    # be worked out again
+    current = {tag["name"]: tag["object_name"] for tag in versions}
+    if any(current.get(name) != rev for name, rev in indexed.items()):
+        connection.execute("UPDATE commits SET version = NULL")
+        indexed = {}
+
+    # Versions which were indexed before can still contain new commits if they weren't
+    # reachable from `last_head`, the last commit indexed before any new commits were
+    # added (eg. a release branch which has since been merged). Only those new commits
+    # need to be found for them.
+    merged: Set[str] = set()
+    if indexed and last_head is not None:
+        merged_tags = await git.get_tags(path=path, merged=last_head, fields=["name"])
+        merged = {tag["name"] for tag in merged_tags}
+
+    # Each commit is assigned to the earliest version which contains it
+    previous: List[str] = []
+    for tag in versions:
+        name = tag["name"]
+
+        exclude = previous
+        if name in indexed:
+            if last_head is None or name in merged:
+                previous.append(name)
+                continue
+
+            exclude = [*previous, last_head]
+
+        revs = git.get_commits(end=name, exclude=exclude, path=path, fields=["rev"])
+        connection.executemany(
+            "UPDATE commits SET version = ? WHERE rev = ? AND version IS NULL",
+            [(name, commit["rev"]) async for commit in revs],
+        )
+
+        previous.append(name)
+
+    return len(tags)
+
+
+async def cli_main(
+    config: confuse.Configuration,
+    *,
+    database: Optional[pathlib.Path],
+    rebuild: bool,
+) -> None:
+    summary = await main(config, database=database, rebuild=rebuild)
+
+    action = "Rebuilt" if summary["rebuilt"] else "Updated"
+    logger.info(
+        f"{action} index with {summary['commits']} new commit(s) "
+        f"and {summary['tags']} tag(s)"
+    )
+
+
+async def main(
+    config: confuse.Configuration,
+    *,
+    database: Optional[pathlib.Path] = None,
+    rebuild: bool = False,
+    path: Optional[pathlib.PurePath] = None,
+) -> IndexSummary:
+    """
+    Builds or updates a SQLite index of the commits and tags in the repository. When
+    updating an index, only commits added since it was last updated are read.
+    """
+
+    if database is None:
+        database = await get_default_database(path)
+
+    database.parent.mkdir(parents=True, exist_ok=True)
+
+    reachability = git.get_reachability(path)
+
+    head = await reachability.resolve("HEAD")
+    if head is None:
+        raise ValueError("Repository has no commits to index.")
+
+    connection = connect(database)
+
+    try:
+        meta = _get_meta(connection)
+        last_head: Optional[str] = meta.get("head")
+
+        parser_key = _get_parser_key(config)
+
+        if rebuild or meta.get("schema") != SCHEMA_VERSION:
+            rebuild = True
+        elif meta.get("parser") != parser_key:
+            logger.info("Parser configuration has changed, rebuilding index")
+            rebuild = True
+        elif last_head is not None and not await reachability.is_ancestor(
+            last_head, head
+        ):
+            logger.info("History has been rewritten, rebuilding index")
+            rebuild = True
+
+        with connection:
+            if rebuild:
+                for table in TABLES:
+                    connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+                last_head = None
+
+            connection.executescript(SCHEMA)
+
+            count = 0
+            if last_head != head:
+                count = await _index_commits(
+                    connection, config, start=last_head, end=head, path=path
+                )
+
+            tags = await _index_tags(
+                connection, config, last_head=last_head if count else None, path=path
+            )
+
+            _set_meta(connection, "schema", SCHEMA_VERSION)
+            _set_meta(connection, "parser", parser_key)
+            _set_meta(connection, "head", head)
+    finally:
+        connection.close()
+
+    return {"rebuilt": rebuild, "commits": count, "tags": tags}
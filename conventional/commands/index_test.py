@@ -0,0 +1,80 @@
+import pathlib
+import subprocess
+
+import confuse
+import pytest
+
+from .. import git
+from . import index, query
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_index(
+    config: confuse.Configuration, git_repository: pathlib.PurePath
+) -> None:
+    database = pathlib.Path(git_repository, "index.sqlite")
+
+    async def _query(sql: str) -> list:
+        stream = query.main(config, sql=sql, database=database, path=git_repository)
+        return [row async for row in stream]
+
+    await git.create_commit(git_repository, "feat: One\n\nCloses #1", allow_empty=True)
+    await git.create_tag(git_repository, "1.0.0")
+    await git.create_commit(git_repository, "Not conventional", allow_empty=True)
+
+    summary = await index.main(config, database=database, path=git_repository)
+    assert summary == {"rebuilt": True, "commits": 2, "tags": 1}
+
+    await git.create_commit(git_repository, "fix!: Two\n\nCloses #2", allow_empty=True)
+    await git.create_tag(git_repository, "2.0.0")
+    # Only the new commit is read when updating the index
+    summary = await index.main(config, database=database, path=git_repository)
+    assert summary == {"rebuilt": False, "commits": 1, "tags": 2}
+
+    assert await _query(
+        "SELECT issue, version, breaking FROM closes JOIN commits USING (rev) "
+        "ORDER BY issue"
+    ) == [
+        {"issue": "1", "version": "1.0.0", "breaking": 0},
+        {"issue": "2", "version": "2.0.0", "breaking": 1},
+    ]
+    assert await _query("SELECT subject FROM commits WHERE NOT parsed") == [
+        {"subject": "Not conventional"}
+    ]
+
+
+async def test_index_merged_release(
+    config: confuse.Configuration, git_repository: pathlib.PurePath
+) -> None:
+    def _git(*args: str) -> None:
+        subprocess.run(["git", *args], cwd=str(git_repository), check=True)
+
+    database = pathlib.Path(git_repository, "index.sqlite")
+
+    await git.create_commit(git_repository, "feat: One", allow_empty=True)
+    await git.create_tag(git_repository, "1.0.0")
+    _git("checkout", "-q", "-b", "release-1")
+    await git.create_commit(git_repository, "fix: Two", allow_empty=True)
+    await git.create_tag(git_repository, "1.0.1")
+    _git("checkout", "-q", "-")
+    await git.create_commit(git_repository, "feat: Three", allow_empty=True)
+    await index.main(config, database=database, path=git_repository)
+
+    # The release branch's commits are only indexed once they have been merged, after
+    # the version releasing them was indexed
+    _git("merge", "-q", "--no-edit", "release-1")
+    summary = await index.main(config, database=database, path=git_repository)
+    assert summary == {"rebuilt": False, "commits": 2, "tags": 2}
+
+    stream = query.main(
+        config,
+        sql="SELECT subject, version FROM commits WHERE parsed ORDER BY subject",
+        database=database,
+        path=git_repository,
+    )
+    assert [row async for row in stream] == [
+        {"subject": "feat: One", "version": "1.0.0"},
+        {"subject": "feat: Three", "version": None},
+        {"subject": "fix: Two", "version": "1.0.1"},
+    ]
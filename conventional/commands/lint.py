@@ -0,0 +1,94 @@
+import logging
+import pathlib
+from typing import Any, AsyncIterable, Optional, TextIO
+
+import confuse
+import typer
+
+from .. import git
+from ..parser.base import Parser
+from ..util import pipeline
+from ..util.io import Writer
+
+logger = logging.getLogger(__name__)
+
+
+def read_message(text: str) -> git.Commit:
+    """
+    Creates a commit from a commit message being written, eg. by a `commit-msg` hook,
+    ignoring any comments added by git.
+    """
+
+    lines = [line for line in text.splitlines() if not line.startswith("#")]
+    subject, _, body = "\n".join(lines).strip().partition("\n")
+
+    commit: git.Commit = {"subject": subject.strip(), "body": body.strip()}
+    return commit
+
+
+async def _read_message_file(path: pathlib.Path) -> AsyncIterable[git.Commit]:
+    yield read_message(path.read_text())
+
+
+def format_failure(commit: git.Commit) -> str:
+    if commit.get("short_rev"):
+        return f"{commit['short_rev']} {commit['subject']}\n"
+
+    return f"{commit['subject']}\n"
+
+
+async def cli_main(
+    config: confuse.Configuration,
+    *,
+    output: TextIO,
+    from_rev: Optional[str],
+    from_last_tag: bool,
+    to_rev: str,
+    message_file: Optional[pathlib.Path] = None,
+) -> None:
+    from .list_commits import main as list_commits
+    from .parse_commit import load_parser
+
+    parser = load_parser(config)
+
+    input: AsyncIterable[git.Commit]
+    if message_file is not None:
+        input = _read_message_file(message_file)
+    else:
+        input = list_commits(
+            config,
+            from_rev=from_rev,
+            from_last_tag=from_last_tag,
+            to_rev=to_rev,
+            reverse=True,
+            fields=["rev", "short_rev", *parser.fields],
+        )
+
+    failures = 0
+    async with Writer(output) as writer:
+        async for commit in main(config, input=input, parser=parser):
+            failures += 1
+            await writer.write(format_failure(commit))
+
+    if failures:
+        logger.error(f"{failures} commit(s) could not be parsed.")
+        raise typer.Exit(1)
+
+
+async def main(
+    config: confuse.Configuration,
+    *,
+    input: AsyncIterable[git.Commit],
+    parser: Optional[Parser[Any]] = None,
+) -> AsyncIterable[git.Commit]:
+    """Yields each of the commits from `input` which can't be parsed."""
+
+    from .parse_commit import main as parse_commit
+
+    stream = parse_commit(config, input=input, include_unparsed=True, parser=parser)
+    try:
+        async for change in stream:
+            if change["data"] is None:
+                yield change["source"]
+    finally:
+        await pipeline.aclose(stream)
@@ -0,0 +1,24 @@
+from .. import git
+from . import lint
+
+
+def test_read_message() -> None:
+    text = (
+        "feat: Add lint command\n"
+        "\n"
+        "Checks commit messages.\n"
+        "# Please enter the commit message for your changes.\n"
+        "#\n"
+    )
+
+    assert lint.read_message(text) == {
+        "subject": "feat: Add lint command",
+        "body": "Checks commit messages.",
+    }
+
+
+def test_format_failure() -> None:
+    assert lint.format_failure({"subject": "Not valid"}) == "Not valid\n"
+
+    commit: git.Commit = {"short_rev": "abc1234", "subject": "Not valid"}
+    assert lint.format_failure(commit) == "abc1234 Not valid\n"
@@ -1,11 +1,12 @@
-import json
 import logging
-from typing import Any, AsyncIterable, Optional, TextIO
+import pathlib
+from typing import Any, AsyncIterable, Callable, Iterable, Optional, Set, TextIO
 
 import confuse
 
 from .. import git
-from ..util.io import json_defaults
+from ..util import pipeline
+from ..util.io import Writer, encode_record
 
 logger = logging.getLogger(__name__)
 
@@ -20,26 +21,65 @@ async def cli_main(
     reverse: bool,
     parse: bool,
     include_unparsed: bool,
+    author: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    grep: Optional[str] = None,
+    no_merges: bool = False,
+    first_parent: bool = False,
+    paths: Optional[Iterable[str]] = None,
+    fields: Optional[Iterable[str]] = None,
+    format: str = "ndjson",
 ) -> None:
     if include_unparsed and not parse:
         logger.warning("--include-unparsed is ignored without --parse")
 
+    parser = None
+    prefilter = None
+    if parse:
+        from .parse_commit import get_prefilter, load_parser
+
+        parser = load_parser(config)
+
+        # Make sure the fields the parser relies on are always retrieved
+        if fields is not None:
+            fields = {*fields, *parser.fields}
+
+        # Commits which will fail to be parsed don't need to be retrieved in full
+        if not include_unparsed:
+            prefilter = get_prefilter(parser)
+
     stream = main(
         config,
         from_rev=from_rev,
         from_last_tag=from_last_tag,
         to_rev=to_rev,
         reverse=reverse,
+        author=author,
+        since=since,
+        until=until,
+        grep=grep,
+        no_merges=no_merges,
+        first_parent=first_parent,
+        paths=paths,
+        fields=fields,
+        prefilter=prefilter,
     )  # type: AsyncIterable[Any]
 
-    if parse:
+    if parser is not None:
         from .parse_commit import main as parse_commit
 
-        stream = parse_commit(config, input=stream, include_unparsed=include_unparsed)
+        stream = parse_commit(
+            config, input=stream, include_unparsed=include_unparsed, parser=parser
+        )
 
-    async for item in stream:
-        line = json.dumps(item, default=json_defaults)
-        output.writelines([line, "\n"])
+    try:
+        async with Writer(output) as writer:
+            async for item in stream:
+                await writer.write(encode_record(item, format=format))
+    finally:
+        # Stops git straight away if writing failed, eg. if the output was closed early
+        await pipeline.aclose(stream)
 
 
 async def main(
@@ -49,8 +89,22 @@ async def main(
     from_last_tag: bool,
     to_rev: str,
     reverse: bool,
+    exclude: Optional[Iterable[str]] = None,
+    author: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    grep: Optional[str] = None,
+    no_merges: bool = False,
+    first_parent: bool = False,
+    paths: Optional[Iterable[str]] = None,
+    fields: Optional[Iterable[str]] = None,
+    prefilter: Optional[Callable[[git.Commit], bool]] = None,
+    boundary: Optional[Set[str]] = None,
+    path: Optional[pathlib.PurePath] = None,
 ) -> AsyncIterable[git.Commit]:
 
+    from .parse_commit import get_max_body_size
+
     if from_last_tag:
         if from_rev is not None:
             logger.warning("--from-last-tag is ignored when combined with --from")
@@ -62,9 +116,35 @@ async def main(
                 tag_filter = None
 
             tags = await git.get_tags(
-                pattern=tag_filter, sort="creatordate", reverse=True
+                path=path,
+                pattern=tag_filter,
+                sort="creatordate",
+                reverse=True,
+                fields=["name"],
             )
             from_rev = next(tag["name"] for tag in tags if tag["name"] not in excluded)
 
-    async for commit in git.get_commits(start=from_rev, end=to_rev, reverse=reverse):
-        yield commit
+    stream = git.get_commits(
+        start=from_rev,
+        end=to_rev,
+        exclude=exclude,
+        reverse=reverse,
+        author=author,
+        since=since,
+        until=until,
+        grep=grep,
+        no_merges=no_merges,
+        first_parent=first_parent,
+        paths=paths,
+        fields=fields,
+        prefilter=prefilter,
+        boundary=boundary,
+        path=path,
+        max_body_size=get_max_body_size(config),
+    )
+
+    try:
+        async for commit in stream:
+            yield commit
+    finally:
+        await pipeline.aclose(stream)
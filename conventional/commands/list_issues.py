@@ -0,0 +1,134 @@
+import json
+import logging
+from typing import (
+    Any,
+    AsyncIterable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    TypedDict,
+)
+
+import confuse
+
+logger = logging.getLogger(__name__)
+
+
+class IssueGroup(TypedDict):
+    version: Optional[str]
+    issues: List[str]
+
+
+def _get_sort_key(issue: str) -> Tuple[int, int, str]:
+    # Numeric issues are sorted numerically, before any other issues
+    return (0, int(issue), "") if issue.isdigit() else (1, 0, issue)
+
+
+def _sort_issues(group: IssueGroup) -> IssueGroup:
+    # Issues are only listed once, even if several commits reference them
+    issues = dict.fromkeys(group["issues"])
+    return {"version": group["version"], "issues": sorted(issues, key=_get_sort_key)}
+
+
+def _get_issues(data: Optional[Any]) -> List[str]:
+    if not data:
+        return []
+
+    return list(data.get("metadata", {}).get("closes", []))
+
+
+async def cli_main(
+    config: confuse.Configuration,
+    *,
+    output: TextIO,
+    from_rev: Optional[str],
+    from_last_tag: bool,
+    to_rev: str,
+    group_by_version: bool,
+) -> None:
+    stream = main(
+        config,
+        from_rev=from_rev,
+        from_last_tag=from_last_tag,
+        to_rev=to_rev,
+        group_by_version=group_by_version,
+    )
+
+    async for group in stream:
+        if group_by_version:
+            output.writelines([json.dumps(group), "\n"])
+        else:
+            output.writelines(f"{issue}\n" for issue in group["issues"])
+
+
+async def main(
+    config: confuse.Configuration,
+    *,
+    from_rev: Optional[str] = None,
+    from_last_tag: bool = False,
+    to_rev: str = "HEAD",
+    group_by_version: bool = False,
+) -> AsyncIterable[IssueGroup]:
+    """
+    Gets the issues closed or referenced by commits, without duplicates. If
+    `group_by_version` is set, issues are grouped by the version which released them,
+    oldest version first, with unreleased issues last.
+    """
+
+    from .list_commits import main as list_commits
+    from .parse_commit import get_prefilter, load_parser, main as parse_commit
+    from .template import get_version_tags, yield_versions
+
+    parser = load_parser(config)
+
+    def _get_range(
+        exclude: List[str], rev: str, boundary: Optional[Set[str]]
+    ) -> AsyncIterable[Any]:
+        # Tagged commits are still needed to tell which versions have any commits, even
+        # if they can't be parsed
+        commits = list_commits(
+            config,
+            from_rev=from_rev,
+            from_last_tag=from_last_tag,
+            to_rev=rev,
+            exclude=exclude,
+            reverse=True,
+            fields={"rev", *parser.fields, *(["tags"] if group_by_version else [])},
+            prefilter=get_prefilter(parser, include_tagged=group_by_version),
+            boundary=boundary,
+        )
+        return parse_commit(
+            config, input=commits, include_unparsed=group_by_version, parser=parser
+        )
+
+    if not group_by_version:
+        issues: Dict[str, None] = {}
+        async for change in _get_range([], to_rev, None):
+            for issue in _get_issues(change["data"]):
+                issues[issue] = None
+
+        yield {"version": None, "issues": sorted(issues, key=_get_sort_key)}
+        return
+
+    # Versions are found in the same way as `template`, so that both agree on which
+    # version released each commit
+    tags = await get_version_tags(config, merged=to_rev)
+    stream = yield_versions(tags, _get_range, end=to_rev)
+
+    group: Optional[IssueGroup] = None
+    async for tag, change in stream:
+        version = tag["name"] if tag is not None else None
+        if group is None or group["version"] != version:
+            if group is not None:
+                yield _sort_issues(group)
+
+            group = {"version": version, "issues": []}
+
+        group["issues"].extend(_get_issues(change["data"]))
+
+    # Unreleased commits are only listed if they reference any issues
+    if group is not None and (group["version"] is not None or group["issues"]):
+        yield _sort_issues(group)
@@ -0,0 +1,76 @@
+import os
+import pathlib
+import subprocess
+
+import confuse
+import pytest
+
+from .. import git
+from . import list_issues
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_list_issues(
+    config: confuse.Configuration, git_repository: pathlib.PurePath
+) -> None:
+    await git.create_commit(git_repository, "feat: One\n\nCloses #10", allow_empty=True)
+    await git.create_commit(git_repository, "fix: Two\n\nRefs #9", allow_empty=True)
+    await git.create_tag(git_repository, "1.0.0")
+    await git.create_commit(git_repository, "fix: Three\n\nCloses #9", allow_empty=True)
+    await git.create_commit(git_repository, "Closes #11", allow_empty=True)
+
+    cwd = os.getcwd()
+    os.chdir(git_repository)
+
+    try:
+        ungrouped = [group async for group in list_issues.main(config)]
+        grouped = [
+            group async for group in list_issues.main(config, group_by_version=True)
+        ]
+    finally:
+        os.chdir(cwd)
+
+    assert ungrouped == [{"version": None, "issues": ["9", "10"]}]
+    assert grouped == [
+        {"version": "1.0.0", "issues": ["9", "10"]},
+        {"version": None, "issues": ["9"]},
+    ]
+
+
+async def test_list_issues_with_release_branch(
+    config: confuse.Configuration, git_repository: pathlib.PurePath
+) -> None:
+    def _git(*args: str, date: str = None) -> None:
+        env = {**os.environ, "GIT_COMMITTER_DATE": date} if date else None
+        subprocess.run(["git", *args], cwd=str(git_repository), env=env, check=True)
+
+    def _commit(message: str, timestamp: int) -> None:
+        _git("commit", "-q", "--allow-empty", "-m", message, date=f"@{timestamp} +0000")
+
+    # The fix on the release branch is committed after the feature, but was released
+    # before it
+    _commit("feat: One\n\nCloses #1", 1000)
+    _git("tag", "1.0.0")
+    _commit("feat: Two\n\nCloses #2", 2000)
+    _git("checkout", "-q", "-b", "release-1", "1.0.0")
+    _commit("fix: Three\n\nCloses #3", 3000)
+    _git("tag", "1.0.1")
+    _git("checkout", "-q", "-")
+    _git("merge", "-q", "--no-edit", "release-1")
+    _git("tag", "2.0.0")
+    cwd = os.getcwd()
+    os.chdir(git_repository)
+
+    try:
+        grouped = [
+            group async for group in list_issues.main(config, group_by_version=True)
+        ]
+    finally:
+        os.chdir(cwd)
+
+    assert grouped == [
+        {"version": "1.0.0", "issues": ["1"]},
+        {"version": "1.0.1", "issues": ["3"]},
+        {"version": "2.0.0", "issues": ["2"]},
+    ]
@@ -0,0 +1,155 @@
+import enum
+import logging
+import pathlib
+import re
+from typing import Any, Dict, Optional, TextIO, TypedDict
+
+import confuse
+import typer
+
+from .. import git
+from ..util import pipeline
+
+logger = logging.getLogger(__name__)
+
+_version_regex = re.compile(
+    r"^(?P<prefix>\D*)(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patch>\d+)"
+)
+
+
+class Bump(enum.IntEnum):
+    none = 0
+    patch = 1
+    minor = 2
+    major = 3
+
+
+class NextVersion(TypedDict):
+    previous: Optional[str]
+    bump: Bump
+    version: Optional[str]
+
+
+def get_bump_types(config: confuse.Configuration) -> Dict[str, Bump]:
+    bump_types: Dict[str, Bump] = {}
+    for typ, bump in config["next-version"]["bump"].get(dict).items():
+        if bump not in Bump.__members__:
+            raise confuse.ConfigValueError(
+                f"next-version.bump.{typ} must be one of {', '.join(Bump.__members__)}"
+            )
+
+        bump_types[typ] = Bump[bump]
+
+    return bump_types
+
+
+def get_bump(data: Optional[Any], bump_types: Dict[str, Bump]) -> Bump:
+    """Gets how the version needs to be bumped to release a commit with this data."""
+
+    if not data:
+        return Bump.none
+
+    if data.get("metadata", {}).get("breaking"):
+        return Bump.major
+
+    typ = data.get("subject", {}).get("type")
+    return bump_types.get(typ, Bump.none)
+
+
+def bump_version(version: Optional[str], bump: Bump) -> Optional[str]:
+    """
+    Bumps the given version, keeping any prefix (eg. `v1.0.0`). Any pre-release or
+    build metadata is dropped. Returns None if the version isn't a semantic version.
+    """
+
+    match = _version_regex.match(version or "0.0.0")
+    if match is None:
+        return None
+
+    prefix = match["prefix"]
+    major, minor, patch = (int(match[part]) for part in ["major", "minor", "patch"])
+
+    if bump == Bump.major:
+        major, minor, patch = major + 1, 0, 0
+    elif bump == Bump.minor:
+        minor, patch = minor + 1, 0
+    elif bump == Bump.patch:
+        patch += 1
+
+    return f"{prefix}{major}.{minor}.{patch}"
+
+
+async def _get_last_version(
+    config: confuse.Configuration, path: Optional[pathlib.PurePath]
+) -> Optional[str]:
+    excluded = config["tags"]["exclude"].get(confuse.StrSeq(split=False))
+    try:
+        tag_filter = config["tags"]["filter"].get(str)
+    except confuse.NotFoundError:
+        tag_filter = None
+
+    return await git.get_last_tag(path=path, pattern=tag_filter, exclude=excluded)
+
+
+async def cli_main(
+    config: confuse.Configuration, *, output: TextIO, print_bump: bool
+) -> None:
+    result = await main(config)
+
+    if result["bump"] == Bump.none:
+        logger.error("No commits since the last version require a new release.")
+        raise typer.Exit(1)
+
+    if print_bump:
+        output.write(f"{result['bump'].name}\n")
+    elif result["version"] is None:
+        logger.error(f"Unable to bump the last version, {result['previous']}.")
+        raise typer.Exit(1)
+    else:
+        output.write(f"{result['version']}\n")
+
+
+async def main(
+    config: confuse.Configuration, *, path: Optional[pathlib.PurePath] = None
+) -> NextVersion:
+    """
+    Works out the next version from the commits since the last version. Commits are
+    only read until a breaking change is found, as nothing can change the result then.
+    """
+
+    from .parse_commit import (
+        get_max_body_size,
+        get_prefilter,
+        load_parser,
+        main as parse_commit,
+    )
+
+    parser = load_parser(config)
+    bump_types = get_bump_types(config)
+
+    previous = await _get_last_version(config, path)
+    logger.debug(f"Finding commits since {previous or 'the first commit'}")
+
+    commits = git.get_commits(
+        start=previous,
+        path=path,
+        fields={"rev", *parser.fields},
+        prefilter=get_prefilter(parser),
+        max_body_size=get_max_body_size(config),
+    )
+    stream = parse_commit(config, input=commits, include_unparsed=False, parser=parser)
+
+    bump = Bump.none
+    try:
+        async for change in stream:
+            bump = max(bump, get_bump(change["data"], bump_types))
+
+            if bump == Bump.major:
+                logger.debug(f"Found breaking change, {change['source'].get('rev')}")
+                break
+    finally:
+        # Stop git from reading any more of the history
+        await pipeline.aclose(stream)
+
+    version = bump_version(previous, bump) if bump != Bump.none else previous
+    return {"previous": previous, "bump": bump, "version": version}
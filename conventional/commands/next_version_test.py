@@ -0,0 +1,63 @@
+import asyncio
+import pathlib
+from typing import Any, Optional
+
+import confuse
+import pytest
+
+from .. import git
+from . import next_version
+from .next_version import Bump, bump_version, get_bump
+
+BUMP_TYPES = {"feat": Bump.minor, "fix": Bump.patch}
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (None, Bump.none),
+        ({"subject": {"type": "docs"}}, Bump.none),
+        ({"subject": {"type": "fix"}}, Bump.patch),
+        ({"subject": {"type": "feat"}}, Bump.minor),
+        ({"subject": {"type": "docs"}, "metadata": {"breaking": True}}, Bump.major),
+    ],
+)
+def test_get_bump(data: Optional[Any], expected: Bump) -> None:
+    assert get_bump(data, BUMP_TYPES) == expected
+
+
+@pytest.mark.parametrize(
+    "version, bump, expected",
+    [
+        (None, Bump.minor, "0.1.0"),
+        ("1.2.3", Bump.patch, "1.2.4"),
+        ("1.2.3", Bump.minor, "1.3.0"),
+        ("v1.2.3", Bump.major, "v2.0.0"),
+        ("1.2.3-rc.1+build", Bump.patch, "1.2.4"),
+        ("not-a-version", Bump.patch, None),
+    ],
+)
+def test_bump_version(version: Optional[str], bump: Bump, expected: str) -> None:
+    assert bump_version(version, bump) == expected
+
+
+@pytest.mark.asyncio
+async def test_main_stops_at_breaking_change(
+    config: confuse.Configuration, git_repository: pathlib.PurePath
+) -> None:
+    await git.create_commit(git_repository, "feat: One", allow_empty=True)
+    await git.create_tag(git_repository, "v1.0.0")
+    for index in range(100):
+        await git.create_commit(git_repository, f"fix: {index}", allow_empty=True)
+    await git.create_commit(git_repository, "feat!: Breaking", allow_empty=True)
+
+    result = await asyncio.wait_for(
+        next_version.main(config, path=git_repository), timeout=10
+    )
+    assert result == {"previous": "v1.0.0", "bump": Bump.major, "version": "v2.0.0"}
+
+    await git.create_commit(git_repository, "docs: Unreleased", allow_empty=True)
+    await git.create_tag(git_repository, "v2.0.0")
+
+    result = await next_version.main(config, path=git_repository)
+    assert result == {"previous": "v2.0.0", "bump": Bump.none, "version": "v2.0.0"}
@@ -1,13 +1,30 @@
+import asyncio
+import collections
+import concurrent.futures
 import importlib
-import json
 import logging
-from typing import Any, AsyncIterable, Optional, TextIO, TypedDict, cast
+import os
+import time
+from typing import (
+    Any,
+    AsyncIterable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    TypedDict,
+    cast,
+)
 
 import confuse
 
-from .. import git
+from .. import git, instrumentation
 from ..parser.base import Parser
-from ..util.io import json_defaults
+from ..util import pipeline
+from ..util.io import Writer, encode_record, read_records
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +34,103 @@ class ParsedCommit(TypedDict):
     data: Optional[Any]
 
 
+def _create_parser(module: str, name: str, config: confuse.ConfigView) -> Parser[Any]:
+    with instrumentation.span("parser.load", parser=f"{module}.{name}"):
+        cls = getattr(importlib.import_module(module), name)
+        return cast(Parser[Any], cls(config))
+
+
+def get_max_body_size(config: confuse.Configuration) -> Optional[int]:
+    """Gets the number of characters commit bodies are truncated to, if any."""
+
+    return config["parser"]["max-body-size"].get(confuse.Optional(int))
+
+
 def load_parser(config: confuse.Configuration) -> Parser[Any]:
     parser_config = config["parser"]
     module = parser_config["module"].get(str)
     name = parser_config["class"].get(str)
 
-    custom_config = parser_config["config"]
-    cls = getattr(importlib.import_module(module), name)
-    return cast(Parser[Any], cls(custom_config))
+    parser = _create_parser(module, name, parser_config["config"])
+    parser.max_body_size = get_max_body_size(config)
+
+    return parser
+
+
+# Parsers can't be sent to other processes, so each worker process creates its own
+# from the parser's configuration
+_worker_parser: Optional[Parser[Any]] = None
+
+
+def _init_worker(
+    module: str, name: str, data: Dict[str, Any], max_body_size: Optional[int]
+) -> None:
+    global _worker_parser
+
+    view = confuse.RootView([confuse.ConfigSource.of(data)])
+    _worker_parser = _create_parser(module, name, view)
+    _worker_parser.max_body_size = max_body_size
+
+
+def _parse_timed(
+    parser: Parser[Any], subject: str, body: Optional[str]
+) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    data = parser.parse(subject, body)
+
+    return data, time.perf_counter() - start
+
+
+def _parse_batch(
+    batch: List[Tuple[str, Optional[str]]], parser: Optional[Parser[Any]] = None
+) -> List[Tuple[Any, float]]:
+    parser = parser or _worker_parser
+    assert parser is not None
+
+    return [_parse_timed(parser, subject, body) for subject, body in batch]
+
+
+def _create_executor(
+    config: confuse.Configuration, options: pipeline.PipelineOptions
+) -> concurrent.futures.Executor:
+    if options["parse_executor"] == "thread":
+        return concurrent.futures.ThreadPoolExecutor(options["workers"])
+
+    parser_config = config["parser"]
+    return concurrent.futures.ProcessPoolExecutor(
+        options["workers"],
+        initializer=_init_worker,
+        initargs=(
+            parser_config["module"].get(str),
+            parser_config["class"].get(str),
+            parser_config["config"].flatten(),
+            get_max_body_size(config),
+        ),
+    )
+
+
+def get_prefilter(
+    parser: Parser[Any], *, include_tagged: bool = False
+) -> Optional[Callable[[git.Commit], bool]]:
+    """
+    Gets a prefilter for `git.get_commits` which rejects commits the parser will fail
+    to parse, based on their subject. If `include_tagged` is set, commits with tags
+    will always be accepted.
+    """
+
+    subject_filter = parser.get_subject_filter()
+    if subject_filter is None:
+        return None
+
+    accepts_subject: Callable[[str], bool] = subject_filter
+
+    def _prefilter(commit: git.Commit) -> bool:
+        if include_tagged and commit.get("tags"):
+            return True
+
+        return accepts_subject(commit["subject"])
+
+    return _prefilter
 
 
 async def cli_main(
@@ -33,17 +139,17 @@ async def cli_main(
     input: TextIO,
     output: TextIO,
     include_unparsed: bool,
+    format: str = "ndjson",
 ) -> None:
-    async def _yield_input() -> AsyncIterable[git.Commit]:
-        for line in input:
-            item = json.loads(line)
-            yield item
+    stream = main(
+        config,
+        input=read_records(input, format=format),
+        include_unparsed=include_unparsed,
+    )
 
-    stream = main(config, input=_yield_input(), include_unparsed=include_unparsed)
-
-    async for item in stream:
-        line = json.dumps(item, default=json_defaults)
-        output.writelines([line, "\n"])
+    async with Writer(output) as writer:
+        async for item in stream:
+            await writer.write(encode_record(item, format=format))
 
 
 async def main(
@@ -51,13 +157,117 @@ async def main(
     *,
     input: AsyncIterable[git.Commit],
     include_unparsed: bool,
+    parser: Optional[Parser[Any]] = None,
 ) -> AsyncIterable[ParsedCommit]:
 
-    parser = load_parser(config)
+    """
+    Parses each commit from `input`, which is closed once parsing finishes or the
+    returned stream is closed early.
+    """
+
+    options = pipeline.get_options(config)
+    if options["buffer_size"] > 0:
+        # Reading commits from git carries on while they are being parsed
+        input = pipeline.buffered(
+            input, size=options["buffer_size"], batch_size=options["batch_size"]
+        )
+
+    if parser is None:
+        parser = load_parser(config)
+
+    if options["parse_executor"] == "inline":
+        stream = _parse(input, parser)
+    else:
+        stream = _parse_in_executor(input, parser, config, options)
+
+    threshold = config["parser"]["slow-parse-threshold"].get(confuse.Optional(float))
+
+    hits = 0
+    misses = 0
+    slow = 0
+
+    try:
+        async for commit, data, seconds in stream:
+            if threshold is not None and seconds > threshold:
+                slow += 1
+                logger.warning(
+                    f"Parsing commit {_describe_commit(commit)} took {seconds:.2f}s"
+                )
+
+            if data:
+                hits += 1
+            else:
+                misses += 1
+
+            if not include_unparsed and not data:
+                continue
+
+            yield {"source": commit, "data": data}
+    finally:
+        instrumentation.count("parse.hits", hits)
+        instrumentation.count("parse.misses", misses)
+        instrumentation.count("parse.slow", slow)
+
+        # Stop reading any more commits if the caller stopped early
+        await pipeline.aclose(stream)
+        await pipeline.aclose(input)
+
+
+def _describe_commit(commit: git.Commit) -> str:
+    # Commits only contain the fields requested, so may not have a hash
+    return commit.get("rev") or repr(commit["subject"])
+
+
+async def _parse(
+    input: AsyncIterable[git.Commit], parser: Parser[Any]
+) -> AsyncIterable[Tuple[git.Commit, Any, float]]:
     async for commit in input:
-        data: Any = parser.parse(commit["subject"], commit["body"])
+        with instrumentation.span("parser.parse"):
+            data, seconds = _parse_timed(parser, commit["subject"], commit.get("body"))
+
+        yield commit, data, seconds
+
+
+async def _parse_in_executor(
+    input: AsyncIterable[git.Commit],
+    parser: Parser[Any],
+    config: confuse.Configuration,
+    options: pipeline.PipelineOptions,
+) -> AsyncIterable[Tuple[git.Commit, Any, float]]:
+    """
+    Parses batches of commits in a thread or process pool. Several batches are parsed
+    at once, while still returning commits in their original order.
+    """
+
+    loop = asyncio.get_event_loop()
+    executor = _create_executor(config, options)
+
+    # Process workers create their own parser
+    shared_parser = parser if options["parse_executor"] == "thread" else None
+    window = 2 * (options["workers"] or os.cpu_count() or 1)
+
+    pending: Deque[Tuple[List[git.Commit], "asyncio.Future[List[Tuple[Any, float]]]"]]
+    pending = collections.deque()
+
+    batches = pipeline.batched(input, options["batch_size"])
+    try:
+        async for batch in batches:
+            args = [(commit["subject"], commit.get("body")) for commit in batch]
+            future = loop.run_in_executor(executor, _parse_batch, args, shared_parser)
+            pending.append((batch, future))
+
+            while pending and (len(pending) > window or pending[0][1].done()):
+                commits, future = pending.popleft()
+                for commit, (data, seconds) in zip(commits, await future):
+                    yield commit, data, seconds
 
-        if not include_unparsed and not data:
-            continue
+        while pending:
+            commits, future = pending.popleft()
+            for commit, (data, seconds) in zip(commits, await future):
+                yield commit, data, seconds
+    finally:
+        for _, future in pending:
+            future.cancel()
 
-        yield {"source": commit, "data": data}
+        executor.shutdown(wait=False)
+        await pipeline.aclose(batches)
@@ -1,6 +1,6 @@
 import io
 import json
-from typing import List, Optional, Tuple
+from typing import AsyncIterable, List, Optional, Tuple
 
 import confuse
 import dateutil
@@ -86,3 +86,69 @@ async def test_end_to_end() -> None:
         actual = json.loads(actual_data)
 
         assert actual == expected
+
+
+async def _commits(closed: List[bool]) -> AsyncIterable[git.Commit]:
+    try:
+        for _ in range(50):
+            for commit, _ in COMMITS:
+                yield commit
+    finally:
+        closed.append(True)
+
+
+@pytest.mark.parametrize("executor", ["inline", "thread", "process"])
+async def test_parse_executors(executor: str) -> None:
+    config = confuse.Configuration("Conventional", "conventional", read=False)
+    config.read(user=False)
+    config.set({"pipeline": {"parse-executor": executor, "batch-size": 8}})
+
+    closed: List[bool] = []
+    stream = parse_commit.main(config, input=_commits(closed), include_unparsed=True)
+
+    actual = [item["data"] async for item in stream]
+    assert actual == [data for _ in range(50) for _, data in COMMITS]
+    assert closed == [True]
+
+
+@pytest.mark.parametrize("executor", ["inline", "thread", "process"])
+async def test_parse_resource_guards(
+    executor: str, caplog: pytest.LogCaptureFixture
+) -> None:
+    config = confuse.Configuration("Conventional", "conventional", read=False)
+    config.read(user=False)
+    config.set(
+        {
+            "pipeline": {"parse-executor": executor},
+            "parser": {"max-body-size": 33, "slow-parse-threshold": 0},
+        }
+    )
+
+    stream = parse_commit.main(config, input=_commits([]), include_unparsed=True)
+    actual = [item["data"] async for item in stream]
+
+    # The footers after the limit aren't parsed
+    assert actual[1] is not None
+    assert actual[1]["body"] == {
+        "_raw": "With a body that has some footers",
+        "content": "With a body that has some footers",
+    }
+
+    # Every commit takes longer than the threshold
+    warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+    for commit, _ in COMMITS:
+        assert any(commit["rev"] in warning for warning in warnings)
+
+
+async def test_parse_closes_input_when_stopped_early() -> None:
+    config = confuse.Configuration("Conventional", "conventional", read=False)
+    config.read(user=False)
+
+    closed: List[bool] = []
+    stream = parse_commit.main(config, input=_commits(closed), include_unparsed=False)
+
+    async for _ in stream:
+        break
+    await stream.aclose()  # type: ignore
+
+    assert closed == [True]
@@ -0,0 +1,70 @@
+import json
+import logging
+import pathlib
+import sqlite3
+from typing import Any, AsyncIterable, Dict, Iterable, Optional, TextIO
+
+import confuse
+import typer
+
+from ..util.io import Writer, json_defaults
+
+logger = logging.getLogger(__name__)
+
+
+async def cli_main(
+    config: confuse.Configuration,
+    *,
+    output: TextIO,
+    sql: str,
+    params: Iterable[str],
+    database: Optional[pathlib.Path],
+    update: bool,
+) -> None:
+    stream = main(config, sql=sql, params=params, database=database, update=update)
+
+    try:
+        async with Writer(output) as writer:
+            async for row in stream:
+                line = json.dumps(row, default=json_defaults)
+                await writer.write(f"{line}\n")
+    except FileNotFoundError as ex:
+        logger.error(f"{ex} Run `conventional index` to create it.")
+        raise typer.Exit(1)
+    except sqlite3.Error as ex:
+        logger.error(f"Query failed: {ex}")
+        raise typer.Exit(1)
+
+
+async def main(
+    config: confuse.Configuration,
+    *,
+    sql: str,
+    params: Iterable[Any] = (),
+    database: Optional[pathlib.Path] = None,
+    update: bool = False,
+    path: Optional[pathlib.PurePath] = None,
+) -> AsyncIterable[Dict[str, Any]]:
+    """
+    Runs a query against the index created by the `index` command, returning each row
+    as a dictionary. If `update` is set, the index is updated before it is queried.
+    """
+
+    from .index import connect, get_default_database, main as index
+
+    if database is None:
+        database = await get_default_database(path)
+
+    if update:
+        await index(config, database=database, path=path)
+    elif not database.exists():
+        raise FileNotFoundError(f"No index found at {database.as_posix()}.")
+
+    connection = connect(database)
+
+    try:
+        cursor = connection.execute(sql, tuple(params))
+        for row in cursor:
+            yield dict(row)
+    finally:
+        connection.close()
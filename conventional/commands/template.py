@@ -1,20 +1,45 @@
 import fnmatch
-import json
 import logging
-from typing import Any, AsyncIterable, Dict, List, Optional, TextIO, Tuple, Type, TypedDict, cast
+import pathlib
+from typing import (
+    Any,
+    AsyncIterable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Type,
+    TypedDict,
+    TypeVar,
+)
 
 import confuse
 import jinja2
 import typer
 
-from .. import git
+from .. import git, instrumentation
+from ..parser.base import Parser
+from ..util import pipeline
+from ..util.compact import compact
 from ..util.confuse import Filename
+from ..util.io import Writer, read_records, replace_if_changed
 from . import exceptions
 
 logger = logging.getLogger(__name__)
 
 DEFAULT = object()
 
+# The exit code used once the file given by `--output-file` has been changed
+OUTPUT_CHANGED_EXIT_CODE = 3
+
+T = TypeVar("T")
+
 
 class Change(TypedDict):
     source: git.Commit
@@ -31,71 +56,305 @@ class Version(Dict[Optional[str], List[Change]]):
 
 VersionTuple = Tuple[Optional[git.Tag], Version]
 
+# The changes read for each range of commits, keyed by the tags excluded from it and
+# the rev it ends at, along with the excluded commits the walk stopped at
+RangeCache = Dict[Tuple[FrozenSet[str], str], Tuple[List[Change], Set[str]]]
 
-async def cli_main(
+
+def get_version_filter(config: confuse.Configuration) -> Callable[[str], bool]:
+    """
+    Gets a function which returns whether the tag with the given name marks a version,
+    based on the `tags.filter` and `tags.exclude` configuration.
+    """
+
+    excluded = config["tags"]["exclude"].get(confuse.StrSeq(split=False))
+    try:
+        tag_filter = config["tags"]["filter"].get(str)
+    except confuse.NotFoundError:
+        tag_filter = None
+
+    def _is_version_tag(tag: str) -> bool:
+        if tag_filter and not fnmatch.fnmatch(tag, tag_filter):
+            return False
+        if tag in excluded:
+            return False
+        return True
+
+    return _is_version_tag
+
+
+async def get_version_tags(
+    config: confuse.Configuration,
+    *,
+    merged: Optional[str] = None,
+    path: Optional[pathlib.PurePath] = None,
+) -> List[git.Tag]:
+    """
+    Gets the tags which mark versions, oldest first. If `merged` is given, only tags
+    reachable from it are returned.
+    """
+
+    excluded = config["tags"]["exclude"].get(confuse.StrSeq(split=False))
+    try:
+        tag_filter = config["tags"]["filter"].get(str)
+    except confuse.NotFoundError:
+        tag_filter = None
+
+    tags = await git.get_tags(
+        path=path, pattern=tag_filter, sort="creatordate", merged=merged
+    )
+    return [tag for tag in tags if tag["name"] not in excluded]
+
+
+async def get_released_tags(
+    tags: Iterable[git.Tag], *, path: Optional[pathlib.PurePath] = None
+) -> List[git.Tag]:
+    """
+    Gets the tags which aren't contained by any of the others. Any commits reachable
+    from them have been released by one of `tags`.
+    """
+
+    tags = list(tags)
+    if not tags:
+        return []
+
+    reachability = git.get_reachability(path)
+    independent = await reachability.get_independent(
+        tag["object_name"] for tag in tags
+    )
+
+    # Only one tag is needed for each commit, so the most recent is kept
+    by_commit = {tag["object_name"]: tag for tag in tags}
+    return [by_commit[commit] for commit in by_commit if commit in independent]
+
+
+async def yield_versions(
+    tags: Iterable[git.Tag],
+    get_range: Callable[[List[str], str, Optional[Set[str]]], AsyncIterable[T]],
+    *,
+    released: Iterable[git.Tag] = (),
+    end: str = "HEAD",
+) -> AsyncIterable[Tuple[Optional[git.Tag], T]]:
+    """
+    Yields the items in the range of commits released by each of `tags`, followed by
+    any unreleased items up until `end`. Each item is paired with the tag releasing it,
+    or None if it is unreleased.
+
+    `get_range(exclude, to_rev, boundary)` should return the items for the commits
+    reachable from `to_rev` but not from any of `exclude`, adding the excluded commits
+    the walk stopped at to `boundary` if it is given. `released` should contain the
+    tags released before the first of `tags`, if there are any.
+    """
+
+    # The most recent tags which aren't contained by any later tag. A commit belongs to
+    # the first tag which contains it, so any commits reachable from these have already
+    # been released. When history is linear, this is just the previous tag.
+    frontier = list(released)
+
+    for tag in tags:
+        to_rev = tag["name"]
+        exclude = [released_tag["name"] for released_tag in frontier]
+        if not exclude:
+            logger.debug(f"Retrieving commits up until, {to_rev}")
+        else:
+            logger.debug(f"Retrieving commits from, {', '.join(exclude)}, to, {to_rev}")
+
+        boundary: Set[str] = set()
+        async for item in get_range(exclude, to_rev, boundary):
+            yield tag, item
+
+        # A released tag is contained by this one exactly when the walk stopped at it,
+        # as none of the released tags contain each other, so no extra ancestry queries
+        # are needed
+        boundary.add(tag["object_name"])
+        frontier = [
+            released_tag
+            for released_tag in frontier
+            if released_tag["object_name"] not in boundary
+        ]
+        frontier.append(tag)
+
+    exclude = [released_tag["name"] for released_tag in frontier]
+    logger.debug(f"Retrieving remaining commits since {', '.join(exclude)}")
+
+    async for item in get_range(exclude, end, None):
+        yield None, item
+
+
+def get_previous_version(
+    tags: List[git.Tag],
+    *,
+    since_version: Optional[str] = None,
+    last_versions: Optional[int] = None,
+) -> Optional[git.Tag]:
+    """
+    Gets the version before the first version to be rendered from the given version
+    tags, if there is one.
+    """
+
+    if since_version is not None:
+        for tag in tags:
+            if tag["name"] == since_version:
+                return tag
+
+        raise exceptions.UnknownVersionError(since_version)
+
+    if last_versions is not None and last_versions < len(tags):
+        return tags[-last_versions - 1]
+
+    return None
+
+
+RangeGetter = Callable[[List[str], str, Optional[Set[str]]], AsyncIterable[Change]]
+
+
+def _share_ranges(get_range: RangeGetter, ranges: RangeCache) -> RangeGetter:
+    # Wraps `get_range` so that each range is only read once, with its changes kept in
+    # `ranges` to be read again from there
+    async def _get_shared_range(
+        exclude: List[str], to_rev: str, boundary: Optional[Set[str]]
+    ) -> AsyncIterable[Change]:
+        key = (frozenset(exclude), to_rev)
+        if key not in ranges:
+            stopped_at: Set[str] = set()
+            stream = get_range(exclude, to_rev, stopped_at)
+            ranges[key] = ([change async for change in stream], stopped_at)
+        else:
+            logger.debug(f"Reusing commits read previously up until, {to_rev}")
+
+        changes, stopped_at = ranges[key]
+        if boundary is not None:
+            boundary.update(stopped_at)
+
+        for change in changes:
+            yield change
+
+    return _get_shared_range
+
+
+async def yield_changes(
     config: confuse.Configuration,
     *,
-    input: Optional[TextIO],
-    output: TextIO,
     include_unparsed: bool,
-    unreleased_version: Optional[str],
-) -> None:
-    async def _yield_input(stream: TextIO) -> AsyncIterable[Change]:
-        for line in stream:
-            item = json.loads(line)
-            yield cast(Change, item)
-
-    async def _yield_commits() -> AsyncIterable[Change]:
-        from .list_commits import main as list_commits
-        from .parse_commit import main as parse_commit
-
-        def _yield_commit_range(
-            from_rev: Optional[str], to_rev: str
-        ) -> AsyncIterable[Change]:
-            return parse_commit(
+    previous_version: Optional[git.Tag] = None,
+    tags: Optional[List[git.Tag]] = None,
+    parser: Optional[Parser[Any]] = None,
+    path: Optional[pathlib.PurePath] = None,
+    end: str = "HEAD",
+    ranges: Optional[RangeCache] = None,
+) -> AsyncIterable[Change]:
+    """
+    Reads and parses the commits in the repository reachable from `end`, oldest first,
+    in the order needed to build versions from them. If `previous_version` is given,
+    only commits released after it are read. `tags` should be the version tags in the
+    repository, if they have already been retrieved.
+
+    If `ranges` is given, the changes read for each range of commits are kept in it,
+    and reused by later calls given the same `ranges` which need the same range, eg.
+    for the versions released on another branch.
+    """
+
+    from .list_commits import main as list_commits
+    from .parse_commit import get_prefilter, load_parser, main as parse_commit
+
+    if parser is None:
+        parser = load_parser(config)
+
+    # Unparsed commits are still needed if they have been tagged, so that the
+    # boundaries between versions can be found
+    prefilter = None
+    if not include_unparsed:
+        prefilter = get_prefilter(parser, include_tagged=True)
+
+    def _yield_commit_range(
+        exclude: List[str], to_rev: str, boundary: Optional[Set[str]]
+    ) -> AsyncIterable[Change]:
+        return parse_commit(
+            config,
+            input=list_commits(
                 config,
-                input=list_commits(
-                    config,
-                    from_rev=from_rev,
-                    from_last_tag=False,
-                    to_rev=to_rev,
-                    reverse=True,
-                ),
-                include_unparsed=True,
-            )
+                from_rev=None,
+                from_last_tag=False,
+                to_rev=to_rev,
+                exclude=exclude,
+                reverse=True,
+                prefilter=prefilter,
+                boundary=boundary,
+                path=path,
+            ),
+            include_unparsed=True,
+            parser=parser,
+        )
 
-        excluded = config["tags"]["exclude"].get(confuse.StrSeq(split=False))
-        try:
-            tag_filter = config["tags"]["filter"].get(str)
-        except confuse.NotFoundError:
-            tag_filter = None
+    if tags is None:
+        tags = await get_version_tags(config, path=path)
 
-        from_rev = None  # type: Optional[str]
-        for tag in await git.get_tags(pattern=tag_filter, sort="creatordate"):
-            if tag["name"] in excluded:
-                continue
+    # Only versions after the previous version need to be rendered, so commits are
+    # only retrieved from there onwards
+    released: List[git.Tag] = []
+    if previous_version is not None:
+        index = tags.index(previous_version) + 1
+        tags, released = tags[index:], await get_released_tags(tags[:index], path=path)
 
-            to_rev = tag["name"]
-            if from_rev is None:
-                logger.debug(f"Retrieving commits up until, {to_rev}")
-            else:
-                logger.debug(f"Retrieving commits from, {from_rev}, to, {to_rev}")
+    get_range = _yield_commit_range
+    if ranges is not None:
+        get_range = _share_ranges(_yield_commit_range, ranges)
 
-            async for commit in _yield_commit_range(from_rev, to_rev):
-                yield commit
-
-            from_rev = to_rev
+    stream = yield_versions(tags, get_range, released=released, end=end)
+    try:
+        async for _, change in stream:
+            yield change
+    finally:
+        await pipeline.aclose(stream)
 
-        logger.debug(f"Retrieving remaining commits since {from_rev}")
-        to_rev = "HEAD"
 
-        async for commit in _yield_commit_range(from_rev, "HEAD"):
-            yield commit
+async def cli_main(
+    config: confuse.Configuration,
+    *,
+    input: Optional[TextIO],
+    output: TextIO,
+    include_unparsed: bool,
+    unreleased_version: Optional[str],
+    since_version: Optional[str] = None,
+    last_versions: Optional[int] = None,
+    format: str = "ndjson",
+    output_file: Optional[pathlib.Path] = None,
+) -> None:
+    previous_version: Optional[git.Tag] = None
+    if since_version is not None or last_versions is not None:
+        if input is not None:
+            logger.warning(
+                "--since-version and --last-versions are ignored when combined with "
+                "--input"
+            )
+        else:
+            try:
+                previous_version = get_previous_version(
+                    await get_version_tags(config),
+                    since_version=since_version,
+                    last_versions=last_versions,
+                )
+            except exceptions.UnknownVersionError:
+                logger.error(f"{since_version} is not a version tag!")
+                raise typer.Exit(1)
 
     if input is not None:
-        commit_stream = _yield_input(input)
+        commit_stream = read_records(input, format=format)
     else:
-        commit_stream = _yield_commits()
+        commit_stream = yield_changes(
+            config,
+            include_unparsed=include_unparsed,
+            previous_version=previous_version,
+        )
+
+        # Commits carry on being read and parsed while versions are being built
+        options = pipeline.get_options(config)
+        if options["buffer_size"] > 0:
+            commit_stream = pipeline.buffered(
+                commit_stream,
+                size=options["buffer_size"],
+                batch_size=options["batch_size"],
+            )
 
     try:
         template_stream = await main(
@@ -103,12 +362,251 @@ async def cli_main(
             input=commit_stream,
             include_unparsed=include_unparsed,
             unreleased_version=unreleased_version,
+            previous_version=previous_version,
         )
     except exceptions.NoCommitsError:
         logger.error("No commits found!")
         raise typer.Exit(1)
-    else:
-        template_stream.dump(output)
+
+    if await _write_template(template_stream, output=output, output_file=output_file):
+        raise typer.Exit(OUTPUT_CHANGED_EXIT_CODE)
+
+
+async def cli_main_model(
+    config: confuse.Configuration,
+    *,
+    model: TextIO,
+    output: TextIO,
+    output_file: Optional[pathlib.Path] = None,
+) -> None:
+    from .build_model import read_model
+
+    try:
+        loaded = await read_model(model)
+    except ValueError as ex:
+        logger.error(f"Unable to read model, {ex}")
+        raise typer.Exit(1)
+
+    template_stream = render(
+        config,
+        loaded["versions"],
+        unreleased_version=loaded["unreleased_version"],
+        previous_version=loaded["previous_version"],
+    )
+
+    if await _write_template(template_stream, output=output, output_file=output_file):
+        raise typer.Exit(OUTPUT_CHANGED_EXIT_CODE)
+
+
+async def _write_template(
+    chunks: Iterable[str], *, output: TextIO, output_file: Optional[pathlib.Path]
+) -> bool:
+    """
+    Writes the rendered template to `output_file` if given, or `output` otherwise.
+    Returns whether `output_file` was changed.
+    """
+
+    if output_file is None:
+        async with Writer(output) as writer:
+            for chunk in chunks:
+                await writer.write(chunk)
+
+        return False
+
+    if not replace_if_changed(output_file, chunks):
+        logger.info(f"{output_file} is unchanged")
+        return False
+
+    logger.info(f"{output_file} has changed")
+    return True
+
+
+async def build_branch_versions(
+    config: confuse.Configuration,
+    branch: str,
+    *,
+    include_unparsed: bool,
+    unreleased_version: Optional[str],
+    since_version: Optional[str] = None,
+    last_versions: Optional[int] = None,
+    parser: Optional[Parser[Any]] = None,
+    ranges: Optional[RangeCache] = None,
+    path: Optional[pathlib.PurePath] = None,
+) -> Tuple[List[VersionTuple], Optional[git.Tag]]:
+    """
+    Builds the versions released on `branch` from the version tags reachable from it,
+    returning them along with the version before the first of them (see
+    `get_previous_version`). Giving the same `ranges` and `parser` when building the
+    versions of several branches means that the commits reachable from more than one
+    of them are only read and parsed once, and shared between their versions.
+    """
+
+    tags = await get_version_tags(config, merged=branch, path=path)
+    previous_version = get_previous_version(
+        tags, since_version=since_version, last_versions=last_versions
+    )
+
+    changes = yield_changes(
+        config,
+        include_unparsed=include_unparsed,
+        previous_version=previous_version,
+        tags=tags,
+        parser=parser,
+        path=path,
+        end=branch,
+        ranges=ranges,
+    )
+    versions = await build_versions(
+        config,
+        input=changes,
+        include_unparsed=include_unparsed,
+        unreleased_version=unreleased_version,
+    )
+
+    return versions, previous_version
+
+
+def get_branch_output_file(output_file: pathlib.Path, branch: str) -> pathlib.Path:
+    """
+    Gets the file the template rendered for `branch` is written to, replacing
+    `{branch}` in `output_file` with its name. Any slashes in the name are replaced with
+    dashes, eg. `release/1.x` is written to `CHANGELOG-release-1.x.md`.
+    """
+
+    return pathlib.Path(str(output_file).replace("{branch}", branch.replace("/", "-")))
+
+
+async def cli_main_branches(
+    config: confuse.Configuration,
+    *,
+    branches: List[str],
+    output: TextIO,
+    output_file: Optional[pathlib.Path],
+    include_unparsed: bool,
+    unreleased_version: Optional[str],
+    since_version: Optional[str] = None,
+    last_versions: Optional[int] = None,
+) -> None:
+    from .parse_commit import load_parser
+
+    parser = load_parser(config)
+    ranges: RangeCache = {}
+
+    changed = False
+    for branch in branches:
+        logger.debug(f"Rendering template for branch, {branch}")
+
+        try:
+            versions, previous_version = await build_branch_versions(
+                config,
+                branch,
+                include_unparsed=include_unparsed,
+                unreleased_version=unreleased_version,
+                since_version=since_version,
+                last_versions=last_versions,
+                parser=parser,
+                ranges=ranges,
+            )
+        except exceptions.UnknownVersionError:
+            logger.error(f"{since_version} is not a version tag on {branch}!")
+            raise typer.Exit(1)
+        except exceptions.NoCommitsError:
+            logger.error(f"No commits found on {branch}!")
+            raise typer.Exit(1)
+
+        template_stream = render(
+            config,
+            versions,
+            unreleased_version=unreleased_version,
+            previous_version=previous_version,
+        )
+
+        branch_output_file: Optional[pathlib.Path] = None
+        if output_file is not None:
+            branch_output_file = get_branch_output_file(output_file, branch)
+
+        if await _write_template(
+            template_stream, output=output, output_file=branch_output_file
+        ):
+            changed = True
+
+    if changed:
+        raise typer.Exit(OUTPUT_CHANGED_EXIT_CODE)
+
+
+async def watch(
+    config: confuse.Configuration,
+    *,
+    output: TextIO,
+    include_unparsed: bool,
+    unreleased_version: Optional[str],
+    since_version: Optional[str] = None,
+    last_versions: Optional[int] = None,
+    interval: float = 1.0,
+    output_file: Optional[pathlib.Path] = None,
+) -> None:
+    """
+    Renders the template, then renders it again whenever HEAD or any ref changes, until
+    cancelled. Refs are checked every `interval` seconds. Only the commits after the
+    last version rendered previously are read and parsed again, and `output` is only
+    written to when the rendered template changes, replacing its contents if it is a
+    file. If `output_file` is given, it is written to instead of `output`, and only
+    replaced if its contents differ.
+    """
+
+    import asyncio
+
+    from ..session import Session
+
+    session = Session(config=config)
+
+    fingerprint: Optional[str] = None
+    rendered: Optional[str] = None
+    while True:
+        try:
+            current = await git.get_ref_fingerprint()
+        except ValueError:
+            logger.error("Not a git repository.")
+            raise typer.Exit(1)
+
+        if current != fingerprint:
+            if fingerprint is not None:
+                logger.info("Refs changed, rendering template again")
+                await session.refresh()
+
+            fingerprint = current
+
+            try:
+                stream = session.render(
+                    include_unparsed=include_unparsed,
+                    unreleased_version=unreleased_version,
+                    since_version=since_version,
+                    last_versions=last_versions,
+                )
+                text = "".join([chunk async for chunk in stream])
+            except exceptions.NoCommitsError:
+                logger.error("No commits found!")
+            except exceptions.UnknownVersionError:
+                logger.error(f"{since_version} is not a version tag!")
+            else:
+                if text != rendered:
+                    if output_file is not None:
+                        replace_if_changed(output_file, [text])
+                    else:
+                        _replace_contents(output, text)
+
+                    rendered = text
+
+        await asyncio.sleep(interval)
+
+
+def _replace_contents(output: TextIO, text: str) -> None:
+    if output.seekable():
+        output.seek(0)
+        output.truncate()
+
+    output.write(text)
+    output.flush()
 
 
 async def main(
@@ -117,33 +615,47 @@ async def main(
     input: AsyncIterable[Change],
     include_unparsed: bool,
     unreleased_version: Optional[str],
+    previous_version: Optional[git.Tag] = None,
 ) -> jinja2.environment.TemplateStream:
-    def _is_unreleased(tag: Optional[git.Tag]) -> bool:
-        return tag is None or tag["name"] == unreleased_version
+    """
+    Renders the configured template with the versions found in the given commits. If
+    the commits don't go back to the first version, `previous_version` should be the
+    version before them, so that templates can still link to it.
+    """
+
+    versions = await build_versions(
+        config,
+        input=input,
+        include_unparsed=include_unparsed,
+        unreleased_version=unreleased_version,
+    )
 
-    def _read_config(
-        view: confuse.ConfigView, default: Any = DEFAULT, typ: Type = str
-    ) -> Any:
-        try:
-            return view.get(typ)
-        except confuse.NotFoundError:
-            if default is DEFAULT:
-                raise
+    return render(
+        config,
+        versions,
+        unreleased_version=unreleased_version,
+        previous_version=previous_version,
+    )
 
-            return default
 
-    excluded = config["tags"]["exclude"].get(confuse.StrSeq(split=False))
-    try:
-        tag_filter = config["tags"]["filter"].get(str)
-    except confuse.NotFoundError:
-        tag_filter = None
+async def build_versions(
+    config: confuse.Configuration,
+    *,
+    input: AsyncIterable[Change],
+    include_unparsed: bool,
+    unreleased_version: Optional[str],
+) -> List[VersionTuple]:
+    """
+    Groups the given commits into the versions which released them, most recent first.
+    Raises `NoCommitsError` if none of the versions have any commits.
 
-    def _ignore_tag(tag: str) -> bool:
-        if tag_filter and not fnmatch.fnmatch(tag, tag_filter):
-            return True
-        if tag in excluded:
-            return True
-        return False
+    If `template.compact` is enabled, the commits are kept as read-only records (see
+    `util.compact`) to reduce the memory needed to keep every commit at once.
+    """
+
+    is_version_tag = get_version_filter(config)
+    compact_changes = config["template"]["compact"].get(bool)
+    keep_raw = config["template"]["keep-raw"].get(bool)
 
     versions: List[VersionTuple] = []
 
@@ -156,11 +668,14 @@ async def main(
             if typ not in version:
                 version[typ] = []
 
+            if compact_changes:
+                change = compact(change, keep_raw=keep_raw)
+
             version[typ].append(change)
 
         if change["source"]["tags"]:
             tags = [
-                tag for tag in change["source"]["tags"] if not _ignore_tag(tag["name"])
+                tag for tag in change["source"]["tags"] if is_version_tag(tag["name"])
             ]
 
             if tags:
@@ -200,6 +715,14 @@ async def main(
     # (ie. most recent release first)
     versions.reverse()
 
+    _sort_commit_types(config, versions)
+
+    return versions
+
+
+def _sort_commit_types(
+    config: confuse.Configuration, versions: List[VersionTuple]
+) -> None:
     # Order commit types in each version by the order specified in the config
     # file. If a commit type does not have a defined order, it will be ordered
     # alphabetically at the end.
@@ -214,6 +737,25 @@ async def main(
         for k in sorted(version.keys(), key=_commit_type_sort_index):
             version[k] = version.pop(k)
 
+
+def create_environment(config: confuse.Configuration) -> jinja2.Environment:
+    """Creates the environment templates are loaded from."""
+
+    def _read_config(
+        view: confuse.ConfigView, default: Any = DEFAULT, typ: Type = str
+    ) -> Any:
+        try:
+            return view.get(typ)
+        except confuse.NotFoundError:
+            if default is DEFAULT:
+                raise
+
+            return default
+
+    @jinja2.pass_context
+    def _is_unreleased(context: jinja2.runtime.Context, tag: Optional[git.Tag]) -> bool:
+        return tag is None or tag["name"] == context.get("unreleased_version")
+
     loaders: List[jinja2.BaseLoader] = []
 
     for package in config["template"]["package"].get(confuse.StrSeq(split=False)):
@@ -231,7 +773,44 @@ async def main(
     environment.filters["read_config"] = _read_config
     environment.tests["unreleased"] = _is_unreleased
 
-    template = environment.get_template(config["template"]["name"].get(str))
+    return environment
+
+
+def render(
+    config: confuse.Configuration,
+    versions: List[VersionTuple],
+    *,
+    unreleased_version: Optional[str] = None,
+    previous_version: Optional[git.Tag] = None,
+    environment: Optional[jinja2.Environment] = None,
+) -> jinja2.environment.TemplateStream:
+    """
+    Renders the configured template with the given versions. `environment` can be
+    given to reuse one created by `create_environment`, along with the templates it has
+    already compiled.
+    """
+
+    if environment is None:
+        environment = create_environment(config)
+
+    template_name = config["template"]["name"].get(str)
+    with instrumentation.span("template.compile", template=template_name):
+        template = environment.get_template(template_name)
     template_config = config["template"]["config"]
 
-    return template.stream(versions=versions, config=template_config, confuse=confuse)
+    return jinja2.environment.TemplateStream(
+        _generate(
+            template,
+            versions=versions,
+            previous_version=previous_version,
+            unreleased_version=unreleased_version,
+            config=template_config,
+            confuse=confuse,
+        )
+    )
+
+
+def _generate(template: jinja2.Template, **context: Any) -> Iterator[str]:
+    # Templates are rendered lazily, so rendering is timed while the stream is consumed
+    with instrumentation.span("template.render", template=template.name):
+        yield from template.generate(**context)
@@ -0,0 +1,240 @@
+import asyncio
+import io
+import os
+import pathlib
+import subprocess
+from typing import Any, Dict, Iterator, List
+
+import confuse
+import pytest
+import typer
+
+from . import template
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _render(config: confuse.Configuration, **kwargs: Any) -> Dict[str, List[str]]:
+    """Renders the changelog, returning the changes listed under each version."""
+
+    output = io.StringIO()
+    await template.cli_main(
+        config,
+        input=None,
+        output=output,
+        include_unparsed=False,
+        unreleased_version=None,
+        **kwargs,
+    )
+
+    versions: Dict[str, List[str]] = {}
+    for line in output.getvalue().splitlines():
+        if line.startswith("## "):
+            changes = versions[line[3:]] = []
+        elif line.startswith("- "):
+            changes.append(line[2:])
+
+    return versions
+
+
+@pytest.fixture()
+def release_branches(git_repository: pathlib.PurePath) -> Iterator[pathlib.PurePath]:
+    def _git(*args: str) -> None:
+        subprocess.run(["git", *args], cwd=str(git_repository), check=True)
+
+    def _commit(message: str, tag: str = None) -> None:
+        _git("commit", "--allow-empty", "-q", "-m", message)
+        if tag is not None:
+            _git("tag", tag)
+
+    _commit("feat: one", "1.0.0")
+    _git("checkout", "-q", "-b", "release-1")
+    _commit("fix: patch one", "1.0.1")
+    _git("checkout", "-q", "-")
+    _commit("feat: two", "2.0.0")
+    _git("checkout", "-q", "-b", "release-2")
+    _commit("fix: patch two", "2.0.1")
+    _git("checkout", "-q", "-")
+    _git("merge", "-q", "--no-edit", "release-1")
+    _commit("feat: three", "3.0.0")
+    _commit("feat: four")
+
+    cwd = os.getcwd()
+    os.chdir(git_repository)
+
+    yield git_repository
+
+    os.chdir(cwd)
+
+
+async def test_release_branches(
+    config: confuse.Configuration, release_branches: pathlib.PurePath
+) -> None:
+    assert await _render(config) == {
+        "Unreleased": ["four"],
+        "3.0.0": ["three"],
+        "2.0.1": ["patch two"],
+        "2.0.0": ["two"],
+        "1.0.1": ["patch one"],
+        "1.0.0": ["one"],
+    }
+
+
+async def test_last_versions(
+    config: confuse.Configuration, release_branches: pathlib.PurePath
+) -> None:
+    versions = await _render(config)
+
+    # Commits from other release branches aren't repeated in the versions rendered
+    for count in range(1, 5):
+        window = await _render(config, last_versions=count)
+        assert window == dict(list(versions.items())[: count + 1])
+
+    assert await _render(config, last_versions=5) == versions
+    assert await _render(config, last_versions=10) == versions
+
+
+async def test_compact(
+    config: confuse.Configuration, release_branches: pathlib.PurePath
+) -> None:
+    versions = await _render(config)
+
+    config.set({"template": {"compact": True, "keep-raw": False}})
+    assert await _render(config) == versions
+
+
+async def test_since_version(
+    config: confuse.Configuration, release_branches: pathlib.PurePath
+) -> None:
+    assert await _render(config, since_version="2.0.0") == {
+        "Unreleased": ["four"],
+        "3.0.0": ["three"],
+        "2.0.1": ["patch two"],
+    }
+
+    with pytest.raises(typer.Exit):
+        await _render(config, since_version="0.1.0")
+
+
+async def test_output_file(
+    config: confuse.Configuration,
+    release_branches: pathlib.PurePath,
+    tmp_path: pathlib.Path,
+) -> None:
+    output_file = tmp_path.joinpath("CHANGELOG.md")
+
+    async def _render_to_file() -> int:
+        try:
+            await template.cli_main(
+                config,
+                input=None,
+                output=io.StringIO(),
+                include_unparsed=False,
+                unreleased_version=None,
+                output_file=output_file,
+            )
+        except typer.Exit as ex:
+            return ex.exit_code
+
+        return 0
+
+    assert await _render_to_file() == template.OUTPUT_CHANGED_EXIT_CODE
+    assert "- four" in output_file.read_text()
+
+    assert await _render_to_file() == 0
+
+    subprocess.run(
+        ["git", "commit", "--allow-empty", "-q", "-m", "feat: five"], check=True
+    )
+    assert await _render_to_file() == template.OUTPUT_CHANGED_EXIT_CODE
+    assert "- five" in output_file.read_text()
+
+
+async def test_branches(
+    config: confuse.Configuration,
+    release_branches: pathlib.PurePath,
+    tmp_path: pathlib.Path,
+) -> None:
+    ranges: template.RangeCache = {}
+    versions = {}
+    for branch in ["release-1", "release-2", "HEAD"]:
+        versions[branch], _ = await template.build_branch_versions(
+            config,
+            branch,
+            include_unparsed=False,
+            unreleased_version=None,
+            ranges=ranges,
+        )
+
+    def _get_ids(branch: str, version: str) -> List[int]:
+        for tag, changes in versions[branch]:
+            if tag is not None and tag["name"] == version:
+                return [id(change) for change in changes.get_commits()]
+
+        raise KeyError(version)
+
+    # The changes in each version are read once, and shared between the branches
+    ids = _get_ids("release-1", "1.0.0")
+    assert len(ids) == 1
+    assert _get_ids("release-2", "1.0.0") == _get_ids("HEAD", "1.0.0") == ids
+    assert _get_ids("HEAD", "1.0.1") == _get_ids("release-1", "1.0.1")
+
+    output_file = tmp_path.joinpath("CHANGELOG-{branch}.md")
+    with pytest.raises(typer.Exit) as ex:
+        await template.cli_main_branches(
+            config,
+            branches=["release-1", "release-2"],
+            output=io.StringIO(),
+            output_file=output_file,
+            include_unparsed=False,
+            unreleased_version=None,
+        )
+    assert ex.value.exit_code == template.OUTPUT_CHANGED_EXIT_CODE
+
+    # Only the versions released on each branch are rendered
+    for branch, expected in [
+        ("release-1", ["1.0.1", "1.0.0"]),
+        ("release-2", ["2.0.1", "2.0.0", "1.0.0"]),
+    ]:
+        rendered = tmp_path.joinpath(f"CHANGELOG-{branch}.md").read_text()
+        headings = [line for line in rendered.splitlines() if line.startswith("## ")]
+        assert headings == [f"## {version}" for version in expected]
+
+
+async def test_watch(
+    config: confuse.Configuration, release_branches: pathlib.PurePath
+) -> None:
+    output = io.StringIO()
+
+    async def _wait_for_output(previous: str) -> str:
+        while output.getvalue() == previous:
+            await asyncio.sleep(0.01)
+
+        return output.getvalue()
+
+    task = asyncio.ensure_future(
+        template.watch(
+            config,
+            output=output,
+            include_unparsed=False,
+            unreleased_version=None,
+            interval=0.01,
+        )
+    )
+
+    try:
+        rendered = await asyncio.wait_for(_wait_for_output(""), 10)
+        assert "- four" in rendered
+
+        subprocess.run(
+            ["git", "commit", "--allow-empty", "-q", "-m", "feat: five"], check=True
+        )
+
+        # The output is replaced, rather than the template being appended to it
+        rendered = await asyncio.wait_for(_wait_for_output(rendered), 10)
+        assert rendered.count("## Unreleased") == 1
+        assert "- five" in rendered
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
@@ -0,0 +1,21 @@
+import pathlib
+import subprocess
+
+import confuse
+import pytest
+
+
+@pytest.fixture()
+def git_repository(tmp_path_factory) -> pathlib.PurePath:
+    path = tmp_path_factory.mktemp("git")
+    print(f"Git repository: {path.as_posix()}")
+
+    subprocess.run(["git", "init"], cwd=str(path))
+    return path
+
+
+@pytest.fixture()
+def config() -> confuse.Configuration:
+    config = confuse.Configuration("Conventional", "conventional", read=False)
+    config.read(user=False)
+    return config
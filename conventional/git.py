@@ -1,31 +1,54 @@
 import asyncio
+import collections
 import contextlib
 import datetime
+import hashlib
 import io
 import logging
+import os
 import pathlib
+import time
+import weakref
 from asyncio.subprocess import Process
 from typing import (
     Any,
     AsyncIterable,
     AsyncIterator,
+    Callable,
+    Deque,
     Dict,
     Iterable,
     List,
+    NamedTuple,
     Optional,
+    Set,
+    Tuple,
     TypedDict,
     cast,
 )
 
-import aiocache
 import dateutil.parser
 
+from . import instrumentation
+from .util import pipeline
+from .util.cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
 delimiter = "----------delimiter----------"
 
 
-class Tag(TypedDict):
+class ObjectInfo(TypedDict):
+    name: str
+    type: str
+    size: int
+
+
+class GitObject(ObjectInfo, total=False):
+    contents: bytes
+
+
+class Tag(TypedDict, total=False):
     name: str
     object_name: str
 
@@ -33,7 +56,9 @@ class Tag(TypedDict):
     body: str
 
 
-class Commit(TypedDict):
+# Commits and tags only contain the fields which were requested when retrieving them,
+# so every key is optional.
+class Commit(TypedDict, total=False):
     rev: str
     short_rev: str
 
@@ -47,17 +72,48 @@ class Commit(TypedDict):
     tags: Iterable[Tag]
 
 
-def _get_commit_format() -> Iterable[str]:
-    return ["%H", "%h", "%s", "%b", "%aN", "%aE", "%cI"]
+_commit_format: Dict[str, str] = {
+    "rev": "%H",
+    "short_rev": "%h",
+    "subject": "%s",
+    "body": "%b",
+    "author_name": "%aN",
+    "author_email": "%aE",
+    "date": "%cI",
+}
+
+_tag_format: Dict[str, str] = {
+    "name": "%(refname:lstrip=2)",
+    "object_name": "%(if)%(*objectname)%(then)%(*objectname)%(else)%(objectname)%(end)",
+    "subject": "%(if)%(*objectname)%(then)%(subject)%(end)",
+    "body": "%(if)%(*objectname)%(then)%(body)%(end)",
+}
+
+commit_fields = (*_commit_format, "tags")
+tag_fields = tuple(_tag_format)
 
 
-def _get_tag_format() -> Iterable[str]:
-    return [
-        "%(refname:lstrip=2)",
-        "%(if)%(*objectname)%(then)%(*objectname)%(else)%(objectname)%(end)",
-        "%(if)%(*objectname)%(then)%(subject)%(end)",
-        "%(if)%(*objectname)%(then)%(body)%(end)",
-    ]
+def _select_fields(
+    available: Iterable[str], fields: Optional[Iterable[str]]
+) -> List[str]:
+    if fields is None:
+        return list(available)
+
+    fields = set(fields)
+    unknown = fields.difference(available)
+    if unknown:
+        raise ValueError(f"Unknown field(s), {', '.join(sorted(unknown))}")
+
+    # Keep fields in a consistent order, regardless of the order they were requested in
+    return [field for field in available if field in fields]
+
+
+def _get_commit_format(fields: Iterable[str] = None) -> Iterable[str]:
+    return [_commit_format[field] for field in _select_fields(_commit_format, fields)]
+
+
+def _get_tag_format(fields: Iterable[str] = None) -> Iterable[str]:
+    return [_tag_format[field] for field in _select_fields(_tag_format, fields)]
 
 
 def _create_commit(
@@ -71,50 +127,102 @@ def _create_commit(
     *,
     tags: Iterable[Dict] = None,
 ) -> "Commit":
-    return {
-        "rev": rev.strip(),
-        "short_rev": short_rev.strip(),
-        "subject": subject.strip(),
-        "body": body.strip(),
-        "author_name": author_name.strip(),
-        "author_email": author_email.strip(),
-        "date": dateutil.parser.isoparse(date.strip()),
-        "tags": list(cast(Tag, tag) for tag in (tags or [])),
-    }
+    values = [rev, short_rev, subject, body, author_name, author_email, date]
+
+    commit = _create_commit_from_fields(_commit_format, values)
+    commit["tags"] = list(cast(Tag, tag) for tag in (tags or []))
+    return commit
+
+
+def _create_commit_from_fields(
+    fields: Iterable[str], values: Iterable[str]
+) -> "Commit":
+    commit: Dict[str, Any] = {}
+    for field, value in zip(fields, values):
+        value = value.strip()
+        commit[field] = dateutil.parser.isoparse(value) if field == "date" else value
+
+    return cast(Commit, commit)
+
+
+def _project_commit(commit: "Commit", fields: Iterable[str]) -> "Commit":
+    data = cast(Dict[str, Any], commit)
+    return cast(Commit, {field: data[field] for field in fields})
 
 
 def _create_tag(name: str, object_name: str, subject: str, body: str) -> "Tag":
-    return {
-        "name": name.strip(),
-        "object_name": object_name.strip(),
-        "subject": subject.strip(),
-        "body": body.strip(),
-    }
+    return _create_tag_from_fields(_tag_format, [name, object_name, subject, body])
+
+
+def _create_tag_from_fields(fields: Iterable[str], values: Iterable[str]) -> "Tag":
+    return cast(Tag, {field: value.strip() for field, value in zip(fields, values)})
+
+
+def _get_filter_args(
+    *,
+    author: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+    grep: Optional[str],
+    no_merges: bool,
+    first_parent: bool,
+) -> List[str]:
+    args = []
+
+    if author is not None:
+        args.append(f"--author={author}")
+    if since is not None:
+        args.append(f"--since={since}")
+    if until is not None:
+        args.append(f"--until={until}")
+    if grep is not None:
+        args.extend(["--extended-regexp", f"--grep={grep}"])
+    if no_merges:
+        args.append("--no-merges")
+    if first_parent:
+        args.append("--first-parent")
+
+    return args
 
 
 async def _process_delimited_stream(
     stream: asyncio.StreamReader, delimiter: str
 ) -> AsyncIterable[str]:
     buffer = io.StringIO()
+    bytes_read = 0
 
-    while True:
-        line = (await stream.readline()).decode()
+    span = instrumentation.span("git.read_stream")
+    try:
+        with span:
+            while True:
+                data = await stream.readline()
+                bytes_read += len(data)
 
-        if not line:
-            break
+                line = data.decode()
+                if not line:
+                    break
 
-        remaining: Optional[str] = None
-        for segment in line.split(delimiter):
-            if remaining:
-                buffer.write(remaining)
+                remaining: Optional[str] = None
+                for segment in line.split(delimiter):
+                    if remaining:
+                        buffer.write(remaining)
 
-                yield buffer.getvalue()
-                buffer = io.StringIO()
+                        # Only time spent waiting for git is counted, not the time
+                        # spent handling what was read
+                        span.pause()
+                        yield buffer.getvalue()
+                        span.resume()
 
-            remaining = segment
+                        buffer = io.StringIO()
 
-        if remaining:
-            buffer.write(remaining)
+                    remaining = segment
+
+                if remaining:
+                    buffer.write(remaining)
+
+            span.set("bytes", bytes_read)
+    finally:
+        instrumentation.count("git.bytes_read", bytes_read)
 
 
 @contextlib.asynccontextmanager
@@ -128,16 +236,359 @@ async def _run(*args: Any, **kwargs: Any) -> AsyncIterator[Process]:
     if "stderr" not in kwargs:
         kwargs["stderr"] = asyncio.subprocess.DEVNULL
 
-    process = await asyncio.create_subprocess_exec(*args, **kwargs)
+    # The span covers the lifetime of the process, so for commands whose output is
+    # streamed it includes any time spent handling that output. `git.read_stream`
+    # only covers the time spent waiting for git.
+    instrumentation.count("git.processes")
+    with instrumentation.span("git.run", args=args) as span:
+        process = await asyncio.create_subprocess_exec(*args, **kwargs)
+
+        try:
+            yield process
+        except:
+            # The process may have already exited, eg. if it was closed early after
+            # all of its output had been read
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+
+            # Waiting for the process only finishes once its output has been closed,
+            # which won't happen if reading from it was paused
+            if process.stdout is not None:
+                await process.stdout.read()
+            raise
+        finally:
+            await process.wait()
+            logger.debug(f"Command exit code: {process.returncode}")
+
+            span.set("returncode", process.returncode)
+
+
+def _get_message_body(message: str) -> str:
+    """Gets the body of a commit message, in the same way as `%b` in `git log`."""
+
+    lines = message.splitlines()
+    index = 0
+
+    # Skip any blank lines before the subject, then the subject paragraph itself
+    while index < len(lines) and not lines[index].strip():
+        index += 1
+    while index < len(lines) and lines[index].strip():
+        index += 1
+
+    return "\n".join(lines[index:]).strip()
+
+
+def _decode_commit_object(data: bytes) -> str:
+    """Decodes the raw contents of a commit object, returning the commit message."""
+
+    headers, _, message = data.partition(b"\n\n")
+
+    encoding = "utf-8"
+    for header in headers.split(b"\n"):
+        if header.startswith(b"encoding "):
+            encoding = header[len(b"encoding ") :].decode().strip()
 
     try:
-        yield process
-    except:
-        process.kill()
-        raise
-    finally:
+        return message.decode(encoding, errors="replace")
+    except LookupError:
+        return message.decode("utf-8", errors="replace")
+
+
+class _CatFile:
+    """
+    A long-lived `git cat-file` process. Requests are written as soon as they are made,
+    and responses are matched to them in order by a background task, so many requests
+    can be in-flight at once.
+    """
+
+    def __init__(self, path: Optional[pathlib.PurePath], mode: str) -> None:
+        self._path = path
+        self._mode = mode
+
+        self._process: Optional[Process] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._pending: Deque["asyncio.Future[Optional[GitObject]]"]
+        self._pending = collections.deque()
+
+    async def _start(self) -> Process:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._process is None:
+                args = ["git", "cat-file", self._mode]
+                logger.debug(f"Starting long-lived command: {args}")
+                instrumentation.count("git.processes")
+
+                pipe = asyncio.subprocess.PIPE
+                self._process = await asyncio.create_subprocess_exec(
+                    *args,
+                    stdin=pipe,
+                    stdout=pipe,
+                    stderr=asyncio.subprocess.DEVNULL,
+                    cwd=self._path,
+                )
+                self._task = asyncio.ensure_future(self._read_responses(self._process))
+
+            return self._process
+
+    async def request(self, rev: str) -> Optional["GitObject"]:
+        process = self._process or await self._start()
+        assert process.stdin
+
+        # Queueing the response and writing the request must happen without yielding
+        # to the event loop, so that responses are matched to the correct request.
+        future = asyncio.get_event_loop().create_future()
+        self._pending.append(future)
+        process.stdin.write(f"{rev}\n".encode())
+
+        await process.stdin.drain()
+        return await future
+
+    async def _read_responses(self, process: Process) -> None:
+        assert process.stdout
+
+        try:
+            while True:
+                # Each object is returned as "<object> <type> <size>\n", followed by
+                # "<contents>\n" in `--batch` mode. If an object can't be found,
+                # "<object> missing\n" is returned instead.
+                data = await process.stdout.readline()
+                instrumentation.count("git.bytes_read", len(data))
+
+                header = data.decode().split()
+                if not header:
+                    break
+
+                result: Optional[GitObject] = None
+                if len(header) == 3:
+                    name, typ, size = header
+                    result = {"name": name, "type": typ, "size": int(size)}
+
+                    if self._mode == "--batch":
+                        data = await process.stdout.readexactly(int(size) + 1)
+                        instrumentation.count("git.bytes_read", len(data))
+
+                        result["contents"] = data[:-1]
+
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(result)
+        except Exception as ex:
+            logger.debug(f"Failed to read from {self._mode} process: {ex!r}")
+        finally:
+            # The process is always cleaned up, even when this task is cancelled as
+            # the event loop shuts down.
+            self._process = None
+            await self._stop(process)
+
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    error = RuntimeError(f"git cat-file {self._mode} has exited")
+                    future.set_exception(error)
+
+    @staticmethod
+    async def _stop(process: Process) -> None:
+        if process.returncode is None:
+            assert process.stdin
+            process.stdin.close()
+
         await process.wait()
-        logger.debug(f"Command exit code: {process.returncode}")
+        logger.debug(f"Long-lived command exit code: {process.returncode}")
+
+    async def close(self) -> None:
+        if self._process is not None:
+            assert self._process.stdin
+            self._process.stdin.close()
+
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+class ObjectReader:
+    """
+    Reads arbitrary objects from a repository through long-lived `git cat-file --batch`
+    and `git cat-file --batch-check` processes, which are started when first needed.
+    Requests may be made concurrently, in which case they are pipelined through the
+    same process.
+    """
+
+    def __init__(self, path: pathlib.PurePath = None) -> None:
+        self._contents = _CatFile(path, "--batch")
+        self._info = _CatFile(path, "--batch-check")
+
+    async def __aenter__(self) -> "ObjectReader":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def read(self, rev: str) -> Optional["GitObject"]:
+        """Reads the object with the given name, or None if it doesn't exist."""
+
+        return await self._contents.request(rev)
+
+    async def read_info(self, rev: str) -> Optional["ObjectInfo"]:
+        """Reads the type and size of the object with the given name."""
+
+        return await self._info.request(rev)
+
+    async def read_many(
+        self, revs: Iterable[str], *, window: int = 64
+    ) -> AsyncIterable[Optional["GitObject"]]:
+        """
+        Reads the objects with the given names, in order. Up to `window` requests will
+        be in-flight at once.
+        """
+
+        pending: Deque["asyncio.Future[Optional[GitObject]]"] = collections.deque()
+
+        try:
+            for rev in revs:
+                pending.append(asyncio.ensure_future(self.read(rev)))
+
+                if len(pending) >= window:
+                    yield await pending.popleft()
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def close(self) -> None:
+        await self._contents.close()
+        await self._info.close()
+
+
+_EventLoop = asyncio.AbstractEventLoop
+
+_object_readers: "weakref.WeakKeyDictionary[_EventLoop, Dict[str, ObjectReader]]"
+_object_readers = weakref.WeakKeyDictionary()
+
+
+def get_object_reader(path: pathlib.PurePath = None) -> ObjectReader:
+    """
+    Gets a shared `ObjectReader` for the repository at the given path. Readers are
+    pooled per event loop, and their processes are stopped when the event loop shuts
+    down (or when `close_object_readers` is called).
+    """
+
+    readers = _object_readers.setdefault(asyncio.get_event_loop(), {})
+
+    key = str(path if path is not None else pathlib.Path.cwd())
+    if key not in readers:
+        readers[key] = ObjectReader(path)
+
+    return readers[key]
+
+
+async def close_object_readers() -> None:
+    """Closes any shared `ObjectReader`s created for the current event loop."""
+
+    readers = _object_readers.pop(asyncio.get_event_loop(), {})
+    for reader in readers.values():
+        await reader.close()
+
+
+class Reachability:
+    """
+    Answers ancestry queries about the commits in a repository. Queries are answered by
+    git using the repository's commit-graph, if it has one, so they cost time relative
+    to the commits involved rather than the whole history. As the ancestry of a commit
+    never changes, results are cached by commit hash.
+    """
+
+    def __init__(self, path: pathlib.PurePath = None) -> None:
+        self._path = path
+
+        self._has_commit_graph: Optional[bool] = None
+        self._ancestors: Dict[Tuple[str, str], bool] = {}
+        self._merge_bases: Dict[Tuple[str, ...], Optional[str]] = {}
+
+    async def _git(self, *args: str, check: bool = True) -> Optional[str]:
+        if self._has_commit_graph is None:
+            self._has_commit_graph = await self.has_commit_graph()
+
+        args = ("git", "-c", "core.commitGraph=true", *args)
+        pipe = asyncio.subprocess.PIPE
+
+        async with _run(*args, stdout=pipe, cwd=self._path) as process:
+            stdout, _ = await process.communicate()
+
+        if check and process.returncode != 0:
+            return None
+
+        return stdout.decode()
+
+    async def has_commit_graph(self) -> bool:
+        """Returns whether the repository has a commit-graph file."""
+
+        for graph_path in [
+            "objects/info/commit-graph",
+            "objects/info/commit-graphs/commit-graph-chain",
+        ]:
+            filename = await get_git_path(graph_path, path=self._path)
+            if filename is not None and filename.exists():
+                return True
+
+        logger.debug(
+            "Repository has no commit-graph, ancestry queries may be slow. "
+            "Run `git commit-graph write --reachable` to create one."
+        )
+        return False
+
+    async def resolve(self, rev: str) -> Optional[str]:
+        """Gets the hash of the commit the given name refers to."""
+
+        info = await get_object_reader(self._path).read_info(f"{rev}^{{commit}}")
+        return info["name"] if info is not None else None
+
+    async def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        """Returns whether `ancestor` is reachable from `descendant`."""
+
+        key = (await self.resolve(ancestor), await self.resolve(descendant))
+        if key[0] is None or key[1] is None:
+            return False
+
+        cache_key = cast(Tuple[str, str], key)
+        if cache_key not in self._ancestors:
+            result = await self._git("merge-base", "--is-ancestor", *cache_key)
+            self._ancestors[cache_key] = result is not None
+
+        return self._ancestors[cache_key]
+
+    async def get_independent(self, revs: Iterable[str]) -> List[str]:
+        """
+        Gets the hashes of the given commits which aren't reachable from any of the
+        others, using a single call to git.
+        """
+
+        resolved = {await self.resolve(rev) for rev in revs}
+        if None in resolved:
+            raise ValueError("Unable to resolve commit(s).")
+
+        if len(resolved) < 2:
+            return cast(List[str], list(resolved))
+
+        result = await self._git("merge-base", "--independent", *sorted(resolved))
+        return (result or "").split()
+
+
+_reachability: Dict[str, Reachability] = {}
+
+
+def get_reachability(path: pathlib.PurePath = None) -> Reachability:
+    """Gets the shared `Reachability` helper for the repository at the given path."""
+
+    key = str(path if path is not None else pathlib.Path.cwd())
+    if key not in _reachability:
+        _reachability[key] = Reachability(path)
+
+    return _reachability[key]
 
 
 async def create_commit(
@@ -162,84 +613,343 @@ async def create_tag(path: pathlib.PurePath, name: str, message: str = None) ->
         pass
 
 
-@aiocache.cached()
+# Only repositories are cached, as a directory can become a repository at any time
+_repositories: LRUCache[pathlib.Path, bool] = LRUCache("git.cache.repositories")
+
+# The root of each repository, by the path within it they were found from
+_repository_roots: LRUCache[pathlib.Path, pathlib.Path] = LRUCache(
+    "git.cache.repository_roots"
+)
+
+# Tags are keyed by the repository's ref fingerprint, so they are read again once any
+# ref changes
+_tags: LRUCache[Tuple[Any, ...], List[Tag]] = LRUCache("git.cache.tags", maxsize=32)
+
+_FileState = Optional[Tuple[int, int, int]]
+
+
+class _RefState(NamedTuple):
+    scanned: int
+    fingerprint: str
+
+    # The paths which change whenever any ref is updated, and their state when scanned
+    paths: List[str]
+    states: List[_FileState]
+
+
+# The last scan of each repository's refs
+_ref_states: LRUCache[pathlib.Path, _RefState] = LRUCache("git.cache.ref_states")
+
+# The location of `_ref_files` for each repository, which never changes
+_ref_paths: LRUCache[pathlib.Path, List[pathlib.Path]] = LRUCache("git.cache.ref_paths")
+
+caches = [_repositories, _repository_roots, _tags, _ref_paths, _ref_states]
+
+
+def _get_path_key(path: Optional[pathlib.PurePath]) -> pathlib.Path:
+    return pathlib.Path(path or ".").absolute()
+
+
+def clear_caches() -> None:
+    """Forgets everything cached about repositories, eg. between benchmark runs."""
+
+    for cache in caches:
+        cache.clear()
+
+
 async def is_git_repository(path: pathlib.PurePath = None) -> bool:
+    key = _get_path_key(path)
+    if _repositories.get(key):
+        return True
+
     async with _run("git", "rev-parse", "--is-inside-work-tree", cwd=path) as process:
         pass
 
-    return process.returncode == 0
+    if process.returncode != 0:
+        return False
+
+    _repositories.set(key, True)
+    return True
+
+
+def _get_format_fields(requested_fields: List[str], *, prefilter: bool) -> List[str]:
+    """Gets the fields to retrieve from `git log` for the given requested fields."""
+
+    fields = [field for field in requested_fields if field != "tags"]
+
+    # When prefiltering, bodies are read separately once a commit has been accepted
+    if prefilter and "body" in fields:
+        fields.remove("body")
+
+    # The hash of each commit is needed to match it against the list of tags, or to
+    # read its body later, and the subject is needed by the prefilter
+    if len(fields) != len(requested_fields) and "rev" not in fields:
+        fields.insert(0, "rev")
+    if prefilter and "subject" not in fields:
+        fields.append("subject")
+
+    return fields
+
+
+async def _read_bodies(
+    commits: AsyncIterable[Commit], reader: ObjectReader, *, window: int = 64
+) -> AsyncIterable[Commit]:
+    """
+    Reads the body of each commit from the given reader. Up to `window` commits will be
+    read concurrently, while still returning commits in their original order.
+    """
+
+    pending: Deque[Tuple[Commit, "asyncio.Future[Optional[GitObject]]"]]
+    pending = collections.deque()
+
+    async def _complete(
+        commit: Commit, future: "asyncio.Future[Optional[GitObject]]"
+    ) -> Commit:
+        obj = await future
+        message = _decode_commit_object(obj.get("contents", b"")) if obj else ""
+
+        commit["body"] = _get_message_body(message)
+        return commit
+
+    try:
+        async for commit in commits:
+            future = asyncio.ensure_future(reader.read(commit["rev"]))
+            pending.append((commit, future))
+
+            while pending and (len(pending) > window or pending[0][1].done()):
+                yield await _complete(*pending.popleft())
+
+        while pending:
+            yield await _complete(*pending.popleft())
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+        await pipeline.aclose(commits)
+
+
+async def _get_tags_by_commit(path: Optional[pathlib.PurePath]) -> Dict[str, List[Tag]]:
+    tags: Dict[str, List[Tag]] = {}
+    for tag in await get_tags(path=path):
+        name = tag["object_name"]
+        if name not in tags:
+            tags[name] = []
+
+        tags[name].append(tag)
+
+    return tags
+
+
+def _truncate_body(commit: Commit, max_body_size: int) -> None:
+    body = commit.get("body")
+    if body is not None and len(body) > max_body_size:
+        name = commit.get("rev") or repr(commit.get("subject"))
+        logger.warning(f"Truncating body of commit {name}, {len(body)} characters")
+
+        commit["body"] = body[:max_body_size]
 
 
 async def get_commits(
     *,
     start: str = None,
     end: str = "HEAD",
+    exclude: Iterable[str] = None,
     path: pathlib.PurePath = None,
     reverse: bool = False,
+    author: str = None,
+    since: str = None,
+    until: str = None,
+    grep: str = None,
+    no_merges: bool = False,
+    first_parent: bool = False,
+    paths: Iterable[str] = None,
+    fields: Iterable[str] = None,
+    prefilter: Callable[[Commit], bool] = None,
+    boundary: Set[str] = None,
+    max_body_size: int = None,
 ) -> AsyncIterable[Commit]:
-    """Get the commits between start and end."""
+    """
+    Get the commits between start and end. Commits reachable from any of `exclude` will
+    also be left out. If `boundary` is given, the hashes of the excluded commits where
+    the walk stopped (ie. the excluded parents of the commits retrieved) are added to
+    it.
+
+    Any filters given are passed through to `git log`, so commits which don't match
+    them are never read from the repository. If `fields` is given, only those fields
+    will be retrieved for each commit.
+
+    If `prefilter` is given, commits are first retrieved without their body and only
+    those accepted by `prefilter` will have their body read from the repository.
+    `prefilter` is given the hash, subject and tags (if requested) of each commit.
+
+    If `max_body_size` is given, bodies longer than that many characters are truncated,
+    logging a warning.
+    """
 
     if not await is_git_repository(path):
         logger.warning("Not a git repository.")
         return
 
-    tags: Dict[str, List[Tag]] = {}
-    for tag in await get_tags(path=path):
-        name = tag["object_name"]
-        if name not in tags:
-            tags[name] = []
+    requested_fields = _select_fields(commit_fields, fields)
+    include_tags = "tags" in requested_fields
+    include_body = "body" in requested_fields and prefilter is not None
 
-        tags[name].append(tag)
+    format_fields = _get_format_fields(
+        requested_fields, prefilter=prefilter is not None
+    )
+    if boundary is not None and "rev" not in format_fields:
+        format_fields.insert(0, "rev")
+
+    tags = await _get_tags_by_commit(path) if include_tags else {}
+
+    # Boundary commits are marked so they can be told apart from the commits retrieved
+    marker = ["%m"] if boundary is not None else []
 
-    fmt = "%x00".join([*_get_commit_format(), delimiter])
+    fmt = "%x00".join([*marker, *_get_commit_format(format_fields), delimiter])
     args = ["git", "log", f"--pretty=format:{fmt}"]
 
     if reverse:
         args.append("--reverse")
-
-    if start:
-        args.append(f"{start}..{end}")
-    else:
-        args.append(end)
+    if boundary is not None:
+        args.append("--boundary")
+
+    args.extend(
+        _get_filter_args(
+            author=author,
+            since=since,
+            until=until,
+            grep=grep,
+            no_merges=no_merges,
+            first_parent=first_parent,
+        )
+    )
+
+    args.append(f"{start}..{end}" if start else end)
+    args.extend(f"^{rev}" for rev in exclude or [])
+
+    if paths:
+        args.extend(["--", *paths])
 
     async with _run(*args, stdout=asyncio.subprocess.PIPE, cwd=path) as process:
         assert process.stdout
+        stdout = process.stdout
 
         counter = 0
-        async for commit_data in _process_delimited_stream(process.stdout, delimiter):
-            commit_fields = commit_data[:-1].split("\x00")
-            commit = _create_commit(*commit_fields)
+        skipped = 0
+
+        async def _read_commits() -> AsyncIterable[Commit]:
+            nonlocal counter, skipped
+
+            lines = _process_delimited_stream(stdout, delimiter)
+            try:
+                async for commit_data in lines:
+                    values = commit_data[:-1].split("\x00")
+                    if boundary is not None:
+                        mark, *values = values
+                        if mark.strip() == "-":
+                            boundary.add(values[format_fields.index("rev")].strip())
+                            continue
+
+                    commit = _create_commit_from_fields(format_fields, values)
+
+                    counter += 1
+                    if include_tags:
+                        commit["tags"] = tags.get(commit["rev"], [])
+
+                    if prefilter is not None and not prefilter(commit):
+                        skipped += 1
+                        continue
+
+                    yield commit
+            finally:
+                await pipeline.aclose(lines)
 
-            counter += 1
-            if commit["rev"] in tags:
-                commit["tags"] = tags[commit["rev"]]
+        stream = _read_commits()
+        if include_body:
+            stream = _read_bodies(stream, get_object_reader(path))
 
-            yield commit
+        try:
+            async for commit in stream:
+                if max_body_size is not None:
+                    _truncate_body(commit, max_body_size)
+
+                # Drop any fields which were only needed internally, and make sure
+                # fields are in a consistent order
+                if include_body or len(commit) != len(requested_fields):
+                    commit = _project_commit(commit, requested_fields)
+
+                yield commit
+        finally:
+            instrumentation.count("git.commits_read", counter)
+            instrumentation.count("git.commits_skipped", skipped)
+
+            # Stop reading from git straight away if the caller stopped early
+            await pipeline.aclose(stream)
 
         logger.debug(f"Read {counter} commits from repository")
+        if prefilter is not None:
+            logger.debug(f"Skipped {skipped} commits rejected by prefilter")
 
 
-@aiocache.cached()
 async def get_tags(
     *,
     path: pathlib.PurePath = None,
     pattern: str = None,
     sort: str = None,
     reverse: bool = False,
+    fields: Iterable[str] = None,
+    merged: str = None,
 ) -> Iterable[Tag]:
-    """ Gets all tags in the repository. """
+    """
+    Gets all tags in the repository. If `merged` is given, only tags reachable from it
+    are returned. Tags are cached until any ref in the repository changes.
+    """
 
-    if not await is_git_repository(path):
+    try:
+        fingerprint = await get_ref_fingerprint(path)
+    except ValueError:
         logger.warning("Not a git repository.")
         return []
 
-    fmt = "%00".join([*_get_tag_format(), delimiter])
+    fields = None if fields is None else tuple(fields)
+    key = (_get_path_key(path), fingerprint, pattern, sort, reverse, fields, merged)
+
+    tags = _tags.get(key)
+    if tags is None:
+        tags = await _read_tags(
+            path=path,
+            pattern=pattern,
+            sort=sort,
+            reverse=reverse,
+            fields=fields,
+            merged=merged,
+        )
+        _tags.set(key, tags)
+
+    return list(tags)
+
+
+async def _read_tags(
+    *,
+    path: Optional[pathlib.PurePath],
+    pattern: Optional[str],
+    sort: Optional[str],
+    reverse: bool,
+    fields: Optional[Iterable[str]],
+    merged: Optional[str],
+) -> List[Tag]:
+    format_fields = _select_fields(tag_fields, fields)
+
+    fmt = "%00".join([*_get_tag_format(format_fields), delimiter])
     args = ["git", "tag", "--list", f"--format={fmt}"]
 
     if sort is not None:
         sort = sort if not reverse else "-" + sort
         args.append(f"--sort={sort}")
 
+    if merged is not None:
+        args.append(f"--merged={merged}")
+
     if pattern is not None:
         args.append(pattern)
 
@@ -248,23 +958,186 @@ async def get_tags(
 
         tags: List[Tag] = []
         async for tag_data in _process_delimited_stream(process.stdout, delimiter):
-            tag_fields = tag_data[:-1].split("\x00")
-            tag = _create_tag(*tag_fields)
+            values = tag_data[:-1].split("\x00")
+            tag = _create_tag_from_fields(format_fields, values)
 
             tags.append(tag)
 
         logger.debug(f"Read {len(tags)} tags from repository")
+        instrumentation.count("git.tags_read", len(tags))
         return tags
 
 
-@aiocache.cached()
+async def get_last_tag(
+    rev: str = "HEAD",
+    *,
+    path: pathlib.PurePath = None,
+    pattern: str = None,
+    exclude: Iterable[str] = None,
+) -> Optional[str]:
+    """
+    Gets the name of the tag closest to the given commit, out of the tags reachable from
+    it. Tags can be filtered with a glob-style `pattern`, or excluded by name.
+    """
+
+    args = ["git", "describe", "--tags", "--abbrev=0"]
+    if pattern is not None:
+        args.append(f"--match={pattern}")
+
+    args.extend(f"--exclude={name}" for name in exclude or [])
+    args.append(rev)
+
+    async with _run(*args, stdout=asyncio.subprocess.PIPE, cwd=path) as process:
+        stdout, _ = await process.communicate()
+
+    if process.returncode != 0:
+        return None
+
+    return stdout.decode().strip()
+
+
 async def get_repository_root(path: pathlib.PurePath = None) -> pathlib.Path:
-    args = [
-        "git",
-        "rev-parse",
-        "--show-toplevel",
-    ]
+    key = _get_path_key(path)
+
+    root = _repository_roots.get(key)
+    if root is None:
+        args = [
+            "git",
+            "rev-parse",
+            "--show-toplevel",
+        ]
+
+        async with _run(*args, stdout=asyncio.subprocess.PIPE, cwd=path) as process:
+            stdout, _ = await process.communicate()
+
+        root = pathlib.Path(stdout.decode().strip())
+        if process.returncode == 0:
+            _repository_roots.set(key, root)
+
+    return root
+
+
+async def get_git_path(
+    name: str, *, path: pathlib.PurePath = None
+) -> Optional[pathlib.Path]:
+    """Gets the path of a file in the repository's git directory, eg. `packed-refs`."""
+
+    args = ["git", "rev-parse", "--git-path", name]
 
     async with _run(*args, stdout=asyncio.subprocess.PIPE, cwd=path) as process:
-        root, _ = await process.communicate()
-        return pathlib.Path(root.decode().strip())
+        stdout, _ = await process.communicate()
+
+    if process.returncode != 0:
+        return None
+
+    return pathlib.Path(path or ".", stdout.decode().strip()).absolute()
+
+
+# The files in the git directory which are updated whenever HEAD or any ref changes
+_ref_files = ["HEAD", "packed-refs", "refs"]
+
+# Filesystems may only update modification times every few milliseconds (or seconds,
+# on some), so changes made around the time refs were last scanned might not change
+# them. Refs modified within this many nanoseconds of being scanned are scanned again.
+_RACY_NS = 2_000_000_000
+
+
+def _get_file_state(path: str) -> _FileState:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _scan_refs(path: str, entries: List[Any], directories: List[str]) -> None:
+    """
+    Adds the state of a ref file, or of every ref in a directory, to `entries`. Refs
+    are replaced rather than modified in place, so the inode listed for each one by
+    `os.scandir` changes whenever it is updated, without having to `stat` every ref.
+    """
+
+    state = _get_file_state(path)
+    entries.append((path, state))
+
+    if not os.path.isdir(path):
+        return
+
+    directories.append(path)
+
+    # Refs may be removed while they are being scanned, eg. when they are packed
+    with contextlib.suppress(FileNotFoundError), os.scandir(path) as listing:
+        children = sorted(
+            (entry.name, entry.inode(), entry.is_dir(follow_symlinks=False))
+            for entry in listing
+        )
+
+        entries.append(children)
+        for name, _, is_dir in children:
+            if is_dir:
+                _scan_refs(os.path.join(path, name), entries, directories)
+
+
+def _is_unchanged(state: _RefState) -> bool:
+    states = [_get_file_state(path) for path in state.paths]
+    if states != state.states:
+        return False
+
+    # Anything modified too close to the scan could have changed since without it
+    # being visible in modification times
+    modified = max(file_state[0] for file_state in states if file_state is not None)
+    return modified < state.scanned - _RACY_NS
+
+
+async def _get_ref_paths(key: pathlib.Path) -> List[pathlib.Path]:
+    paths = _ref_paths.get(key)
+    if paths is None:
+        args = ["git", "rev-parse"]
+        for name in _ref_files:
+            args.extend(["--git-path", name])
+
+        async with _run(*args, stdout=asyncio.subprocess.PIPE, cwd=key) as process:
+            stdout, _ = await process.communicate()
+
+        if process.returncode != 0:
+            raise ValueError(f"Not a git repository, {key.as_posix()}")
+
+        paths = [key.joinpath(line) for line in stdout.decode().splitlines()]
+        _ref_paths.set(key, paths)
+
+    return paths
+
+
+async def get_ref_fingerprint(path: pathlib.PurePath = None) -> str:
+    """
+    Gets a fingerprint of HEAD and every ref in the repository, which changes whenever
+    any of them are updated, eg. by a commit, checkout, fetch or new tag. Only the
+    first call for each repository runs git. After that, refs are only scanned again if
+    HEAD, packed-refs or any directory of refs has been modified since they were last
+    scanned, or shortly before then.
+    """
+
+    key = _get_path_key(path)
+
+    state = _ref_states.get(key)
+    if state is not None and _is_unchanged(state):
+        return state.fingerprint
+
+    scanned = time.time_ns()
+
+    paths = [ref_path.as_posix() for ref_path in await _get_ref_paths(key)]
+
+    entries: List[Any] = []
+    directories: List[str] = []
+    for ref_path in paths:
+        _scan_refs(ref_path, entries, directories)
+
+    fingerprint = hashlib.sha1(repr(entries).encode()).hexdigest()
+
+    paths.extend(directories)
+
+    states = [_get_file_state(path) for path in paths]
+    _ref_states.set(key, _RefState(scanned, fingerprint, paths, states))
+
+    return fingerprint
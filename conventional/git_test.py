@@ -1,6 +1,8 @@
+import asyncio
 import logging
+import os
 import pathlib
-import subprocess
+from typing import Dict, List, Set
 
 import pytest
 
@@ -10,15 +12,6 @@ logging.basicConfig(force=True, level=logging.DEBUG)
 pytestmark = pytest.mark.asyncio
 
 
-@pytest.fixture()
-def git_repository(tmp_path_factory) -> pathlib.PurePath:
-    path = tmp_path_factory.mktemp("git")
-    print(f"Git repository: {path.as_posix()}")
-
-    subprocess.run(["git", "init"], cwd=str(path))
-    return path
-
-
 async def test_commit_list(git_repository: pathlib.PurePath) -> None:
     await git.create_commit(git_repository, "feat: A new feature", allow_empty=True)
     await git.create_commit(git_repository, "fix: And a minor fix", allow_empty=True)
@@ -80,3 +73,240 @@ async def test_commit_tags(git_repository: pathlib.PurePath) -> None:
         assert expected_commit == {
             k: v for k, v in actual_commit.items() if k in expected_commit
         }
+
+
+async def test_commit_filters(git_repository: pathlib.PurePath) -> None:
+    await git.create_commit(git_repository, "feat: A new feature", allow_empty=True)
+    await git.create_commit(git_repository, "fix: And a minor fix", allow_empty=True)
+    await git.create_commit(git_repository, "feat: Another feature", allow_empty=True)
+
+    commits = [
+        commit
+        async for commit in git.get_commits(path=git_repository, grep="^feat")
+    ]
+    expected_commits = [
+        {"subject": "feat: Another feature"},
+        {"subject": "feat: A new feature"},
+    ]
+
+    assert len(commits) == len(expected_commits)
+    for actual, expected in zip(commits, expected_commits):
+        assert expected == {k: v for k, v in actual.items() if k in expected}
+
+
+async def test_commit_fields(git_repository: pathlib.PurePath) -> None:
+    await git.create_commit(git_repository, "feat: Version A.B.C", allow_empty=True)
+    await git.create_tag(git_repository, "vA.B.C")
+
+    commits = [
+        commit
+        async for commit in git.get_commits(
+            path=git_repository, fields=["subject", "tags"]
+        )
+    ]
+    tags = await git.get_tags(path=git_repository, fields=["name"])
+
+    assert tags == [{"name": "vA.B.C"}]
+
+    assert len(commits) == 1
+    assert set(commits[0].keys()) == {"subject", "tags"}
+    assert [tag["name"] for tag in commits[0]["tags"]] == ["vA.B.C"]
+
+
+async def test_commit_prefilter(git_repository: pathlib.PurePath) -> None:
+    await git.create_commit(
+        git_repository, "feat: A new feature\n\nWith a body", allow_empty=True
+    )
+    await git.create_commit(
+        git_repository, "An unconventional commit\n\nWith a body", allow_empty=True
+    )
+
+    commits = [
+        commit
+        async for commit in git.get_commits(
+            path=git_repository,
+            prefilter=lambda commit: commit["subject"].startswith("feat"),
+        )
+    ]
+    expected_commits = [{"subject": "feat: A new feature", "body": "With a body"}]
+
+    assert len(commits) == len(expected_commits)
+    for actual, expected in zip(commits, expected_commits):
+        assert list(actual.keys()) == list(git.commit_fields)
+        assert expected == {k: v for k, v in actual.items() if k in expected}
+
+
+async def test_commit_max_body_size(git_repository: pathlib.PurePath) -> None:
+    await git.create_commit(
+        git_repository, "feat: A new feature\n\n" + "x" * 100, allow_empty=True
+    )
+
+    for prefilter in [None, lambda commit: True]:
+        stream = git.get_commits(
+            path=git_repository, prefilter=prefilter, max_body_size=10
+        )
+        assert [commit["body"] async for commit in stream] == ["x" * 10]
+
+
+async def test_commits_closed_early(git_repository: pathlib.PurePath) -> None:
+    # Enough output for git to still be writing once reading has been paused
+    for index in range(40):
+        message = f"feat: Feature {index}\n\n" + "A long body. " * 600
+        await git.create_commit(git_repository, message, allow_empty=True)
+
+    stream = git.get_commits(path=git_repository)
+    assert (await stream.__anext__())["subject"] == "feat: Feature 39"
+
+    # Give git time to fill the pipe, then stop reading from it
+    await asyncio.sleep(0.2)
+    await asyncio.wait_for(stream.aclose(), timeout=10)
+
+
+async def test_object_reader(git_repository: pathlib.PurePath) -> None:
+    await git.create_commit(git_repository, "feat: A new feature", allow_empty=True)
+    await git.create_commit(git_repository, "fix: And a minor fix", allow_empty=True)
+
+    commits = [commit async for commit in git.get_commits(path=git_repository)]
+
+    async with git.ObjectReader(git_repository) as reader:
+        objects = [
+            obj
+            async for obj in reader.read_many(
+                [commit["rev"] for commit in commits] + ["missing-object"]
+            )
+        ]
+        info = await reader.read_info(commits[0]["rev"])
+
+    assert len(objects) == len(commits) + 1
+    for obj, commit in zip(objects, commits):
+        assert obj is not None
+        assert obj["name"] == commit["rev"]
+        assert obj["type"] == "commit"
+        assert commit["subject"] in obj.get("contents", b"").decode()
+
+    assert objects[-1] is None
+
+    assert info is not None
+    assert info["type"] == "commit"
+    assert "contents" not in info
+
+
+async def test_reachability(git_repository: pathlib.PurePath) -> None:
+    await git.create_commit(git_repository, "feat: Version A.B.C", allow_empty=True)
+    await git.create_tag(git_repository, "vA.B.C")
+    await git.create_commit(git_repository, "fix: And a minor fix", allow_empty=True)
+    await git.create_tag(git_repository, "vA.B.C-1")
+    await git.create_commit(git_repository, "feat: Unreleased", allow_empty=True)
+
+    commits = [commit async for commit in git.get_commits(path=git_repository)]
+    reachability = git.Reachability(git_repository)
+
+    assert await reachability.is_ancestor("vA.B.C", "HEAD")
+    assert not await reachability.is_ancestor("HEAD", "vA.B.C")
+    assert await reachability.get_independent(["vA.B.C", "vA.B.C-1", "HEAD"]) == [
+        commits[0]["rev"]
+    ]
+
+    boundary: Set[str] = set()
+    range_commits = git.get_commits(
+        path=git_repository, exclude=["vA.B.C"], fields=["rev"], boundary=boundary
+    )
+    assert [commit["rev"] async for commit in range_commits] == [
+        commits[0]["rev"],
+        commits[1]["rev"],
+    ]
+    assert boundary == {commits[2]["rev"]}
+
+
+async def test_instrumentation(git_repository: pathlib.PurePath) -> None:
+    from . import instrumentation
+
+    class Subscriber(instrumentation.Subscriber):
+        def __init__(self) -> None:
+            self.spans: List[str] = []
+            self.counters: Dict[str, int] = {}
+
+        def span_ended(self, span: instrumentation.Span, seconds: float) -> None:
+            self.spans.append(span.name)
+
+        def counted(self, name: str, value: int) -> None:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    await git.create_commit(git_repository, "feat: A new feature", allow_empty=True)
+
+    subscriber = Subscriber()
+    instrumentation.subscribe(subscriber)
+    try:
+        commits = [commit async for commit in git.get_commits(path=git_repository)]
+    finally:
+        instrumentation.unsubscribe(subscriber)
+
+    assert len(commits) == 1
+    assert "git.run" in subscriber.spans
+    assert "git.read_stream" in subscriber.spans
+    assert subscriber.counters["git.commits_read"] == 1
+    assert subscriber.counters["git.bytes_read"] > 0
+
+    # Nothing is emitted once the subscriber has been removed
+    spans = len(subscriber.spans)
+    _ = [commit async for commit in git.get_commits(path=git_repository)]
+    assert len(subscriber.spans) == spans
+
+
+async def test_ref_fingerprint(git_repository: pathlib.PurePath) -> None:
+    await git.create_commit(git_repository, "feat: A new feature", allow_empty=True)
+
+    fingerprint = await git.get_ref_fingerprint(git_repository)
+    assert await git.get_ref_fingerprint(git_repository) == fingerprint
+
+    fingerprints = {fingerprint}
+
+    await git.create_tag(git_repository, "1.0.0")
+    fingerprints.add(await git.get_ref_fingerprint(git_repository))
+
+    await git.create_commit(git_repository, "fix: A minor fix", allow_empty=True)
+    fingerprints.add(await git.get_ref_fingerprint(git_repository))
+
+    process = await asyncio.create_subprocess_exec(
+        "git", "pack-refs", "--all", cwd=git_repository
+    )
+    await process.wait()
+    fingerprints.add(await git.get_ref_fingerprint(git_repository))
+
+    assert len(fingerprints) == 4
+
+
+async def test_ref_fingerprint_rescans_changed_refs(
+    git_repository: pathlib.PurePath,
+) -> None:
+    await git.create_commit(git_repository, "feat: A new feature", allow_empty=True)
+    await git.create_tag(git_repository, "1.0.0")
+
+    # Refs modified long ago aren't scanned again until something is modified
+    git_dir = pathlib.Path(git_repository, ".git")
+    for path in [git_dir.joinpath("HEAD"), *git_dir.joinpath("refs").glob("**")]:
+        os.utime(path, (0, 0))
+
+    fingerprint = await git.get_ref_fingerprint(git_repository)
+
+    hits = git._ref_states.hits
+    assert await git.get_ref_fingerprint(git_repository) == fingerprint
+    assert git._ref_states.hits == hits + 1
+
+    await git.create_tag(git_repository, "1.0.1")
+    assert await git.get_ref_fingerprint(git_repository) != fingerprint
+
+
+async def test_tags_cached_until_refs_change(git_repository: pathlib.PurePath) -> None:
+    await git.create_commit(git_repository, "feat: A new feature", allow_empty=True)
+    await git.create_tag(git_repository, "1.0.0")
+
+    hits = git._tags.hits
+    tags = await git.get_tags(path=git_repository)
+    assert await git.get_tags(path=git_repository) == tags
+    assert git._tags.hits == hits + 1
+
+    await git.create_tag(git_repository, "1.0.1")
+
+    tags = await git.get_tags(path=git_repository)
+    assert [tag["name"] for tag in tags] == ["1.0.0", "1.0.1"]
@@ -0,0 +1,128 @@
+"""
+Hooks for observing what `conventional` is doing, for example to feed timings into
+another metrics or tracing system.
+
+Subscribers are notified when spans (timed sections of work) start and end, and when
+counters are incremented. When no subscribers are attached, emitting spans and
+counters does next to nothing.
+"""
+
+import time
+from typing import Any, Dict, List
+
+
+class Span:
+    """A timed section of work, such as running a git command or parsing a commit."""
+
+    __slots__ = ("name", "attributes", "start", "elapsed")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.elapsed = 0.0
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def pause(self) -> None:
+        """
+        Stops timing the span until it is resumed, eg. while a generator is suspended
+        and other work is being done with what it yielded.
+        """
+
+        if self.start:
+            self.elapsed += time.perf_counter() - self.start
+            self.start = 0.0
+
+    def resume(self) -> None:
+        if not self.start:
+            self.start = time.perf_counter()
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+        for subscriber in _subscribers:
+            subscriber.span_started(self)
+
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.pause()
+        seconds = self.elapsed
+
+        for subscriber in _subscribers:
+            subscriber.span_ended(self, seconds)
+
+
+class _NoopSpan(Span):
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def pause(self) -> None:
+        pass
+
+    def resume(self) -> None:
+        pass
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+
+class Subscriber:
+    """Base class for subscribers. Override any of the methods to receive events."""
+
+    def span_started(self, span: Span) -> None:
+        pass
+
+    def span_ended(self, span: Span, seconds: float) -> None:
+        pass
+
+    def counted(self, name: str, value: int) -> None:
+        pass
+
+
+_subscribers: List[Subscriber] = []
+_noop_span = _NoopSpan("", {})
+
+
+def subscribe(subscriber: Subscriber) -> None:
+    if subscriber not in _subscribers:
+        _subscribers.append(subscriber)
+
+
+def unsubscribe(subscriber: Subscriber) -> None:
+    if subscriber in _subscribers:
+        _subscribers.remove(subscriber)
+
+
+def is_enabled() -> bool:
+    return bool(_subscribers)
+
+
+def span(name: str, /, **attributes: Any) -> Span:
+    """
+    Creates a span, to be used as a context manager around the work being timed. The
+    returned span does nothing if there are no subscribers.
+    """
+
+    if not _subscribers:
+        return _noop_span
+
+    return Span(name, attributes)
+
+
+def count(name: str, value: int = 1) -> None:
+    """Increments the counter with the given name."""
+
+    if not _subscribers:
+        return
+
+    for subscriber in _subscribers:
+        subscriber.counted(name, value)
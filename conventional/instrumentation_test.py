@@ -0,0 +1,37 @@
+import time
+from typing import List
+
+from . import instrumentation
+
+
+class _Subscriber(instrumentation.Subscriber):
+    def __init__(self) -> None:
+        self.seconds: List[float] = []
+
+    def span_ended(self, span: instrumentation.Span, seconds: float) -> None:
+        self.seconds.append(seconds)
+
+
+def test_paused_span() -> None:
+    subscriber = _Subscriber()
+    instrumentation.subscribe(subscriber)
+
+    try:
+        with instrumentation.span("test") as span:
+            span.pause()
+            time.sleep(0.05)
+            span.resume()
+    finally:
+        instrumentation.unsubscribe(subscriber)
+
+    assert len(subscriber.seconds) == 1
+    assert subscriber.seconds[0] < 0.05
+
+
+def test_noop_span() -> None:
+    assert not instrumentation.is_enabled()
+
+    with instrumentation.span("test") as span:
+        span.set("key", "value")
+        span.pause()
+        span.resume()
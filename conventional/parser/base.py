@@ -1,4 +1,5 @@
 import abc
+import logging
 from re import Match
 from typing import (
     Any,
@@ -13,6 +14,8 @@ from typing import (
     cast,
 )
 
+logger = logging.getLogger(__name__)
+
 T = TypeVar("T")
 
 ParseResult = Union[Optional[Match], Iterable[Match]]
@@ -26,6 +29,13 @@ class ParsedItem(TypedDict):
 
 
 class Parser(abc.ABC, Generic[T]):
+    # The fields of a commit used when parsing it. Only these fields need to be
+    # retrieved from the repository for commits which are going to be parsed.
+    fields: Iterable[str] = ("subject", "body")
+
+    # Bodies longer than this many characters are truncated before being parsed
+    max_body_size: Optional[int] = None
+
     def _process_match(self, groups: Dict[str, str]) -> Dict[str, Any]:
         parsers = self.get_parsers()
 
@@ -62,6 +72,15 @@ class Parser(abc.ABC, Generic[T]):
     def get_parsers(self) -> ParserCollection:
         raise NotImplementedError()
 
+    def get_subject_filter(self) -> Optional[Callable[[str], bool]]:
+        """
+        Gets a function which returns whether a commit with the given subject could be
+        parsed. If the subject alone is enough to reject commits, this allows the rest
+        of a commit to be skipped without being read from the repository.
+        """
+
+        return None
+
     def has_parsed(self, data: Dict[str, Any]) -> bool:
         return True
 
@@ -71,6 +90,13 @@ class Parser(abc.ABC, Generic[T]):
     def parse(self, subject: str, body: str = None) -> Optional[T]:
         parsers = self.get_parsers()
 
+        if body is not None and self.max_body_size is not None:
+            if len(body) > self.max_body_size:
+                logger.warning(
+                    f"Truncating body of commit {subject!r}, {len(body)} characters"
+                )
+                body = body[: self.max_body_size]
+
         data: Any = {}
         if body is not None and "body" in parsers:
             data = {**data, **self._process_match({"body": body})}
@@ -1,5 +1,5 @@
 import re
-from typing import Any, Dict, Iterable, Pattern, TypedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Pattern, TypedDict
 
 import confuse
 
@@ -60,6 +60,7 @@ class ConventionalCommitParser(Parser[Change]):
         subject_regex = self._get_subject_regex(
             config["types"].get(confuse.StrSeq(split=False))
         )
+        self._subject_regex = subject_regex
         self._parsers: ParserCollection = {
             "subject": lambda text: subject_regex.match(text),
             "body": lambda text: self._body_regex.match(text),
@@ -69,6 +70,9 @@ class ConventionalCommitParser(Parser[Change]):
     def get_parsers(self) -> ParserCollection:
         return self._parsers
 
+    def get_subject_filter(self) -> Optional[Callable[[str], bool]]:
+        return lambda subject: self._subject_regex.match(subject.strip()) is not None
+
     def has_parsed(self, data: Dict[str, Any]) -> bool:
         return bool(data.get("subject", {}).get("type", False))
 
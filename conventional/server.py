@@ -0,0 +1,344 @@
+"""
+Runs commands sent by `conventional.client` over a Unix socket, keeping a `Session` for
+each repository so that its configuration, parser, tags and parsed commits can be reused
+between commands. Each session is refreshed once HEAD or any ref in its repository
+changes.
+
+Only `list-commits`, `template` and `lint` can be run by the server, and options which
+read from stdin or write to files aren't supported, since the server can't access the
+client's stdin or write files on its behalf. These should be run without the server.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import pathlib
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple, Union
+
+import click
+import typer
+
+from . import client, git
+from .commands import exceptions
+from .session import Session
+from .util.io import CHUNK_SIZE, encode_record, replace_if_changed
+
+logger = logging.getLogger(__name__)
+
+# The number of parsed commit messages kept by each repository's session
+PARSE_CACHE_SIZE = 100_000
+
+
+class CommandError(Exception):
+    """Raised when a command can't be run by the server."""
+
+
+class _Output:
+    """Buffers the output of a command, sending it to the client in frames."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self._writer = writer
+        self._chunks: List[bytes] = []
+        self._size = 0
+
+    async def write(self, data: Union[str, bytes]) -> None:
+        if isinstance(data, str):
+            data = data.encode()
+
+        self._chunks.append(data)
+        self._size += len(data)
+
+        if self._size >= CHUNK_SIZE:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._chunks:
+            await self.send(client.STDOUT, b"".join(self._chunks))
+            self._chunks.clear()
+            self._size = 0
+
+    async def send(self, channel: bytes, data: bytes) -> None:
+        self._writer.write(client.encode_frame(channel, data))
+        await self._writer.drain()
+
+
+_Handler = Callable[["Server", Session, Dict[str, Any], _Output], Awaitable[int]]
+
+
+class Server:
+    def __init__(self, *, config_files: Iterable[pathlib.Path] = ()) -> None:
+        from .cli import main
+
+        self.config_files = list(config_files)
+
+        self._group: click.Group = typer.main.get_command(main)  # type: ignore
+        self._sessions: Dict[pathlib.Path, Session] = {}
+        self._fingerprints: Dict[pathlib.Path, str] = {}
+
+    async def get_session(self, path: pathlib.Path) -> Session:
+        """Gets the session for the repository containing `path`."""
+
+        from .util.config import load_configuration
+
+        if not await git.is_git_repository(path):
+            raise CommandError(f"Not a git repository, {path.as_posix()}")
+
+        root = await git.get_repository_root(path)
+
+        session = self._sessions.get(root)
+        if session is None:
+            config = await load_configuration(self.config_files, path=root)
+            session = Session(root, config, parse_cache_size=PARSE_CACHE_SIZE)
+            self._sessions[root] = session
+
+        fingerprint = await git.get_ref_fingerprint(root)
+        if self._fingerprints.get(root) != fingerprint:
+            logger.debug(f"Refs changed in {root.as_posix()}, refreshing session")
+            await session.refresh()
+            self._fingerprints[root] = fingerprint
+
+        return session
+
+    def parse_args(
+        self, args: List[str], *, cwd: pathlib.Path
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Parses the arguments of a command in the same way as the command-line."""
+
+        if not args:
+            raise CommandError("No command given.")
+
+        name, *args = args
+        if name not in _handlers:
+            raise CommandError(f"{name} can't be run by the server.")
+
+        command = self._group.commands[name]
+        if "--help" in args:
+            raise CommandError(f"Run `conventional {name} --help` for help.")
+
+        # Parsing is synchronous, so no other commands can run while the working
+        # directory is changed to check any paths given relative to the client's
+        cwd_before = os.getcwd()
+        os.chdir(cwd)
+        try:
+            ctx = command.make_context(f"conventional {name}", args)
+        finally:
+            os.chdir(cwd_before)
+
+        # Paths are only converted to `pathlib.Path` by typer once a command is run
+        params = dict(ctx.params)
+        for param in command.params:
+            value = params.get(param.name)
+            if isinstance(param.type, click.Path) and value is not None:
+                params[param.name] = cwd.joinpath(value)
+
+        # Outputs are only opened lazily if they aren't stdout
+        if isinstance(params.get("output"), click.utils.LazyFile):
+            raise CommandError("--output can't be used with the server.")
+
+        return name, params
+
+    async def run(self, args: List[str], *, cwd: pathlib.Path, output: _Output) -> int:
+        name, params = self.parse_args(args, cwd=cwd)
+        session = await self.get_session(cwd)
+
+        try:
+            return await _handlers[name](self, session, params, output)
+        except exceptions.NoCommitsError:
+            raise CommandError("No commits found!")
+        except exceptions.UnknownVersionError as ex:
+            raise CommandError(f"{ex.args[0]} is not a version tag!")
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        output = _Output(writer)
+
+        code = 1
+        try:
+            request = json.loads(await reader.readline())
+            code = await self.run(
+                request["args"], cwd=pathlib.Path(request["cwd"]), output=output
+            )
+            await output.flush()
+        except click.UsageError as ex:
+            code = ex.exit_code
+            await output.send(client.STDERR, f"{ex.format_message()}\n".encode())
+        except CommandError as ex:
+            await output.send(client.STDERR, f"{ex}\n".encode())
+        except ConnectionError:
+            # The client went away, eg. its output was closed early
+            return
+        except Exception:
+            logger.exception("Failed to run command")
+            await output.send(client.STDERR, b"The command failed, see server logs.\n")
+
+        with contextlib.suppress(ConnectionError):
+            await output.send(client.EXIT, str(code).encode())
+            writer.close()
+
+
+async def _list_commits(
+    server: Server, session: Session, params: Dict[str, Any], output: _Output
+) -> int:
+    from .git import commit_fields
+
+    filters: Dict[str, Any] = dict(
+        from_rev=params["from_rev"],
+        from_last_tag=params["from_last_tag"],
+        to_rev=params["to_rev"],
+        reverse=params["reverse"],
+        author=params["author"],
+        since=params["since"],
+        until=params["until"],
+        grep=params["grep"],
+        no_merges=params["no_merges"],
+        first_parent=params["first_parent"],
+        paths=list(params["pathspec"]) or None,
+    )
+
+    if params["fields"] is not None:
+        fields = [field.strip() for field in params["fields"].split(",")]
+        filters["fields"] = [field for field in fields if field]
+
+        unknown = set(filters["fields"]).difference(commit_fields)
+        if unknown:
+            raise CommandError(f"Unknown field(s), {', '.join(sorted(unknown))}.")
+
+    stream: Any
+    if params["parse"]:
+        stream = session.parsed_commits(
+            include_unparsed=params["include_unparsed"], **filters
+        )
+    else:
+        stream = session.commits(**filters)
+
+    format = str(getattr(params["format"], "value", params["format"]))
+    async for item in stream:
+        await output.write(encode_record(item, format=format))
+
+    return 0
+
+
+async def _template(
+    server: Server, session: Session, params: Dict[str, Any], output: _Output
+) -> int:
+    from .commands import template
+
+    if params["input"] is not None:
+        raise CommandError("--input can't be used with the server.")
+    if params["template_name"] is not None:
+        raise CommandError("--template-name can't be used with the server.")
+    if params["watch"]:
+        raise CommandError("--watch can't be used with the server.")
+    if params["branch"]:
+        raise CommandError("--branch can't be used with the server.")
+    if params["model"] is not None:
+        raise CommandError("--model can't be used with the server.")
+
+    stream = session.render(
+        include_unparsed=params["include_unparsed"],
+        unreleased_version=params["unreleased_version"],
+        since_version=params["since_version"],
+        last_versions=params["last_versions"],
+    )
+
+    if params["output_file"] is not None:
+        text = "".join([chunk async for chunk in stream])
+        if replace_if_changed(params["output_file"], [text]):
+            return template.OUTPUT_CHANGED_EXIT_CODE
+
+        return 0
+
+    async for chunk in stream:
+        await output.write(chunk)
+
+    return 0
+
+
+async def _lint(
+    server: Server, session: Session, params: Dict[str, Any], output: _Output
+) -> int:
+    from .commands import lint
+
+    config = await session.get_config()
+    parser = await session.get_parser()
+
+    input: Any
+    if params["message_file"] is not None:
+        input = _read_message(params["message_file"])
+    else:
+        input = session.commits(
+            from_rev=params["from_rev"],
+            from_last_tag=params["from_last_tag"],
+            to_rev=params["to_rev"],
+            reverse=True,
+            fields=["rev", "short_rev", *parser.fields],
+        )
+
+    failures = 0
+    async for commit in lint.main(config, input=input, parser=parser):
+        failures += 1
+        await output.write(lint.format_failure(commit))
+
+    if failures:
+        await output.flush()
+        await output.send(
+            client.STDERR, f"{failures} commit(s) could not be parsed.\n".encode()
+        )
+        return 1
+
+    return 0
+
+
+async def _read_message(path: pathlib.Path) -> Any:
+    from .commands import lint
+
+    yield lint.read_message(path.read_text())
+
+
+_handlers: Dict[str, _Handler] = {
+    "list-commits": _list_commits,
+    "template": _template,
+    "lint": _lint,
+}
+
+
+async def serve(
+    socket_path: pathlib.Path, *, config_files: Iterable[pathlib.Path] = ()
+) -> None:
+    """Runs the server on the given socket until it is cancelled."""
+
+    if socket_path.exists():
+        if client.is_running(socket_path.as_posix()):
+            raise CommandError(f"A server is already running on {socket_path}")
+
+        # Left behind by a server which didn't exit cleanly
+        socket_path.unlink()
+
+    server = Server(config_files=config_files)
+    unix_server = await asyncio.start_unix_server(server.handle, path=socket_path)
+
+    try:
+        # Only the current user should be able to run commands in their repositories
+        os.chmod(socket_path, 0o600)
+        logger.info(f"Listening on {socket_path.as_posix()}")
+
+        async with unix_server:
+            await unix_server.serve_forever()
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            socket_path.unlink()
+
+        await git.close_object_readers()
+
+
+async def cli_main(
+    socket_path: pathlib.Path, *, config_files: Iterable[pathlib.Path] = ()
+) -> None:
+    try:
+        await serve(socket_path, config_files=config_files)
+    except CommandError as ex:
+        logger.error(str(ex))
+        raise typer.Exit(1)
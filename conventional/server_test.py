@@ -0,0 +1,147 @@
+import asyncio
+import contextlib
+import json
+import pathlib
+import subprocess
+from typing import AsyncIterator, List, Tuple
+
+import pytest
+
+from . import client, server
+
+pytestmark = pytest.mark.asyncio
+
+
+def _git(path: pathlib.PurePath, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=str(path), check=True)
+
+
+async def _request(
+    socket_path: pathlib.Path, cwd: pathlib.PurePath, *args: str
+) -> Tuple[int, str, str]:
+    """Sends a command to the server, returning its exit code, stdout and stderr."""
+
+    reader, writer = await asyncio.open_unix_connection(socket_path.as_posix())
+    writer.write(json.dumps({"args": args, "cwd": str(cwd)}).encode() + b"\n")
+
+    output: List[bytes] = [b"", b""]
+    while True:
+        header = await reader.readexactly(client._header.size)
+        channel, size = client._header.unpack(header)
+        data = await reader.readexactly(size)
+
+        if channel == client.EXIT:
+            writer.close()
+            return int(data), output[0].decode(), output[1].decode()
+
+        output[channel != client.STDOUT] += data
+
+
+@contextlib.asynccontextmanager
+async def _serve(tmp_path: pathlib.Path) -> AsyncIterator[pathlib.Path]:
+    path = tmp_path.joinpath("conventional.sock")
+    task = asyncio.ensure_future(server.serve(path))
+
+    try:
+        while not path.exists():
+            await asyncio.sleep(0.01)
+
+        yield path
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert not path.exists()
+
+
+async def test_template(
+    git_repository: pathlib.PurePath, tmp_path: pathlib.Path
+) -> None:
+    async with _serve(tmp_path) as socket_path:
+        _git(git_repository, "commit", "--allow-empty", "-q", "-m", "feat: one")
+        _git(git_repository, "tag", "1.0.0")
+        _git(git_repository, "commit", "--allow-empty", "-q", "-m", "fix: two")
+
+        code, stdout, _ = await _request(socket_path, git_repository, "template")
+        assert code == 0
+        assert "## Unreleased" in stdout and "## 1.0.0" in stdout
+
+        # New refs are picked up without restarting the server
+        _git(git_repository, "tag", "1.0.1")
+
+        code, stdout, _ = await _request(socket_path, git_repository, "template")
+        assert code == 0
+        assert "## Unreleased" not in stdout and "## 1.0.1" in stdout
+
+        code, _, stderr = await _request(
+            socket_path, git_repository, "template", "--since-version", "0.1.0"
+        )
+        assert code == 1
+        assert stderr == "0.1.0 is not a version tag!\n"
+
+        # Files given by --output-file are written relative to the client
+        args = ["template", "--output-file", "CHANGELOG.md"]
+        code, stdout, _ = await _request(socket_path, git_repository, *args)
+        assert (code, stdout) == (3, "")
+        assert "## 1.0.1" in pathlib.Path(git_repository, "CHANGELOG.md").read_text()
+
+        code, _, _ = await _request(socket_path, git_repository, *args)
+        assert code == 0
+
+
+async def test_list_commits_and_lint(
+    git_repository: pathlib.PurePath, tmp_path: pathlib.Path
+) -> None:
+    async with _serve(tmp_path) as socket_path:
+        _git(git_repository, "commit", "--allow-empty", "-q", "-m", "feat: one")
+        _git(git_repository, "commit", "--allow-empty", "-q", "-m", "Not valid")
+
+        code, stdout, _ = await _request(
+            socket_path, git_repository, "list-commits", "--fields", "subject"
+        )
+        assert code == 0
+        assert [json.loads(line) for line in stdout.splitlines()] == [
+            {"subject": "Not valid"},
+            {"subject": "feat: one"},
+        ]
+
+        code, stdout, stderr = await _request(socket_path, git_repository, "lint")
+        assert code == 1
+        assert stdout.endswith(" Not valid\n")
+        assert stderr == "1 commit(s) could not be parsed.\n"
+
+        # Paths are relative to the client's working directory
+        pathlib.Path(git_repository, "message.txt").write_text("fix: A fix\n")
+        code, _, _ = await _request(
+            socket_path, git_repository, "lint", "--message-file", "message.txt"
+        )
+        assert code == 0
+
+
+async def test_unsupported_commands(
+    git_repository: pathlib.PurePath, tmp_path: pathlib.Path
+) -> None:
+    async with _serve(tmp_path) as socket_path:
+        code, _, stderr = await _request(socket_path, git_repository, "index")
+        assert (code, stderr) == (1, "index can't be run by the server.\n")
+
+        code, _, stderr = await _request(
+            socket_path, git_repository, "template", "--output", "CHANGELOG.md"
+        )
+        assert (code, stderr) == (1, "--output can't be used with the server.\n")
+
+        code, _, stderr = await _request(
+            socket_path, git_repository, "template", "--watch"
+        )
+        assert (code, stderr) == (1, "--watch can't be used with the server.\n")
+
+        model_path = tmp_path.joinpath("release.model")
+        model_path.write_text("")
+        code, _, stderr = await _request(
+            socket_path, git_repository, "template", "--model", str(model_path)
+        )
+        assert (code, stderr) == (1, "--model can't be used with the server.\n")
+
+        code, _, stderr = await _request(socket_path, git_repository, "template", "--x")
+        assert (code, stderr) == (2, "No such option: --x\n")
@@ -0,0 +1,360 @@
+import asyncio
+import functools
+import logging
+import pathlib
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from .util import pipeline
+
+if TYPE_CHECKING:
+    import confuse
+    import jinja2
+
+    from . import git
+    from .commands.parse_commit import ParsedCommit
+    from .parser.base import Parser
+    from .commands.template import VersionTuple
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# The refresh generation, version tags and versions built for a call to `get_versions`
+_BuiltVersions = Tuple[int, List["git.Tag"], List["VersionTuple"]]
+
+
+class Session:
+    """
+    Reads, parses and renders the commits in a repository, keeping the configuration,
+    parser, version tags and template environment loaded between calls so that they
+    only have to be set up once.
+
+    If `config` isn't given, it is loaded in the same way as the command-line, from
+    the repository's `.conventional.yaml` file. Each method has an asynchronous form,
+    and a synchronous `iter_` form which runs it on an event loop owned by the session.
+    The synchronous forms can't be used while an event loop is already running. The
+    session should be closed once it is no longer needed.
+
+    The version tags, and the versions built from them by `render`, are kept until
+    `refresh` is called, so it should be called once the repository has changed.
+    Versions are then rebuilt incrementally where possible, see `get_versions`.
+
+    If `parse_cache_size` is given, the results of parsing up to that many commit
+    messages are kept, so that commits read again by later calls don't need to be
+    parsed again. Cached results are shared between calls, so shouldn't be modified.
+    """
+
+    def __init__(
+        self,
+        path: Optional[pathlib.Path] = None,
+        config: Optional["confuse.Configuration"] = None,
+        *,
+        parse_cache_size: int = 0,
+    ) -> None:
+        self.path = path
+        self.parse_cache_size = parse_cache_size
+
+        self._config = config
+        self._parser: Optional["Parser[Any]"] = None
+        self._environment: Optional["jinja2.Environment"] = None
+        self._tags: Optional[List["git.Tag"]] = None
+        self._versions: Dict[Tuple[Any, ...], _BuiltVersions] = {}
+        self._generation = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_config(self) -> "confuse.Configuration":
+        if self._config is None:
+            from .util.config import load_configuration
+
+            self._config = await load_configuration(path=self.path)
+
+        return self._config
+
+    async def get_parser(self) -> "Parser[Any]":
+        if self._parser is None:
+            from .commands.parse_commit import load_parser
+
+            parser = load_parser(await self.get_config())
+            if self.parse_cache_size > 0:
+                cache = functools.lru_cache(maxsize=self.parse_cache_size)
+                parser.parse = cache(parser.parse)  # type: ignore
+
+            self._parser = parser
+
+        return self._parser
+
+    async def get_environment(self) -> "jinja2.Environment":
+        if self._environment is None:
+            from .commands.template import create_environment
+
+            self._environment = create_environment(await self.get_config())
+
+        return self._environment
+
+    async def get_version_tags(self) -> List["git.Tag"]:
+        if self._tags is None:
+            from .commands.template import get_version_tags
+
+            self._tags = await get_version_tags(await self.get_config(), path=self.path)
+
+        return self._tags
+
+    async def refresh(self) -> None:
+        """
+        Forgets the tags and versions read from the repository, eg. after a commit or
+        tag is created.
+        """
+
+        self._tags = None
+        self._generation += 1
+
+    async def commits(
+        self,
+        *,
+        from_rev: Optional[str] = None,
+        from_last_tag: bool = False,
+        to_rev: str = "HEAD",
+        reverse: bool = False,
+        **filters: Any,
+    ) -> AsyncIterator["git.Commit"]:
+        """
+        Yields the commits between `from_rev` and `to_rev`. Any other arguments are
+        passed to `list_commits.main`, eg. `author`, `paths` or `fields`.
+        """
+
+        from .commands.list_commits import main as list_commits
+
+        stream = list_commits(
+            await self.get_config(),
+            from_rev=from_rev,
+            from_last_tag=from_last_tag,
+            to_rev=to_rev,
+            reverse=reverse,
+            path=self.path,
+            **filters,
+        )
+
+        try:
+            async for commit in stream:
+                yield commit
+        finally:
+            await pipeline.aclose(stream)
+
+    async def parsed_commits(
+        self,
+        *,
+        include_unparsed: bool = False,
+        from_rev: Optional[str] = None,
+        from_last_tag: bool = False,
+        to_rev: str = "HEAD",
+        reverse: bool = False,
+        **filters: Any,
+    ) -> AsyncIterator["ParsedCommit"]:
+        """
+        Yields the commits between `from_rev` and `to_rev` once they have been parsed,
+        in the same way as `list-commits --parse`.
+        """
+
+        from .commands.list_commits import main as list_commits
+        from .commands.parse_commit import get_prefilter, main as parse_commit
+
+        config = await self.get_config()
+        parser = await self.get_parser()
+
+        # Make sure the fields the parser relies on are always retrieved
+        if filters.get("fields") is not None:
+            filters["fields"] = {*filters["fields"], *parser.fields}
+
+        stream = parse_commit(
+            config,
+            input=list_commits(
+                config,
+                from_rev=from_rev,
+                from_last_tag=from_last_tag,
+                to_rev=to_rev,
+                reverse=reverse,
+                prefilter=None if include_unparsed else get_prefilter(parser),
+                path=self.path,
+                **filters,
+            ),
+            include_unparsed=include_unparsed,
+            parser=parser,
+        )
+
+        try:
+            async for change in stream:
+                yield change
+        finally:
+            await pipeline.aclose(stream)
+
+    async def render(
+        self,
+        *,
+        include_unparsed: bool = False,
+        unreleased_version: Optional[str] = None,
+        since_version: Optional[str] = None,
+        last_versions: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yields the chunks of the configured template rendered with the versions in the
+        repository, in the same way as the `template` command.
+        """
+
+        from .commands import template
+
+        config = await self.get_config()
+        tags = await self.get_version_tags()
+
+        previous_version = template.get_previous_version(
+            tags, since_version=since_version, last_versions=last_versions
+        )
+
+        versions = await self.get_versions(
+            include_unparsed=include_unparsed,
+            unreleased_version=unreleased_version,
+            previous_version=previous_version,
+        )
+
+        chunks = template.render(
+            config,
+            versions,
+            unreleased_version=unreleased_version,
+            previous_version=previous_version,
+            environment=await self.get_environment(),
+        )
+
+        for chunk in chunks:
+            yield chunk
+
+    async def get_versions(
+        self,
+        *,
+        include_unparsed: bool = False,
+        unreleased_version: Optional[str] = None,
+        previous_version: Optional["git.Tag"] = None,
+    ) -> List["VersionTuple"]:
+        """
+        Gets the versions released after `previous_version`, most recent first, in the
+        same way as the `template` command.
+
+        After `refresh`, if the version tags read previously haven't changed, only the
+        versions after the last of them (and any unreleased commits) are built again.
+        Versions released before then are reused, as the commits they contain can't
+        have changed.
+        """
+
+        from .commands import exceptions, template
+
+        config = await self.get_config()
+        tags = await self.get_version_tags()
+
+        key = (
+            include_unparsed,
+            unreleased_version,
+            previous_version and previous_version["name"],
+        )
+
+        built = self._versions.get(key)
+        if built is not None and built[0] == self._generation:
+            return built[2]
+
+        since_version, released = previous_version, []
+        if built is not None:
+            _, built_tags, built_versions = built
+            if built_tags and tags[: len(built_tags)] == built_tags:
+                since_version = built_tags[-1]
+                released = [
+                    (tag, version)
+                    for tag, version in built_versions
+                    if tag is not None and tag["name"] != unreleased_version
+                ]
+
+                logger.debug(
+                    f"Reusing {len(released)} version(s), building versions since "
+                    f"{since_version['name']}"
+                )
+
+        stream: AsyncIterable[template.Change] = template.yield_changes(
+            config,
+            include_unparsed=include_unparsed,
+            previous_version=since_version,
+            tags=tags,
+            parser=await self.get_parser(),
+            path=self.path,
+        )
+
+        options = pipeline.get_options(config)
+        if options["buffer_size"] > 0:
+            stream = pipeline.buffered(
+                stream, size=options["buffer_size"], batch_size=options["batch_size"]
+            )
+
+        try:
+            versions = await template.build_versions(
+                config,
+                input=stream,
+                include_unparsed=include_unparsed,
+                unreleased_version=unreleased_version,
+            )
+        except exceptions.NoCommitsError:
+            if not released:
+                raise
+
+            versions = []
+
+        versions.extend(released)
+        self._versions[key] = (self._generation, tags, versions)
+
+        return versions
+
+    def iter_commits(self, **kwargs: Any) -> Iterator["git.Commit"]:
+        """Synchronous form of `commits`."""
+
+        return self._iterate(self.commits(**kwargs))
+
+    def iter_parsed_commits(self, **kwargs: Any) -> Iterator["ParsedCommit"]:
+        """Synchronous form of `parsed_commits`."""
+
+        return self._iterate(self.parsed_commits(**kwargs))
+
+    def iter_render(self, **kwargs: Any) -> Iterator[str]:
+        """Synchronous form of `render`."""
+
+        return self._iterate(self.render(**kwargs))
+
+    def _iterate(self, stream: AsyncIterator[T]) -> Iterator[T]:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+
+        loop = self._loop
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(pipeline.aclose(stream))
+
+    def close(self) -> None:
+        if self._loop is not None:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            self._loop = None
+
+    def __enter__(self) -> "Session":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -0,0 +1,106 @@
+import asyncio
+import io
+import os
+import pathlib
+import subprocess
+
+import confuse
+import pytest
+
+from . import Session, git
+from .commands import template
+
+
+def _git(path: pathlib.PurePath, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=str(path), check=True)
+
+
+@pytest.fixture()
+def session(
+    config: confuse.Configuration, git_repository: pathlib.PurePath
+) -> Session:
+    _git(git_repository, "commit", "--allow-empty", "-q", "-m", "feat: one")
+    _git(git_repository, "tag", "1.0.0")
+    _git(git_repository, "commit", "--allow-empty", "-q", "-m", "Not conventional")
+    _git(git_repository, "commit", "--allow-empty", "-q", "-m", "fix: two")
+
+    with Session(pathlib.Path(git_repository), config) as session:
+        yield session
+
+
+def test_commits(session: Session) -> None:
+    commits = list(session.iter_commits(fields=["subject"]))
+    assert commits == [
+        {"subject": "fix: two"},
+        {"subject": "Not conventional"},
+        {"subject": "feat: one"},
+    ]
+
+    changes = list(session.iter_parsed_commits(reverse=True))
+    messages = [change["data"]["subject"]["message"] for change in changes]
+    assert messages == ["one", "two"]
+
+
+def test_render_matches_template_command(
+    config: confuse.Configuration, session: Session
+) -> None:
+    output = io.StringIO()
+
+    cwd = os.getcwd()
+    os.chdir(session.path)
+    try:
+        asyncio.run(
+            template.cli_main(
+                config,
+                input=None,
+                output=output,
+                include_unparsed=False,
+                unreleased_version=None,
+            )
+        )
+    finally:
+        os.chdir(cwd)
+
+    assert "".join(session.iter_render()) == output.getvalue()
+
+
+def test_caches_are_reused(session: Session) -> None:
+    rendered = "".join(session.iter_render())
+
+    parser = session._parser
+    environment = session._environment
+    assert parser is not None and environment is not None
+
+    assert "".join(session.iter_render(unreleased_version="1.0.1")) != rendered
+    assert session._parser is parser
+    assert session._environment is environment
+
+
+def test_refresh(session: Session) -> None:
+    assert "## Unreleased" in "".join(session.iter_render())
+
+    _git(session.path, "tag", "1.0.1")
+
+    # Tags are cached until the session is refreshed
+    assert "## Unreleased" in "".join(session.iter_render())
+
+    asyncio.run(session.refresh())
+    assert "## 1.0.1" in "".join(session.iter_render())
+
+
+def test_refresh_reuses_released_versions(
+    config: confuse.Configuration, session: Session
+) -> None:
+    versions = asyncio.run(session.get_versions())
+    assert [tag and tag["name"] for tag, _ in versions] == [None, "1.0.0"]
+
+    _git(session.path, "commit", "--allow-empty", "-q", "-m", "feat: three")
+    _git(session.path, "tag", "1.1.0")
+    asyncio.run(session.refresh())
+
+    refreshed = asyncio.run(session.get_versions())
+    assert [tag and tag["name"] for tag, _ in refreshed] == ["1.1.0", "1.0.0"]
+    assert refreshed[1][1] is versions[1][1]
+
+    with Session(session.path, config) as fresh:
+        assert "".join(session.iter_render()) == "".join(fresh.iter_render())
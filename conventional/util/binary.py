@@ -0,0 +1,73 @@
+"""
+A compact binary encoding for streams of records, used as an alternative to NDJSON when
+piping records between commands.
+
+Each record is encoded with `marshal` and prefixed with its length as a 4-byte
+big-endian integer. Dates are written as the same strings used in NDJSON, so records
+read from either format are identical. `marshal` isn't safe against maliciously
+constructed data, so this format should only be used to pipe records between commands.
+"""
+
+import datetime
+import marshal
+import struct
+from typing import IO, Any, AsyncIterable
+
+from .compact import Record
+from .io import json_defaults, read_chunks
+
+# The version of the `marshal` format records are written in
+_MARSHAL_VERSION = 4
+
+_length = struct.Struct(">I")
+
+
+def _prepare(value: Any) -> Any:
+    """Converts any values `marshal` can't write in the same way as `json_defaults`."""
+
+    value_type = type(value)
+    if value_type is dict or value_type is Record:
+        return {key: _prepare(item) for key, item in value.items()}
+    elif value_type is list or value_type is tuple:
+        return [_prepare(item) for item in value]
+    elif isinstance(value, (datetime.datetime, datetime.date)):
+        return json_defaults(value)
+
+    return value
+
+
+def dumps(record: Any) -> bytes:
+    """Encodes a record, including its length prefix."""
+
+    data = marshal.dumps(_prepare(record), _MARSHAL_VERSION)
+    return _length.pack(len(data)) + data
+
+
+def loads(data: bytes) -> Any:
+    """Decodes a single record, without its length prefix."""
+
+    return marshal.loads(data)
+
+
+async def read_records(stream: IO[Any]) -> AsyncIterable[Any]:
+    """Reads length-prefixed records from the given stream."""
+
+    buffer = b""
+    async for data in read_chunks(stream):
+        buffer += data
+
+        offset = 0
+        while len(buffer) - offset >= _length.size:
+            (size,) = _length.unpack_from(buffer, offset)
+
+            end = offset + _length.size + size
+            if end > len(buffer):
+                break
+
+            yield loads(buffer[offset + _length.size : end])
+            offset = end
+
+        buffer = buffer[offset:]
+
+    if buffer:
+        raise ValueError("Stream ended part way through a record.")
@@ -0,0 +1,64 @@
+import datetime
+import io
+import json
+import os
+import threading
+
+import pytest
+
+from . import binary
+from .io import json_defaults
+
+RECORDS = [
+    None,
+    {
+        "source": {
+            "rev": "abc123",
+            "subject": "feat: ✨ unicode",
+            "date": datetime.datetime(
+                2020, 1, 2, 3, 4, 5, 678, tzinfo=datetime.timezone.utc
+            ),
+            "tags": [{"name": "1.0.0", "object_name": "abc123"}],
+        },
+        "data": {"type": "feat", "breaking": False, "count": -12, "ratio": 0.5},
+    },
+    [True, ("a", "b"), datetime.date(2021, 2, 3)],
+]
+
+
+@pytest.mark.parametrize("record", RECORDS)
+def test_round_trip(record: object) -> None:
+    data = binary.dumps(record)
+
+    # Records are read back in the same way as they would be from NDJSON
+    expected = json.loads(json.dumps(record, default=json_defaults))
+    assert binary.loads(data[4:]) == expected
+
+
+@pytest.mark.asyncio
+async def test_read_records_from_pipe() -> None:
+    records = [{"rev": str(i), "subject": "x" * i} for i in range(2000)]
+    data = b"".join(binary.dumps(record) for record in records)
+
+    read_fd, write_fd = os.pipe()
+
+    def _write() -> None:
+        with os.fdopen(write_fd, "wb") as stream:
+            stream.write(data)
+
+    writer = threading.Thread(target=_write)
+    writer.start()
+
+    with os.fdopen(read_fd, "r") as stream:
+        items = [item async for item in binary.read_records(stream)]
+
+    writer.join()
+    assert items == records
+
+
+@pytest.mark.asyncio
+async def test_read_truncated_record() -> None:
+    stream = io.BytesIO(binary.dumps({"rev": "abc"})[:-1])
+
+    with pytest.raises(ValueError):
+        [item async for item in binary.read_records(stream)]
@@ -0,0 +1,53 @@
+import collections
+from typing import Dict, Generic, Hashable, Optional, TypeVar
+
+from .. import instrumentation
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Keeps up to `maxsize` values, discarding the least-recently used value once full.
+    Hits and misses are counted, and reported as the `{name}.hits` and `{name}.misses`
+    counters.
+    """
+
+    def __init__(self, name: str, *, maxsize: int = 128) -> None:
+        self.name = name
+        self.maxsize = maxsize
+
+        self.hits = 0
+        self.misses = 0
+
+        self._values: "collections.OrderedDict[K, V]" = collections.OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+            instrumentation.count(f"{self.name}.misses")
+            return None
+
+        self._values.move_to_end(key)
+
+        self.hits += 1
+        instrumentation.count(f"{self.name}.hits")
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._values[key] = value
+        self._values.move_to_end(key)
+
+        while len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._values)}
+
+    def __len__(self) -> int:
+        return len(self._values)
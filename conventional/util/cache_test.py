@@ -0,0 +1,20 @@
+from .cache import LRUCache
+
+
+def test_lru_cache() -> None:
+    cache: LRUCache[str, int] = LRUCache("test", maxsize=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # The least-recently used value is discarded once the cache is full
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2}
+
+    cache.clear()
+    assert len(cache) == 0
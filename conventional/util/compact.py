@@ -0,0 +1,70 @@
+import sys
+from typing import Any, Dict, Iterator, Mapping, Tuple
+
+# The keys whose values are likely to be repeated between many commits, which are
+# interned so that each value is only kept once
+_INTERNED_KEYS = frozenset(["author_name", "author_email", "type", "scope", "key"])
+
+# The index of each key in a record, shared between every record with the same keys
+_indexes: Dict[Tuple[str, ...], Dict[str, int]] = {}
+
+
+class Record(Mapping[str, Any]):
+    """
+    A read-only mapping which keeps its values in a tuple. The index of each key is
+    shared between every record with the same keys, so a record takes much less memory
+    than a dict.
+    """
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index: Dict[str, int], values: Tuple[Any, ...]) -> None:
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"Record({dict(self)!r})"
+
+
+def compact(value: Any, *, keep_raw: bool = True) -> Any:
+    """
+    Converts the dicts in the given value to records and the lists to tuples, interning
+    repeated strings such as authors, types and scopes. Unless `keep_raw` is True, the
+    raw text parsers keep for each part of a commit (`_raw`) is dropped.
+    """
+
+    if isinstance(value, dict):
+        return _compact_dict(value, keep_raw)
+    if isinstance(value, list):
+        return tuple([compact(item, keep_raw=keep_raw) for item in value])
+
+    return value
+
+
+def _compact_dict(value: Dict[str, Any], keep_raw: bool) -> Record:
+    if not keep_raw and "_raw" in value:
+        value = {key: item for key, item in value.items() if key != "_raw"}
+
+    keys = tuple(value)
+    index = _indexes.get(keys)
+    if index is None:
+        index = _indexes[keys] = {key: i for i, key in enumerate(keys)}
+
+    values = list(value.values())
+    for i, item in enumerate(values):
+        if isinstance(item, str):
+            if keys[i] in _INTERNED_KEYS:
+                values[i] = sys.intern(item)
+        elif isinstance(item, (dict, list)):
+            values[i] = compact(item, keep_raw=keep_raw)
+
+    return Record(index, tuple(values))
@@ -0,0 +1,37 @@
+import datetime
+
+from .compact import Record, compact
+
+
+def test_compact() -> None:
+    date = datetime.datetime(2020, 1, 1)
+    change = {
+        "source": {"rev": "abc", "author_name": "Author", "date": date, "tags": []},
+        "data": {
+            "subject": {"_raw": "feat: Change", "type": "feat", "message": "Change"},
+            "metadata": {"closes": ["#1"]},
+        },
+    }
+
+    compacted = compact(change)
+    assert isinstance(compacted, Record)
+    assert compacted == {
+        "source": {"rev": "abc", "author_name": "Author", "date": date, "tags": ()},
+        "data": {
+            "subject": {"_raw": "feat: Change", "type": "feat", "message": "Change"},
+            "metadata": {"closes": ("#1",)},
+        },
+    }
+
+    assert list(compacted["data"]["subject"]) == ["_raw", "type", "message"]
+    assert compacted["data"].get("body", {}) == {}
+    assert "scope" not in compacted["data"]["subject"]
+
+    # Records with the same keys share their index, and repeated strings are interned
+    author = "".join(["Auth", "or"])
+    other = compact({**change, "source": {**change["source"], "author_name": author}})
+    assert other["source"]._index is compacted["source"]._index
+    assert other["source"]["author_name"] is compacted["source"]["author_name"]
+
+    stripped = compact(change, keep_raw=False)
+    assert stripped["data"]["subject"] == {"type": "feat", "message": "Change"}
@@ -1,8 +1,29 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
 import pathlib
-from typing import Optional
+import pickle
+import tempfile
+from typing import Any, Iterable, List, Optional, Tuple
+
+import confuse
 
 from .. import git
 
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the contents of configuration snapshots change
+_SNAPSHOT_VERSION = 1
+
+_default_config_file = pathlib.Path(__file__).parents[1].joinpath(
+    confuse.DEFAULT_FILENAME
+)
+
+# The modification time and size of a file, or None if it doesn't exist
+_FileStamp = Optional[Tuple[int, int]]
+
 
 async def find_project_configuration_file(
     path: pathlib.Path = None,
@@ -16,3 +37,116 @@ async def find_project_configuration_file(
     config_file = root.joinpath(".conventional.yaml")
 
     return config_file if config_file.exists() else None
+
+
+def get_cache_directory() -> pathlib.Path:
+    """Gets the directory cached data is kept in, following the XDG base directories."""
+
+    cache_home = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    return pathlib.Path(cache_home, "conventional")
+
+
+def _stamp(filename: str) -> _FileStamp:
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _get_snapshot_path(filenames: List[str]) -> pathlib.Path:
+    key = json.dumps([_SNAPSHOT_VERSION, confuse.__version__, *filenames])
+    digest = hashlib.sha1(key.encode()).hexdigest()
+
+    return get_cache_directory().joinpath("config", f"{digest}.pickle")
+
+
+def _read_snapshot(path: pathlib.Path, stamps: List[_FileStamp]) -> Optional[Any]:
+    try:
+        with path.open("rb") as snapshot:
+            snapshot_stamps, sources = pickle.load(snapshot)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    # Any change to the files read, including one being created, invalidates it
+    return sources if snapshot_stamps == stamps else None
+
+
+def _write_snapshot(path: pathlib.Path, stamps: List[_FileStamp], sources: Any) -> None:
+    # Written to a temporary file first, so that a partial snapshot is never read
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent)
+    except OSError as ex:
+        logger.debug(f"Unable to write configuration snapshot, {ex}")
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as snapshot:
+            pickle.dump((stamps, sources), snapshot)
+
+        os.replace(temp_name, path)
+    except OSError as ex:
+        logger.debug(f"Unable to write configuration snapshot, {ex}")
+
+        with contextlib.suppress(OSError):
+            os.unlink(temp_name)
+
+
+async def load_configuration(
+    config_files: Iterable[pathlib.Path] = (),
+    *,
+    path: pathlib.Path = None,
+    use_snapshot: bool = True,
+) -> confuse.Configuration:
+    """
+    Loads the configuration for the repository at `path`, or the current directory,
+    including its `.conventional.yaml` file and any of `config_files`.
+
+    Unless `use_snapshot` is False, the parsed configuration files are kept in a
+    snapshot in the cache directory, and loaded from there while none of the files have
+    changed, so that they don't need to be parsed again.
+    """
+
+    config = confuse.Configuration("Conventional", "conventional", read=False)
+
+    project_config_file = await find_project_configuration_file(path)
+
+    # The files configuration is read from, in order of priority
+    filenames = [filename.absolute().as_posix() for filename in config_files][::-1]
+    if project_config_file is not None:
+        filenames.append(project_config_file.as_posix())
+
+    filenames.extend([config.user_config_path(), _default_config_file.as_posix()])
+
+    stamps = [_stamp(filename) for filename in filenames]
+    snapshot_path = _get_snapshot_path(filenames)
+
+    sources = _read_snapshot(snapshot_path, stamps) if use_snapshot else None
+    if sources is not None:
+        logger.debug(f"Loading configuration snapshot, {snapshot_path.as_posix()}")
+
+        for value, filename, default, base_for_paths in sources:
+            config.add(confuse.ConfigSource(value, filename, default, base_for_paths))
+
+        return config
+
+    config.read()
+
+    if project_config_file is not None:
+        logger.debug(f"Loading configuration file, {project_config_file.as_posix()}")
+        config.set_file(project_config_file)
+
+    for filename in config_files:
+        logger.debug(f"Loading configuration file, {filename.as_posix()}")
+        config.set_file(filename)
+
+    if use_snapshot:
+        sources = [
+            (dict(source), source.filename, source.default, source.base_for_paths)
+            for source in config.sources
+        ]
+        _write_snapshot(snapshot_path, stamps, sources)
+
+    return config
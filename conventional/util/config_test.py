@@ -0,0 +1,53 @@
+import pathlib
+
+import pytest
+
+from . import config as config_
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    path = tmp_path.joinpath("cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", path.as_posix())
+    return path
+
+
+async def test_snapshot(
+    git_repository: pathlib.PurePath, cache_home: pathlib.Path
+) -> None:
+    project_file = pathlib.Path(git_repository, ".conventional.yaml")
+    project_file.write_text("template:\n  name: first.md\n")
+
+    config = await config_.load_configuration(path=pathlib.Path(git_repository))
+    assert config["template"]["name"].get(str) == "first.md"
+
+    snapshots = list(cache_home.glob("conventional/config/*.pickle"))
+    assert len(snapshots) == 1
+
+    # Loaded from the snapshot while the files are unchanged
+    config = await config_.load_configuration(path=pathlib.Path(git_repository))
+    assert config["template"]["name"].get(str) == "first.md"
+    assert [source.filename for source in config.sources][0] == project_file.as_posix()
+    assert config.sources[-1].default
+
+    project_file.write_text("template:\n  name: second.md\n")
+
+    config = await config_.load_configuration(path=pathlib.Path(git_repository))
+    assert config["template"]["name"].get(str) == "second.md"
+
+
+async def test_snapshot_includes_config_files(
+    git_repository: pathlib.PurePath, tmp_path: pathlib.Path
+) -> None:
+    config_file = tmp_path.joinpath("extra.yaml")
+    config_file.write_text("template:\n  name: extra.md\n")
+
+    path = pathlib.Path(git_repository)
+    for _ in range(2):
+        config = await config_.load_configuration([config_file], path=path)
+        assert config["template"]["name"].get(str) == "extra.md"
+
+    config = await config_.load_configuration(path=path)
+    assert config["template"]["name"].get(str) == "changelog.md"
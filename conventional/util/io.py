@@ -1,8 +1,19 @@
+import asyncio
+import contextlib
 import datetime
-from typing import Any
+import hashlib
+import json
+import os
+import pathlib
+import stat
+import tempfile
+from typing import IO, Any, AsyncIterable, Iterable, List, Optional, Union
 
 import dateutil.tz
 
+# The size of the chunks to read from and write to streams in
+CHUNK_SIZE = 64 * 1024
+
 
 def json_defaults(obj: Any) -> str:
     """JSON serializer for objects not serializable by default json code"""
@@ -13,3 +24,283 @@ def json_defaults(obj: Any) -> str:
         return obj.isoformat()
 
     raise TypeError("Type %s not serializable" % type(obj))
+
+
+def _get_pipe(stream: IO[Any]) -> Optional[int]:
+    """
+    Gets the file descriptor of the given stream if it is a pipe or socket, which can
+    be read from and written to asynchronously. Other files (eg. regular files or
+    terminals) can't be used with the event loop.
+    """
+
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+    mode = os.fstat(fd).st_mode
+    return fd if stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) else None
+
+
+async def read_chunks(stream: IO[Any]) -> AsyncIterable[bytes]:
+    """
+    Reads the raw bytes of the given stream in large chunks, without blocking the event
+    loop if the stream is a pipe.
+    """
+
+    fd = _get_pipe(stream)
+    if fd is None:
+        # Text streams are read through their underlying binary stream, if they have one
+        source = getattr(stream, "buffer", stream)
+        while True:
+            data = source.read(CHUNK_SIZE)
+            if not data:
+                break
+
+            yield data.encode() if isinstance(data, str) else data
+
+        return
+
+    loop = asyncio.get_event_loop()
+    reader = asyncio.StreamReader(limit=CHUNK_SIZE)
+
+    # The pipe is duplicated so that closing it doesn't close the original stream
+    pipe = os.fdopen(os.dup(fd), "rb", buffering=0)
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe
+    )
+
+    try:
+        while True:
+            data = await reader.read(CHUNK_SIZE)
+            if not data:
+                break
+
+            yield data
+    finally:
+        transport.close()
+
+        # The pipe shares its blocking mode with the original stream
+        os.set_blocking(fd, True)
+
+
+async def read_lines(stream: IO[Any]) -> AsyncIterable[str]:
+    """
+    Reads lines from the given stream without blocking the event loop, if the stream is
+    a pipe. The stream is read in large chunks, which are then split into lines.
+    """
+
+    remaining = b""
+    async for data in read_chunks(stream):
+        data = remaining + data
+
+        end = data.rfind(b"\n")
+        if end == -1:
+            remaining = data
+            continue
+
+        remaining = data[end + 1 :]
+        for line in data[:end].decode().split("\n"):
+            yield line
+
+    if remaining:
+        yield remaining.decode()
+
+
+async def read_json_lines(stream: IO[Any]) -> AsyncIterable[Any]:
+    """Reads a JSON object from each non-empty line of the given stream."""
+
+    async for line in read_lines(stream):
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_records(stream: IO[Any], *, format: str = "ndjson") -> AsyncIterable[Any]:
+    """Reads records from the given stream, as either `ndjson` or `binary`."""
+
+    if format == "binary":
+        from . import binary
+
+        return binary.read_records(stream)
+
+    return read_json_lines(stream)
+
+
+def encode_record(record: Any, *, format: str = "ndjson") -> Union[str, bytes]:
+    """Encodes a record to be written to a stream, as either `ndjson` or `binary`."""
+
+    if format == "binary":
+        from . import binary
+
+        return binary.dumps(record)
+
+    return json.dumps(record, default=json_defaults) + "\n"
+
+
+def _hash_file(path: pathlib.Path) -> Optional[bytes]:
+    digest = hashlib.sha256()
+    try:
+        with path.open("rb") as stream:
+            for data in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(data)
+    except FileNotFoundError:
+        return None
+
+    return digest.digest()
+
+
+def replace_if_changed(path: pathlib.Path, chunks: Iterable[str]) -> bool:
+    """
+    Writes the given chunks to a temporary file alongside `path`, which then atomically
+    replaces `path` only if their contents differ. Returns whether `path` was replaced,
+    so that it is left untouched (including its modification time) when unchanged.
+    """
+
+    digest = hashlib.sha256()
+
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            for chunk in chunks:
+                data = chunk.encode()
+                digest.update(data)
+                stream.write(data)
+
+        if _hash_file(path) == digest.digest():
+            os.unlink(temp_name)
+            return False
+
+        # Temporary files are only readable by their owner, so the permissions of the
+        # file being replaced are kept, or the defaults are used for a new file
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+
+        os.chmod(temp_name, mode)
+        os.replace(temp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_name)
+        raise
+
+    return True
+
+
+class _WriteProtocol(asyncio.streams.FlowControlMixin):
+    def __init__(self) -> None:
+        super().__init__()
+        self.closed = asyncio.get_event_loop().create_future()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        super().connection_lost(exc)
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+
+class Writer:
+    """
+    Writes to a stream in large chunks without blocking the event loop, if the stream
+    is a pipe. Must be closed once everything has been written.
+    """
+
+    def __init__(self, stream: IO[str]) -> None:
+        self._stream = stream
+        self._buffer: List[bytes] = []
+        self._size = 0
+
+        self._opened = False
+        self._fd: Optional[int] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._protocol: Optional[_WriteProtocol] = None
+
+    async def _open(self) -> Optional[asyncio.StreamWriter]:
+        self._opened = True
+
+        self._fd = _get_pipe(self._stream)
+        if self._fd is None:
+            return None
+
+        # Anything already written to the stream needs to come first
+        self._stream.flush()
+
+        loop = asyncio.get_event_loop()
+        pipe = os.fdopen(os.dup(self._fd), "wb", buffering=0)
+        transport, protocol = await loop.connect_write_pipe(_WriteProtocol, pipe)
+        self._protocol = protocol
+
+        # Draining waits until everything has been written to the pipe
+        transport.set_write_buffer_limits(high=0)
+
+        return asyncio.StreamWriter(transport, protocol, None, loop)
+
+    async def write(self, data: Union[str, bytes]) -> None:
+        if isinstance(data, str):
+            data = data.encode()
+
+        self._buffer.append(data)
+        self._size += len(data)
+
+        if self._size >= CHUNK_SIZE:
+            await self.flush()
+
+    def _write_to_stream(self, data: bytes) -> None:
+        # Text streams are written to through their underlying binary stream, if they
+        # have one, so that binary records can be written to them
+        buffer = getattr(self._stream, "buffer", None)
+        if buffer is None:
+            self._stream.write(data.decode())
+            return
+
+        self._stream.flush()
+        buffer.write(data)
+
+    async def flush(self) -> None:
+        data, self._buffer, self._size = b"".join(self._buffer), [], 0
+
+        if not self._opened:
+            self._writer = await self._open()
+
+        if self._writer is None:
+            self._write_to_stream(data)
+            return
+
+        try:
+            self._writer.write(data)
+            await self._writer.drain()
+        except ConnectionResetError as ex:
+            # Match the error raised when writing to a closed pipe synchronously
+            raise BrokenPipeError(*ex.args) from ex
+
+    async def close(self, *, flush: bool = True) -> None:
+        try:
+            if flush:
+                await self.flush()
+        finally:
+            await self._close(quiet=not flush)
+
+    async def _close(self, *, quiet: bool) -> None:
+        try:
+            if self._writer is None:
+                if not quiet:
+                    self._stream.flush()
+                    getattr(self._stream, "buffer", self._stream).flush()
+                return
+
+            # The duplicated pipe is only closed once the event loop has run again
+            self._writer.close()
+            if self._protocol is not None:
+                await self._protocol.closed
+        finally:
+            # The pipe shares its blocking mode with the original stream
+            if self._fd is not None:
+                os.set_blocking(self._fd, True)
+
+    async def __aenter__(self) -> "Writer":
+        return self
+
+    async def __aexit__(self, exc_type: Any, *args: Any) -> None:
+        # Anything left unwritten is discarded if writing failed
+        await self.close(flush=exc_type is None)
@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import pathlib
+import threading
+
+import pytest
+
+from . import io as io_
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_read_json_lines_from_pipe() -> None:
+    lines = [json.dumps({"rev": str(i), "subject": "x" * i}) for i in range(2000)]
+    data = ("\n".join(lines) + "\n\n").encode()
+
+    read_fd, write_fd = os.pipe()
+
+    def _write() -> None:
+        with os.fdopen(write_fd, "wb") as stream:
+            stream.write(data)
+
+    writer = threading.Thread(target=_write)
+    writer.start()
+
+    with os.fdopen(read_fd, "r") as stream:
+        items = [item async for item in io_.read_json_lines(stream)]
+        assert os.get_blocking(read_fd)
+
+    writer.join()
+    assert items == [json.loads(line) for line in lines]
+
+
+async def test_writer_to_pipe() -> None:
+    read_fd, write_fd = os.pipe()
+
+    chunks = []
+
+    def _read() -> None:
+        with os.fdopen(read_fd, "rb") as stream:
+            chunks.append(stream.read())
+
+    reader = threading.Thread(target=_read)
+    reader.start()
+
+    with os.fdopen(write_fd, "w") as stream:
+        async with io_.Writer(stream) as writer:
+            for i in range(10000):
+                await writer.write(f"{i}\n")
+
+    reader.join()
+    assert chunks[0].decode() == "".join(f"{i}\n" for i in range(10000))
+
+
+async def test_writer_to_file() -> None:
+    stream = io.StringIO()
+
+    async with io_.Writer(stream) as writer:
+        await writer.write("a\n")
+        await writer.write("b\n")
+
+    assert stream.getvalue() == "a\nb\n"
+
+
+async def test_writer_binary_to_pipe() -> None:
+    read_fd, write_fd = os.pipe()
+
+    chunks = []
+
+    def _read() -> None:
+        with os.fdopen(read_fd, "rb") as stream:
+            chunks.append(stream.read())
+
+    reader = threading.Thread(target=_read)
+    reader.start()
+
+    records = [{"rev": str(i), "tags": ["1.0.0"]} for i in range(5000)]
+    with os.fdopen(write_fd, "w") as stream:
+        async with io_.Writer(stream) as writer:
+            for record in records:
+                await writer.write(io_.encode_record(record, format="binary"))
+
+    reader.join()
+
+    with io.BytesIO(chunks[0]) as stream:
+        items = [item async for item in io_.read_records(stream, format="binary")]
+
+    assert items == records
+
+
+async def test_replace_if_changed(tmp_path: pathlib.Path) -> None:
+    path = tmp_path.joinpath("CHANGELOG.md")
+
+    assert io_.replace_if_changed(path, ["a\n", "b\n"])
+    assert path.read_text() == "a\nb\n"
+
+    os.chmod(path, 0o640)
+    os.utime(path, ns=(0, 0))
+
+    # Unchanged files aren't touched
+    assert not io_.replace_if_changed(path, ["a\nb", "\n"])
+    assert path.stat().st_mtime_ns == 0
+
+    assert io_.replace_if_changed(path, ["c\n"])
+    assert path.read_text() == "c\n"
+    assert path.stat().st_mode & 0o777 == 0o640
+
+    # No temporary files are left behind
+    assert os.listdir(tmp_path) == ["CHANGELOG.md"]
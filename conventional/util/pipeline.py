@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+from typing import Any, AsyncIterable, List, Optional, Tuple, TypedDict, TypeVar
+
+import confuse
+
+T = TypeVar("T")
+
+EXECUTORS = ["inline", "thread", "process"]
+
+
+class PipelineOptions(TypedDict):
+    buffer_size: int
+    batch_size: int
+    parse_executor: str
+    workers: Optional[int]
+
+
+def get_options(config: confuse.Configuration) -> PipelineOptions:
+    view = config["pipeline"]
+
+    return {
+        "buffer_size": view["buffer-size"].get(int),
+        "batch_size": max(view["batch-size"].get(int), 1),
+        "parse_executor": view["parse-executor"].get(confuse.Choice(EXECUTORS)),
+        "workers": view["workers"].get(),
+    }
+
+
+async def aclose(stream: AsyncIterable[T]) -> None:
+    """Closes `stream` if it is an asynchronous generator, stopping it early."""
+
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+# Each entry is either a batch of items, an error raised by the stream being buffered,
+# or neither once the stream has finished
+_Entry = Tuple[Optional[List[Any]], Optional[BaseException]]
+
+
+async def _produce(
+    stream: AsyncIterable[T], queue: "asyncio.Queue[_Entry]", batch_size: int
+) -> None:
+    batch: List[T] = []
+    error: Optional[BaseException] = None
+
+    try:
+        try:
+            async for item in stream:
+                batch.append(item)
+
+                # Batches are passed on early if the consumer is waiting for them
+                if len(batch) >= batch_size or queue.empty():
+                    await queue.put((batch, None))
+                    batch = []
+        except Exception as ex:
+            error = ex
+
+        # Any items read before an error still need to be passed on
+        if batch:
+            await queue.put((batch, None))
+
+        await queue.put((None, error))
+    finally:
+        await aclose(stream)
+
+
+async def buffered(
+    stream: AsyncIterable[T], *, size: int, batch_size: int = 1
+) -> AsyncIterable[T]:
+    """
+    Reads items from `stream` in a separate task, so that it can keep producing items
+    while they are being consumed. Items are passed between tasks in batches of up to
+    `batch_size`, and up to `size` batches are buffered before the producer has to wait
+    for them to be consumed.
+    """
+
+    queue: "asyncio.Queue[_Entry]" = asyncio.Queue(maxsize=max(size, 1))
+    task = asyncio.ensure_future(_produce(stream, queue, batch_size))
+
+    try:
+        while True:
+            items, error = await queue.get()
+            if error is not None:
+                raise error
+            if items is None:
+                break
+
+            for item in items:
+                yield item
+    finally:
+        if not task.done():
+            task.cancel()
+
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+async def batched(stream: AsyncIterable[T], size: int) -> AsyncIterable[List[T]]:
+    """Groups the items from `stream` into lists of up to `size` items."""
+
+    batch: List[T] = []
+    async for item in stream:
+        batch.append(item)
+
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
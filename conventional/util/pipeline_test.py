@@ -0,0 +1,36 @@
+from typing import AsyncIterable
+
+import pytest
+
+from . import pipeline
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _count(n: int, *, fail: bool = False) -> AsyncIterable[int]:
+    for i in range(n):
+        yield i
+
+    if fail:
+        raise ValueError("Failed")
+
+
+async def test_buffered() -> None:
+    stream = pipeline.buffered(_count(100), size=2, batch_size=8)
+    assert [item async for item in stream] == list(range(100))
+
+
+async def test_buffered_error() -> None:
+    stream = pipeline.buffered(_count(10, fail=True), size=2, batch_size=4)
+
+    items = []
+    with pytest.raises(ValueError):
+        async for item in stream:
+            items.append(item)
+
+    assert items == list(range(10))
+
+
+async def test_batched() -> None:
+    batches = [batch async for batch in pipeline.batched(_count(5), 2)]
+    assert batches == [[0, 1], [2, 3], [4]]
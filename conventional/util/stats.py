@@ -0,0 +1,58 @@
+import time
+from typing import Any, Dict, Optional, TypedDict
+
+from .. import instrumentation
+
+
+class Timing(TypedDict):
+    count: int
+    seconds: float
+
+
+class Stats(instrumentation.Subscriber):
+    """Counters and timings recorded while running a command."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+
+        self.counters: Dict[str, int] = {}
+        self.timings: Dict[str, Timing] = {}
+
+    def span_ended(self, span: instrumentation.Span, seconds: float) -> None:
+        timing = self.timings.setdefault(span.name, {"count": 0, "seconds": 0.0})
+        timing["count"] += 1
+        timing["seconds"] += seconds
+
+    def counted(self, name: str, value: int) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": time.perf_counter() - self.start,
+            "counters": dict(sorted(self.counters.items())),
+            "timings": dict(sorted(self.timings.items())),
+        }
+
+
+_stats: Optional[Stats] = None
+
+
+def enable() -> Stats:
+    global _stats
+
+    disable()
+
+    _stats = Stats()
+    instrumentation.subscribe(_stats)
+
+    return _stats
+
+
+def disable() -> Optional[Stats]:
+    global _stats
+
+    stats, _stats = _stats, None
+    if stats is not None:
+        instrumentation.unsubscribe(stats)
+
+    return stats
@@ -2,7 +2,8 @@
 
 set -e
 
-VERSION=${1}
+# Defaults to the next version, worked out from the commits since the last release
+VERSION=${1:-$(conventional next-version)}
 
 # Generate updated changelog for new release
 conventional template --unreleased-version "${VERSION}" > CHANGELOG.md